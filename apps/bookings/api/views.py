@@ -1,7 +1,7 @@
 import uuid
-from datetime import date
+from datetime import date, timedelta
 
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
@@ -10,15 +10,20 @@ from rest_framework.views import APIView
 
 from apps.bookings.models import Booking
 from apps.bookings.serializers import (
+    BookingListRowSerializer,
     BookingListSerializer,
     BookingDetailSerializer,
     BookingCreateSerializer,
     BookingCancelSerializer,
     CheckAvailabilitySerializer,
+    OpenWindowsSerializer,
     PriceCalculationSerializer,
 )
 from apps.bookings.services import BookingService, PaymentService
+from apps.common.conditional import Validators, conditional_get_enabled, latest, start_of_today
 from apps.common.email_service import NotificationEmailService
+from apps.common.row_serializers import row_serializers_enabled
+from apps.common.sparse_fields import requested_fields, trim
 from apps.listings.models import Listing
 
 
@@ -50,12 +55,23 @@ class BookingViewSet(viewsets.ModelViewSet):
         POST   /api/v1/bookings/{uuid}/cancel/      - Cancel with reason
         
         POST   /api/v1/bookings/check-availability/ - Check listing availability
+        POST   /api/v1/bookings/open-windows/       - Find earliest open stays of N nights
         POST   /api/v1/bookings/calculate-price/    - Calculate booking price
         GET    /api/v1/bookings/listing/{uuid}/booked-dates/ - Get booked dates
     """
 
     permission_classes = [permissions.IsAuthenticated, IsBookingParticipant]
     http_method_names = ["get", "post", "delete"]
+    # Bookings and payments are read from the primary; only the public
+    # booked-dates calendar may lag (apps.common.db_router).
+    replica_reads = {"booked_dates"}
+    # Public calendar and pricing endpoints are rate limited (apps.common.throttling).
+    throttle_scope = {
+        "check_availability": "bookings.availability",
+        "open_windows": "bookings.availability",
+        "booked_dates": "bookings.availability",
+        "calculate_price": "bookings.pricing",
+    }
 
     def get_queryset(self):
         user = self.request.user
@@ -85,7 +101,7 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Allow check-availability and calculate-price without auth for listing detail page."""
-        if self.action in ("check_availability", "calculate_price", "booked_dates"):
+        if self.action in ("check_availability", "open_windows", "calculate_price", "booked_dates"):
             return [permissions.AllowAny()]
         return super().get_permissions()
 
@@ -108,13 +124,22 @@ class BookingViewSet(viewsets.ModelViewSet):
         if past and past.lower() == "true":
             queryset = queryset.filter(check_out__lt=date.today())
 
-        page = self.paginate_queryset(queryset)
+        return self._list_response(queryset)
+
+    def _list_response(self, queryset):
+        """Paginated compact-booking response (`?fields=` trims the items); uses the `.values()` fast path when enabled."""
+        context = self.get_serializer_context()
+        if row_serializers_enabled():
+            rows = BookingListRowSerializer.queryset(queryset)
+            page = self.paginate_queryset(rows)
+            data = BookingListRowSerializer(rows if page is None else page, context=context).data
+        else:
+            page = self.paginate_queryset(queryset)
+            data = BookingListSerializer(queryset if page is None else page, many=True, context=context).data
+        data = trim(data, requested_fields(self.request))
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            return self.get_paginated_response(data)
+        return Response(data)
 
     def create(self, request, *args, **kwargs):
         """Create a new booking."""
@@ -213,8 +238,53 @@ class BookingViewSet(viewsets.ModelViewSet):
                 booking,
                 reason="expired",
             )
+        validators = self._detail_validators(request, booking)
+        if validators is not None:
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
         serializer = BookingDetailSerializer(booking, context={"request": request})
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        return validators.apply(response) if validators is not None else response
+
+    @staticmethod
+    def _detail_validators(request, booking) -> Validators | None:
+        """
+        From the booking, its listing, guest and host (already loaded), its
+        payments, refund jobs and review, the viewer (guest and host see
+        different actions) and today's date (cancellation and review
+        windows). None while the booking awaits payment: its payment
+        deadline counts down on every request.
+        """
+        if not conditional_get_enabled() or booking.status == Booking.Status.PENDING_PAYMENT:
+            return None
+        related = Booking.objects.filter(pk=booking.pk).aggregate(
+            payment_count=Count("payments", distinct=True),
+            payments_changed=Max("payments__updated_at"),
+            refund_job_count=Count("refund_jobs", distinct=True),
+            refund_jobs_changed=Max("refund_jobs__updated_at"),
+            review=Max("review__updated_at"),
+        )
+        changed = [
+            booking.updated_at,
+            booking.listing.updated_at,
+            booking.guest.updated_at,
+            booking.listing.host.updated_at,
+            related["payments_changed"],
+            related["refund_jobs_changed"],
+            related["review"],
+        ]
+        today = start_of_today()
+        return Validators.for_request(
+            request,
+            request.user.pk,
+            today,
+            changed,
+            related["payment_count"],
+            related["refund_job_count"],
+            last_modified=latest(*changed, today),
+            private=True,
+        )
 
     def destroy(self, request, *args, **kwargs):
         """Cancel a booking (DELETE method)."""
@@ -274,13 +344,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status__in=[Booking.Status.PENDING_PAYMENT, Booking.Status.CONFIRMED],
             )
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = BookingListSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
-
-        serializer = BookingListSerializer(queryset, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._list_response(queryset)
 
     @action(
         detail=True,
@@ -501,6 +565,60 @@ class BookingViewSet(viewsets.ModelViewSet):
             "conflicts": BookingService.serialize_conflicts(conflicts),
         })
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="open-windows",
+        permission_classes=[permissions.AllowAny],
+    )
+    def open_windows(self, request):
+        """
+        POST /api/v1/bookings/open-windows/
+        Find the earliest open windows of a given stay length for one or more listings.
+
+        Request body:
+            {
+                "listing_ids": ["uuid", "uuid"],   # or "listing_id": "uuid"
+                "nights": 3,
+                "start": "2024-03-01",             # optional, defaults to today
+                "horizon_days": 30,                # optional
+                "limit": 5                         # optional, windows per listing
+            }
+        """
+        serializer = OpenWindowsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        start = data["start"]
+        end = start + timedelta(days=data["horizon_days"])
+        windows_by_listing = BookingService.find_open_windows_for_listings(
+            listing_ids=data["listing_ids"],
+            nights=data["nights"],
+            start=start,
+            end=end,
+            limit=data["limit"],
+        )
+
+        return Response({
+            "nights": data["nights"],
+            "start": start,
+            "end": end,
+            "results": [
+                {
+                    "listing_id": listing_id,
+                    "windows_count": len(windows_by_listing[listing_id]),
+                    "windows": [
+                        {
+                            "check_in": window["check_in"].isoformat(),
+                            "check_out": window["check_out"].isoformat(),
+                        }
+                        for window in windows_by_listing[listing_id]
+                    ],
+                }
+                for listing_id in data["listing_ids"]
+            ],
+        })
+
     @action(
         detail=False,
         methods=["post"],
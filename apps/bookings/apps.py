@@ -5,3 +5,5 @@ class BookingsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.bookings"
 
+    def ready(self):
+        import apps.bookings.signals  # noqa: F401
@@ -0,0 +1,176 @@
+"""
+Per-process interval index over active bookings, used by availability reads.
+
+Each cached listing keeps its active (pending-payment or confirmed) bookings
+as parallel arrays sorted by check-in ordinal, so overlap and upcoming-range
+lookups are bisects instead of queries. Entries are tagged with a per-listing
+version held in the `hot` cache alias; booking writes bump the version after
+commit and the next read reloads that listing. Use a shared cache backend
+when running several workers, otherwise other processes only see a write
+once the entry is evicted.
+
+The database stays authoritative for writes: booking creation checks overlap
+with `use_index=False` under the listing lock.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.bookings.models import Booking
+from apps.common.cache import HOT, get_cache
+
+
+ACTIVE_STATUSES = (Booking.Status.PENDING_PAYMENT, Booking.Status.CONFIRMED)
+VERSION_KEY_PREFIX = "bookings:availability:v:"
+
+
+class ListingIntervals:
+    """Active bookings of one listing, sorted by check-in."""
+
+    __slots__ = ("version", "starts", "ends", "max_ends", "ids", "statuses")
+
+    def __init__(self, version: int, rows: list[tuple]):
+        rows = sorted(rows, key=lambda row: (row[1], row[2]))
+        self.version = version
+        self.ids = [row[0] for row in rows]
+        self.starts = [row[1].toordinal() for row in rows]
+        self.ends = [row[2].toordinal() for row in rows]
+        self.statuses = [row[3] for row in rows]
+        # Running maximum of check-out ordinals: monotonic even if ranges
+        # overlap (SQLite has no exclusion constraint), so it can be bisected.
+        self.max_ends = []
+        running = 0
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def _candidates(self, after: int, before: int | None = None) -> range:
+        lo = bisect_right(self.max_ends, after)
+        hi = len(self.starts) if before is None else bisect_left(self.starts, before)
+        return range(lo, hi)
+
+    def overlapping(self, check_in: date, check_out: date) -> list[dict]:
+        """Bookings with check_in < `check_out` and check_out > `check_in`."""
+        start, end = check_in.toordinal(), check_out.toordinal()
+        return [
+            {
+                "id": self.ids[i],
+                "check_in": date.fromordinal(self.starts[i]),
+                "check_out": date.fromordinal(self.ends[i]),
+                "status": self.statuses[i],
+            }
+            for i in self._candidates(start, end)
+            if self.ends[i] > start
+        ]
+
+    def ranges_ending_on_or_after(self, day: date) -> list[dict]:
+        """Booked ranges whose check-out is on or after `day`."""
+        ordinal = day.toordinal()
+        return [
+            {
+                "check_in": date.fromordinal(self.starts[i]),
+                "check_out": date.fromordinal(self.ends[i]),
+            }
+            for i in self._candidates(ordinal - 1)
+            if self.ends[i] >= ordinal
+        ]
+
+
+class AvailabilityIndex:
+    """Bounded LRU of ListingIntervals keyed by listing id."""
+
+    def __init__(self, max_listings: int = 1024):
+        self.max_listings = max_listings
+        self._entries: OrderedDict[str, ListingIntervals] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(listing_id: str) -> str:
+        return f"{VERSION_KEY_PREFIX}{listing_id}"
+
+    @staticmethod
+    def current_version(listing_id: str) -> int:
+        return get_cache(HOT).get(AvailabilityIndex._version_key(listing_id), 0)
+
+    @staticmethod
+    def bump_version(listing_id: str) -> None:
+        key = AvailabilityIndex._version_key(listing_id)
+        cache = get_cache(HOT)
+        if cache.add(key, 1, timeout=None):
+            return
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); any new value invalidates.
+            cache.set(key, 1, timeout=None)
+
+    def get(self, listing_id: str) -> ListingIntervals:
+        listing_id = str(listing_id)
+        version = self.current_version(listing_id)
+        with self._lock:
+            entry = self._entries.get(listing_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(listing_id)
+                return entry
+
+        rows = list(
+            Booking.objects.filter(
+                listing_id=listing_id,
+                status__in=ACTIVE_STATUSES,
+            ).values_list("id", "check_in", "check_out", "status")
+        )
+        entry = ListingIntervals(version, rows)
+
+        with self._lock:
+            self._entries[listing_id] = entry
+            self._entries.move_to_end(listing_id)
+            while len(self._entries) > self.max_listings:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, listing_id: str) -> None:
+        with self._lock:
+            self._entries.pop(str(listing_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_index: AvailabilityIndex | None = None
+_index_lock = threading.Lock()
+
+
+def is_index_enabled() -> bool:
+    return getattr(settings, "BOOKING_AVAILABILITY_INDEX_ENABLED", False)
+
+
+def get_availability_index() -> AvailabilityIndex:
+    """Process-wide index, created on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AvailabilityIndex(
+                    max_listings=getattr(settings, "BOOKING_AVAILABILITY_INDEX_MAX_LISTINGS", 1024),
+                )
+    return _index
+
+
+def invalidate_listing_availability(listing_id: str) -> None:
+    """
+    Bump the listing's version once the surrounding transaction commits, so
+    no reader can cache pre-commit rows under the new version.
+    """
+    listing_id = str(listing_id)
+
+    def bump():
+        AvailabilityIndex.bump_version(listing_id)
+        if _index is not None:
+            _index.invalidate(listing_id)
+
+    transaction.on_commit(bump)
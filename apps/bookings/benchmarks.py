@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingListRowSerializer, BookingListSerializer
+from apps.bookings.services import BookingService
+from apps.common.benchmarks import register, timed
+from apps.common.row_serializers import assert_same_json
+from apps.listings.models import Listing
+from apps.users.models import User
+
+
+PAGE_ROWS = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+@register("bookings.availability", "check_availability: database query vs in-memory interval index")
+def availability_index(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            host = User.objects.create_user(email="bench-host@example.com", username="bench-host", password=None)
+            guest = User.objects.create_user(email="bench-guest@example.com", username="bench-guest", password=None)
+            listing = Listing.objects.create(
+                host=host,
+                title="Benchmark listing",
+                description="",
+                location="",
+                price_per_night=Decimal("1000"),
+            )
+            start = date.today() + timedelta(days=1)
+            Booking.objects.bulk_create([
+                Booking(
+                    listing=listing,
+                    guest=guest,
+                    check_in=start + timedelta(days=3 * i),
+                    check_out=start + timedelta(days=3 * i + 2),
+                    status=Booking.Status.CONFIRMED,
+                )
+                for i in range(120)
+            ])
+            listing_id = str(listing.id)
+            check_in, check_out = start + timedelta(days=100), start + timedelta(days=103)
+
+            def query():
+                BookingService.check_availability(listing_id, check_in, check_out, use_index=False)
+
+            def indexed():
+                BookingService.check_availability(listing_id, check_in, check_out)
+
+            results["database query"] = timed(query, iterations)
+            with override_settings(BOOKING_AVAILABILITY_INDEX_ENABLED=True):
+                results["interval index"] = timed(indexed, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+@register("bookings.row_serializers", "Serialize a 1,000-booking page: BookingListSerializer vs .values() fast path")
+def row_serializers(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            host = User.objects.create_user(email="bench-host@example.com", username="bench-host", password=None)
+            guest = User.objects.create_user(
+                email="bench-guest@example.com",
+                username="bench-guest",
+                password=None,
+                avatar="avatars/bench-guest.jpg",
+            )
+            listing = Listing.objects.create(
+                host=host,
+                title="Benchmark listing",
+                description="",
+                location="Goa",
+                price_per_night=Decimal("2499.5"),
+                images=["https://res.cloudinary.com/demo/image/upload/v1/listing.jpg"],
+            )
+            statuses = list(Booking.Status)
+            start = date.today() + timedelta(days=1)
+            Booking.objects.bulk_create([
+                Booking(
+                    listing=listing,
+                    guest=guest,
+                    check_in=start + timedelta(days=3 * i),
+                    check_out=start + timedelta(days=3 * i + 2),
+                    num_nights=2,
+                    total_price=Decimal("5598.88"),
+                    status=statuses[i % len(statuses)],
+                    cancellation_reason="Payment window expired" if i % 7 == 0 else "",
+                )
+                for i in range(PAGE_ROWS)
+            ])
+            queryset = (
+                Booking.objects.select_related("listing", "guest", "listing__host")
+                .filter(guest=guest)
+                .order_by("-created_at")
+            )
+            request = RequestFactory().get("/api/v1/bookings/")
+
+            def model_serializer():
+                return BookingListSerializer(queryset, many=True, context={"request": request}).data
+
+            def row_serializer():
+                rows = BookingListRowSerializer.queryset(queryset)
+                return BookingListRowSerializer(rows, context={"request": request}).data
+
+            assert_same_json(model_serializer(), row_serializer())
+            results["BookingListSerializer"] = timed(model_serializer, iterations)
+            results["BookingListRowSerializer"] = timed(row_serializer, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+@register("bookings.list_page", "GET /api/v1/bookings/ (20-booking page): model serializer vs .values() fast path")
+def list_page(iterations: int) -> dict[str, float]:
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from apps.bookings.api.views import BookingViewSet
+
+    results: dict[str, float] = {}
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+            host = User.objects.create_user(email="bench-host@example.com", username="bench-host", password=None)
+            guest = User.objects.create_user(
+                email="bench-guest@example.com",
+                username="bench-guest",
+                password=None,
+                avatar="avatars/bench-guest.jpg",
+            )
+            listing = Listing.objects.create(
+                host=host,
+                title="Benchmark listing",
+                description="",
+                location="Goa",
+                price_per_night=Decimal("2499.5"),
+                images=["https://res.cloudinary.com/demo/image/upload/v1/listing.jpg"],
+            )
+            start = date.today() + timedelta(days=1)
+            Booking.objects.bulk_create([
+                Booking(
+                    listing=listing,
+                    guest=guest,
+                    check_in=start + timedelta(days=3 * i),
+                    check_out=start + timedelta(days=3 * i + 2),
+                    num_nights=2,
+                    total_price=Decimal("5598.88"),
+                    status=Booking.Status.CONFIRMED,
+                )
+                for i in range(60)
+            ])
+            factory = APIRequestFactory()
+            view = BookingViewSet.as_view({"get": "list"}, throttle_classes=[])
+
+            def get():
+                request = factory.get("/api/v1/bookings/")
+                force_authenticate(request, user=guest)
+                response = view(request).render()
+                assert response.status_code == 200
+                return response.content
+
+            with override_settings(ROW_SERIALIZERS_ENABLED=False):
+                expected = get()
+                results["BookingListSerializer"] = timed(get, iterations)
+            with override_settings(ROW_SERIALIZERS_ENABLED=True):
+                assert get() == expected, "Fast path response differs"
+                results["BookingListRowSerializer"] = timed(get, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
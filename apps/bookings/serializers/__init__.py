@@ -3,26 +3,31 @@ from datetime import date
 from rest_framework import serializers
 
 from apps.bookings.models import Booking
+from apps.common.row_serializers import RowSerializer, decimal_formatter, format_date
 from apps.listings.models import Listing
-from apps.payments.models import Payment
+from apps.payments.models import Payment, RefundJob
+from apps.users.avatars import resolve_avatar_name, resolve_avatar_url
 
 
-def _get_booking_status_display(obj: Booking) -> str:
+_STATUS_LABELS = dict(Booking.Status.choices)
+
+
+def _status_display(status: str, cancellation_reason: str | None) -> str:
     """
     Returns a user-friendly status label.
     We keep the DB status values stable, but customize display for system-driven cancellations.
     """
-    try:
-        reason = (obj.cancellation_reason or "").lower()
-    except Exception:
-        reason = ""
-
-    if obj.status == Booking.Status.CANCELLED_BY_GUEST and reason:
+    reason = (cancellation_reason or "").lower()
+    if status == Booking.Status.CANCELLED_BY_GUEST and reason:
         # Auto-cancel after 15-minute payment window (system-driven).
         if "payment window expired" in reason or "payment timeout" in reason:
             return "Cancelled (payment window expired)"
 
-    return obj.get_status_display()
+    return str(_STATUS_LABELS.get(status, status))
+
+
+def _get_booking_status_display(obj: Booking) -> str:
+    return _status_display(obj.status, getattr(obj, "cancellation_reason", ""))
 
 
 class ListingSummarySerializer(serializers.Serializer):
@@ -49,19 +54,7 @@ class GuestSummarySerializer(serializers.Serializer):
     avatar = serializers.SerializerMethodField()
 
     def get_avatar(self, obj) -> str | None:
-        guest = obj.guest
-        if not getattr(guest, "avatar", None):
-            return None
-        try:
-            url = guest.avatar.url
-            if isinstance(url, str) and url.startswith(("http://", "https://")):
-                return url
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(url)
-            return url
-        except Exception:
-            return None
+        return resolve_avatar_url(obj.guest, self.context.get("request"))
 
 
 class HostSummarySerializer(serializers.Serializer):
@@ -73,18 +66,7 @@ class HostSummarySerializer(serializers.Serializer):
     avatar = serializers.SerializerMethodField()
 
     def get_avatar(self, obj) -> str | None:
-        if not getattr(obj, "avatar", None):
-            return None
-        try:
-            url = obj.avatar.url
-            if isinstance(url, str) and url.startswith(("http://", "https://")):
-                return url
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(url)
-            return url
-        except Exception:
-            return None
+        return resolve_avatar_url(obj, self.context.get("request"))
 
 
 class BookingListSerializer(serializers.ModelSerializer):
@@ -115,6 +97,61 @@ class BookingListSerializer(serializers.ModelSerializer):
         return _get_booking_status_display(obj)
 
 
+_format_price = decimal_formatter(10, 2)
+_format_total = decimal_formatter(12, 2)
+
+
+class BookingListRowSerializer(RowSerializer):
+    """Fast path for `BookingListSerializer` over `.values()` rows."""
+
+    values = (
+        "id",
+        "listing_id",
+        "listing__title",
+        "listing__location",
+        "listing__images",
+        "listing__price_per_night",
+        "guest_id",
+        "guest__username",
+        "guest__email",
+        "guest__avatar",
+        "check_in",
+        "check_out",
+        "num_guests",
+        "num_nights",
+        "total_price",
+        "status",
+        "cancellation_reason",
+        "created_at",
+    )
+
+    def to_representation(self, row):
+        return {
+            "id": str(row["id"]),
+            "listing": {
+                "id": str(row["listing_id"]),
+                "title": row["listing__title"],
+                "location": row["listing__location"],
+                "images": row["listing__images"],
+                "price_per_night": _format_price(row["listing__price_per_night"]),
+            },
+            "guest": {
+                "id": str(row["guest_id"]),
+                "name": row["guest__username"],
+                "email": row["guest__email"],
+                "avatar": resolve_avatar_name(row["guest__avatar"], self.context.get("request")),
+            },
+            "check_in": format_date(row["check_in"]),
+            "check_out": format_date(row["check_out"]),
+            "num_guests": row["num_guests"],
+            "num_nights": row["num_nights"],
+            "total_price": _format_total(row["total_price"]),
+            "status": row["status"],
+            "status_display": _status_display(row["status"], row["cancellation_reason"]),
+            "created_at": self.format_datetime(row["created_at"]),
+        }
+
+
 class BookingDetailSerializer(serializers.ModelSerializer):
     """Serializer for detailed booking view."""
 
@@ -180,16 +217,33 @@ class BookingDetailSerializer(serializers.ModelSerializer):
         payment = obj.payments.filter(refunded_at__isnull=False).first()
         return payment.refunded_at.isoformat() if payment and payment.refunded_at else None
 
+    def _get_latest_refund_job(self, obj) -> RefundJob | None:
+        if not hasattr(obj, "_latest_refund_job"):
+            obj._latest_refund_job = obj.refund_jobs.order_by("-created_at").first()
+        return obj._latest_refund_job
+
     def get_refund_status(self, obj):
+        """
+        Payment refund status once refunded, otherwise the queued refund job's
+        progress ("pending", "processing" or "failed"), else None.
+        """
         payment = obj.payments.filter(
             status__in=[Payment.Status.REFUNDED, Payment.Status.PARTIALLY_REFUNDED]
         ).first()
-        return payment.status if payment else None
+        if payment:
+            return payment.status
+        job = self._get_latest_refund_job(obj)
+        if job and job.status != RefundJob.Status.SUCCEEDED:
+            return job.status
+        return None
 
     def get_refund_failed(self, obj):
         """True when booking was cancelled, payment was captured, but refund was not processed."""
         if obj.status not in (Booking.Status.CANCELLED_BY_GUEST, Booking.Status.CANCELLED_BY_HOST):
             return False
+        job = self._get_latest_refund_job(obj)
+        if job and job.is_in_progress:
+            return False
         payment = obj.payments.filter(
             status=Payment.Status.COMPLETED,
             gateway_payment_id__isnull=False,
@@ -315,6 +369,60 @@ class CheckAvailabilitySerializer(serializers.Serializer):
         return attrs
 
 
+class OpenWindowsSerializer(serializers.Serializer):
+    """Serializer for flexible-date availability search across one or more listings."""
+
+    MAX_LISTINGS = 50
+    MAX_HORIZON_DAYS = 365
+
+    listing_id = serializers.UUIDField(required=False)
+    listing_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_LISTINGS,
+    )
+    nights = serializers.IntegerField(min_value=1, max_value=60)
+    start = serializers.DateField(required=False)
+    horizon_days = serializers.IntegerField(
+        min_value=1, max_value=MAX_HORIZON_DAYS, required=False, default=30
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=20, required=False, default=5)
+
+    def validate_start(self, value):
+        if value < date.today():
+            raise serializers.ValidationError("Start date cannot be in the past.")
+        return value
+
+    def validate(self, attrs):
+        listing_ids = list(attrs.pop("listing_ids", []))
+        if attrs.get("listing_id"):
+            listing_ids.insert(0, attrs.pop("listing_id"))
+        if not listing_ids:
+            raise serializers.ValidationError({
+                "listing_ids": "Provide listing_id or listing_ids."
+            })
+
+        listing_ids = list(dict.fromkeys(listing_ids))
+        active_ids = set(
+            Listing.objects.filter(id__in=listing_ids, is_active=True).values_list("id", flat=True)
+        )
+        missing = [str(listing_id) for listing_id in listing_ids if listing_id not in active_ids]
+        if missing:
+            raise serializers.ValidationError({
+                "listing_ids": f"Listings not found or not available: {', '.join(missing)}."
+            })
+
+        if attrs["nights"] > attrs["horizon_days"]:
+            raise serializers.ValidationError({
+                "nights": "Stay length cannot exceed the search horizon."
+            })
+
+        attrs["listing_ids"] = [str(listing_id) for listing_id in listing_ids]
+        attrs.setdefault("start", date.today())
+        return attrs
+
+
 class PriceCalculationSerializer(serializers.Serializer):
     """Serializer for price calculation request."""
 
@@ -1,24 +1,54 @@
-import os
 import time
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Optional
 
-from django.conf import settings
 from django.db import DatabaseError, IntegrityError, OperationalError, connection, transaction
 from django.db.models import Q
 from django.utils import timezone
 
+from apps.bookings.availability import get_availability_index, is_index_enabled
 from apps.bookings.models import Booking
+from apps.common.metrics import Counter, Histogram
+from apps.common.profiling import span
 from apps.listings.models import Listing
+from apps.payments.gateway import (
+    GatewayNotConfigured,
+    call_once,
+    call_with_retry,
+    get_gateway,
+    get_gateway_credentials,
+    retry_deadline,
+    submit_with_retry,
+)
 from apps.payments.models import Payment
+from apps.payments.services import RefundJobService
 from apps.users.models import User
 
 
 SERVICE_FEE_PERCENTAGE = Decimal("0.12")  # 12% service fee
 CLEANING_FEE_DEFAULT = Decimal("250.00")  # Default cleaning fee (INR)
 PAYMENT_WINDOW_SECONDS = 15 * 60  # 15 minutes - non-overridable
+DEFAULT_OPEN_WINDOWS_LIMIT = 5
+
+BOOKING_CREATE_SECONDS = Histogram(
+    "booking_create_seconds",
+    "BookingService.create_booking latency, by outcome (booked, rejected, error).",
+    ["outcome"],
+)
+BOOKING_CREATE_RETRIES = Counter(
+    "booking_create_retries_total", "create_booking attempts retried after a transient database error."
+)
+BOOKING_OVERLAP_CONFLICTS = Counter(
+    "booking_overlap_conflicts_total",
+    "Bookings refused for overlapping dates, by where the overlap was caught (check, constraint).",
+    ["source"],
+)
+BOOKING_LOCK_WAIT_SECONDS = Histogram(
+    "booking_lock_wait_seconds", "Time create_booking waits for the listing row lock.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
 
 
 @dataclass
@@ -52,13 +82,26 @@ class BookingService:
         check_in: date,
         check_out: date,
         exclude_booking_id: Optional[str] = None,
+        use_index: bool = True,
     ) -> tuple[bool, list[dict]]:
         """
         Check if a listing is available for the given date range.
+
+        Answered from the in-memory availability index when it is enabled;
+        pass use_index=False where the answer guards a write.
         
         Returns:
             Tuple of (is_available, conflicting_bookings)
         """
+        if use_index and is_index_enabled():
+            conflicting_bookings = get_availability_index().get(listing_id).overlapping(check_in, check_out)
+            if exclude_booking_id:
+                conflicting_bookings = [
+                    conflict for conflict in conflicting_bookings
+                    if str(conflict["id"]) != str(exclude_booking_id)
+                ]
+            return len(conflicting_bookings) == 0, conflicting_bookings
+
         active_statuses = [
             Booking.Status.PENDING_PAYMENT,
             Booking.Status.CONFIRMED,
@@ -226,6 +269,9 @@ class BookingService:
         Get all booked date ranges for a listing.
         Returns list of {check_in, check_out} for active bookings.
         """
+        if is_index_enabled():
+            return get_availability_index().get(listing_id).ranges_ending_on_or_after(date.today())
+
         active_statuses = [
             Booking.Status.PENDING_PAYMENT,
             Booking.Status.CONFIRMED,
@@ -239,6 +285,90 @@ class BookingService:
 
         return list(bookings)
 
+    @staticmethod
+    def sweep_open_windows(
+        booked_ranges: list[tuple[date, date]],
+        nights: int,
+        start: date,
+        end: date,
+        limit: int,
+    ) -> list[dict]:
+        """
+        Walk booked ranges (sorted by check_in) once and collect the earliest
+        stays of `nights` nights that fit inside [start, end] without overlap.
+        """
+        windows: list[dict] = []
+        stay = timedelta(days=nights)
+        cursor = start
+
+        for booked_in, booked_out in [*booked_ranges, (end, end)]:
+            gap_end = min(booked_in, end)
+            while cursor + stay <= gap_end and len(windows) < limit:
+                windows.append({"check_in": cursor, "check_out": cursor + stay})
+                cursor += timedelta(days=1)
+            if len(windows) >= limit or cursor >= end:
+                break
+            cursor = max(cursor, booked_out)
+
+        return windows
+
+    @staticmethod
+    def find_open_windows_for_listings(
+        listing_ids: list[str],
+        nights: int,
+        start: date,
+        end: date,
+        limit: int = DEFAULT_OPEN_WINDOWS_LIMIT,
+    ) -> dict[str, list[dict]]:
+        """
+        Find the earliest open windows for several listings with a single
+        bookings query, sweeping each listing's sorted active bookings.
+
+        Returns:
+            Mapping of listing_id -> list of {check_in, check_out}
+        """
+        active_statuses = [
+            Booking.Status.PENDING_PAYMENT,
+            Booking.Status.CONFIRMED,
+        ]
+
+        rows = (
+            Booking.objects.filter(
+                listing_id__in=listing_ids,
+                status__in=active_statuses,
+                check_in__lt=end,
+                check_out__gt=start,
+            )
+            .order_by("listing_id", "check_in")
+            .values_list("listing_id", "check_in", "check_out")
+        )
+
+        ranges_by_listing: dict[str, list[tuple[date, date]]] = {
+            str(listing_id): [] for listing_id in listing_ids
+        }
+        for listing_id, booked_in, booked_out in rows:
+            ranges_by_listing.setdefault(str(listing_id), []).append((booked_in, booked_out))
+
+        return {
+            listing_id: BookingService.sweep_open_windows(
+                ranges, nights=nights, start=start, end=end, limit=limit
+            )
+            for listing_id, ranges in ranges_by_listing.items()
+        }
+
+    @staticmethod
+    def find_open_windows(
+        listing_id: str,
+        nights: int,
+        start: date,
+        end: date,
+        limit: int = DEFAULT_OPEN_WINDOWS_LIMIT,
+    ) -> list[dict]:
+        """Find the earliest open windows of `nights` nights for one listing."""
+        return BookingService.find_open_windows_for_listings(
+            [str(listing_id)], nights=nights, start=start, end=end, limit=limit
+        )[str(listing_id)]
+
     @staticmethod
     def calculate_price(
         listing: Listing,
@@ -280,6 +410,33 @@ class BookingService:
         Returns:
             Tuple of (booking, error_message)
         """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            booking, error = BookingService._create_booking(
+                listing,
+                guest,
+                check_in,
+                check_out,
+                num_guests,
+                special_requests,
+                create_idempotency_key,
+            )
+            outcome = "booked" if booking is not None else "rejected"
+            return booking, error
+        finally:
+            BOOKING_CREATE_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+    @staticmethod
+    def _create_booking(
+        listing: Listing,
+        guest: User,
+        check_in: date,
+        check_out: date,
+        num_guests: int,
+        special_requests: str,
+        create_idempotency_key: str | None,
+    ) -> tuple[Booking | None, str | dict[str, object] | None]:
         for attempt in range(BookingService.MAX_CREATE_RETRIES):
             try:
                 with transaction.atomic():
@@ -292,15 +449,18 @@ class BookingService:
 
                     # SQLite fallback keeps the service-level guard only; Postgres
                     # adds real row locks plus an exclusion constraint.
-                    locked_listing = BookingService.lock_listing_for_booking(listing)
+                    with BOOKING_LOCK_WAIT_SECONDS.time():
+                        locked_listing = BookingService.lock_listing_for_booking(listing)
 
                     is_available, conflicts = BookingService.check_availability(
                         listing_id=str(locked_listing.id),
                         check_in=check_in,
                         check_out=check_out,
+                        use_index=False,
                     )
 
                     if not is_available:
+                        BOOKING_OVERLAP_CONFLICTS.inc(source="check")
                         return None, BookingService.build_overlap_error(conflicts)
 
                     if num_guests > locked_listing.max_guests:
@@ -336,10 +496,12 @@ class BookingService:
                     if existing_booking:
                         return existing_booking, None
                 if BookingService.is_overlap_constraint_error(exc):
+                    BOOKING_OVERLAP_CONFLICTS.inc(source="constraint")
                     is_available, conflicts = BookingService.check_availability(
                         listing_id=str(listing.id),
                         check_in=check_in,
                         check_out=check_out,
+                        use_index=False,
                     )
                     if not is_available:
                         return None, BookingService.build_overlap_error(conflicts)
@@ -350,6 +512,7 @@ class BookingService:
                     BookingService.is_retryable_create_error(exc)
                     and attempt < BookingService.MAX_CREATE_RETRIES - 1
                 ):
+                    BOOKING_CREATE_RETRIES.inc()
                     time.sleep(0.05 * (attempt + 1))
                     continue
                 raise
@@ -364,7 +527,8 @@ class BookingService:
         reason: str = "",
     ) -> tuple[bool, str, str | None]:
         """
-        Cancel a booking. Processes refund when applicable (CONFIRMED bookings).
+        Cancel a booking. Enqueues a refund job when applicable (CONFIRMED bookings);
+        the gateway refund runs after this transaction commits.
 
         Returns:
             Tuple of (success, message, refund_code).
@@ -403,7 +567,7 @@ class BookingService:
             refund_code = "no_refund_needed"
             return True, "Booking cancelled successfully.", refund_code
 
-        # CONFIRMED booking — payment was captured, initiate Razorpay refund
+        # CONFIRMED booking — payment was captured, queue a Razorpay refund
         completed_payment = booking.payments.filter(
             status=Payment.Status.COMPLETED,
             gateway_payment_id__isnull=False,
@@ -418,8 +582,9 @@ class BookingService:
                 refund_code,
             )
 
-        success, msg, _ = PaymentService.create_razorpay_refund(
+        RefundJobService.enqueue(
             completed_payment,
+            booking,
             notes={
                 "booking_id": str(booking.id),
                 "cancelled_by": "host" if is_host else "guest",
@@ -427,16 +592,8 @@ class BookingService:
             },
         )
 
-        if success:
-            refund_code = "refund_initiated"
-            return True, "Booking cancelled. Refund has been initiated and will reflect in 5–7 working days.", refund_code
-
-        refund_code = "refund_failed"
-        return (
-            True,
-            f"Booking cancelled. Refund could not be processed: {msg} Please contact support with booking ID.",
-            refund_code,
-        )
+        refund_code = "refund_initiated"
+        return True, "Booking cancelled. Refund has been initiated and will reflect in 5–7 working days.", refund_code
 
     @staticmethod
     @transaction.atomic
@@ -545,25 +702,48 @@ class PaymentService:
         return False
 
     @staticmethod
-    def call_gateway_with_retry(operation, *, action_name: str):
-        """Retry transient provider failures with bounded exponential backoff."""
-        last_error = None
-        for attempt in range(PaymentService.MAX_PROVIDER_RETRIES):
-            try:
-                return operation()
-            except Exception as exc:
-                last_error = exc
-                if (
-                    not PaymentService.is_retryable_gateway_error(exc)
-                    or attempt >= PaymentService.MAX_PROVIDER_RETRIES - 1
-                ):
-                    raise
+    def submit_gateway_with_retry(operation, *, action_name: str):
+        """
+        Schedule `operation` with bounded exponential backoff and return a Future.
+        Backoff waits run on the gateway timer thread, not the caller's thread.
+        Attempts stop at `retry_deadline`; a caller that stops waiting earlier
+        should `cancel()` the Future so no further attempt starts.
+        """
+        return submit_with_retry(
+            operation,
+            action_name=action_name,
+            max_attempts=PaymentService.MAX_PROVIDER_RETRIES,
+            initial_backoff=PaymentService.INITIAL_BACKOFF_SECONDS,
+            is_retryable=PaymentService.is_retryable_gateway_error,
+            deadline=retry_deadline(PaymentService.MAX_PROVIDER_RETRIES, PaymentService.INITIAL_BACKOFF_SECONDS),
+        )
 
-                time.sleep(
-                    PaymentService.INITIAL_BACKOFF_SECONDS * (2 ** attempt)
-                )
+    @staticmethod
+    def call_gateway_with_retry(operation, *, action_name: str):
+        """
+        Retry transient provider failures with bounded exponential backoff.
+        The first attempt runs on the caller's thread; retries are scheduled
+        on the gateway timer. Raises GatewayTimeout once `retry_deadline`
+        passes, and no further attempt starts after that.
+        """
+        with span("gateway", action_name):
+            return call_with_retry(
+                operation,
+                action_name=action_name,
+                max_attempts=PaymentService.MAX_PROVIDER_RETRIES,
+                initial_backoff=PaymentService.INITIAL_BACKOFF_SECONDS,
+                is_retryable=PaymentService.is_retryable_gateway_error,
+                deadline=retry_deadline(PaymentService.MAX_PROVIDER_RETRIES, PaymentService.INITIAL_BACKOFF_SECONDS),
+            )
 
-        raise last_error  # pragma: no cover
+    @staticmethod
+    def call_gateway_once(operation, *, action_name: str):
+        """
+        A single attempt, for refund jobs: a failed job is retried later with
+        its own durable backoff, so nothing waits for an in-process retry.
+        """
+        with span("gateway", action_name):
+            return call_once(operation, action_name=action_name)
 
     @staticmethod
     def build_payment_response(
@@ -590,16 +770,11 @@ class PaymentService:
         Returns order details for frontend Checkout, or None if Razorpay is not configured.
         Uses INR (paise) per official Razorpay test mode docs.
         """
-        key_id = getattr(settings, "RZP_TEST_KEY_ID", None) or os.getenv("RZP_TEST_KEY_ID")
-        key_secret = getattr(settings, "RZP_TEST_KEY_SECRET", None) or os.getenv("RZP_TEST_KEY_SECRET")
-        if not key_id or not key_secret:
-            return None
-
         try:
-            import razorpay
-            client = razorpay.Client(auth=(key_id, key_secret))
-        except ImportError:
+            gateway = get_gateway()
+        except GatewayNotConfigured:
             return None
+        key_id = gateway.key_id
 
         payment = None
         if idempotency_key:
@@ -682,7 +857,7 @@ class PaymentService:
         }
         try:
             order = PaymentService.call_gateway_with_retry(
-                lambda: client.order.create(data=order_data),
+                lambda: gateway.create_order(order_data),
                 action_name="create_razorpay_order",
             )
         except Exception:
@@ -718,21 +893,18 @@ class PaymentService:
         Verify Razorpay payment signature and confirm the booking.
         Uses official razorpay.Client.utility.verify_payment_signature.
         """
-        key_secret = getattr(settings, "RZP_TEST_KEY_SECRET", None) or os.getenv("RZP_TEST_KEY_SECRET")
+        _, key_secret = get_gateway_credentials()
         if not key_secret:
             return False, "Payment gateway not configured."
 
         try:
-            import razorpay
-            key_id = getattr(settings, "RZP_TEST_KEY_ID", None) or os.getenv("RZP_TEST_KEY_ID")
-            client = razorpay.Client(auth=(key_id, key_secret))
-            client.utility.verify_payment_signature({
+            get_gateway().verify_payment_signature({
                 "razorpay_order_id": razorpay_order_id,
                 "razorpay_payment_id": razorpay_payment_id,
                 "razorpay_signature": razorpay_signature,
             })
-        except ImportError:
-            return False, "Payment gateway not available."
+        except GatewayNotConfigured as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Payment verification failed: {str(e)}"
 
@@ -757,9 +929,29 @@ class PaymentService:
         if not payment:
             return False, "Payment record not found."
 
+        PaymentService.mark_payment_captured(
+            booking,
+            payment,
+            razorpay_payment_id=razorpay_payment_id,
+            razorpay_signature=razorpay_signature,
+        )
+
+        return True, "Payment verified. Booking confirmed."
+
+    @staticmethod
+    def mark_payment_captured(
+        booking: Booking,
+        payment: Payment,
+        razorpay_payment_id: str,
+        razorpay_signature: str = "",
+    ) -> None:
+        """
+        Record a captured payment and confirm its booking. Shared by the
+        client verify-payment flow and the payment.captured webhook.
+        """
         payment.status = Payment.Status.COMPLETED
         payment.gateway_payment_id = razorpay_payment_id
-        payment.gateway_signature = razorpay_signature
+        payment.gateway_signature = razorpay_signature or payment.gateway_signature
         payment.save(update_fields=["status", "gateway_payment_id", "gateway_signature", "updated_at"])
 
         booking.payments.filter(
@@ -773,13 +965,67 @@ class PaymentService:
         booking.status = Booking.Status.CONFIRMED
         booking.save(update_fields=["status", "updated_at"])
 
-        return True, "Payment verified. Booking confirmed."
+    @staticmethod
+    def record_refund(payment: Payment, gateway_refund_id: str, refund_amount: Decimal) -> bool:
+        """
+        Apply a gateway refund to the payment once. Refund IDs already seen are
+        tracked in metadata so the API response and the refund.processed
+        webhook never double count. Returns False when already recorded.
+
+        The check and the update run on the row locked with SELECT ... FOR
+        UPDATE, so concurrent recorders (refund job and webhook) see each
+        other's refund ids. `payment` is updated to the saved values.
+        """
+        fields = ["refund_amount", "refunded_at", "gateway_refund_id", "status", "metadata", "updated_at"]
+        with transaction.atomic():
+            locked = Payment.objects.select_for_update().get(pk=payment.pk)
+            refund_ids = list(locked.metadata.get("refund_ids", []))
+            recorded = not (gateway_refund_id and gateway_refund_id in refund_ids)
+            if recorded:
+                if gateway_refund_id:
+                    refund_ids.append(gateway_refund_id)
+                    locked.metadata = {**locked.metadata, "refund_ids": refund_ids}
+
+                locked.refund_amount += refund_amount
+                locked.refunded_at = timezone.now()
+                locked.gateway_refund_id = gateway_refund_id or locked.gateway_refund_id
+                locked.status = (
+                    Payment.Status.REFUNDED
+                    if locked.refund_amount >= locked.amount
+                    else Payment.Status.PARTIALLY_REFUNDED
+                )
+                locked.save(update_fields=fields)
+
+        for field in fields:
+            setattr(payment, field, getattr(locked, field))
+        return recorded
+
+    @staticmethod
+    def find_razorpay_refund(payment: Payment, receipt: str) -> dict | None:
+        """
+        The gateway refund of `payment` created with `receipt` (as its receipt
+        or its `refund_job` note), or None. Razorpay does not dedupe refunds by
+        receipt, so a retry must look before creating another. Gateway errors
+        propagate: the caller cannot tell whether the refund exists.
+        """
+        if not payment.gateway_payment_id:
+            return None
+        gateway = get_gateway()
+        refunds = PaymentService.call_gateway_once(
+            lambda: gateway.fetch_refunds(payment.gateway_payment_id),
+            action_name="fetch_razorpay_refunds",
+        )
+        for refund in refunds:
+            if refund.get("receipt") == receipt or (refund.get("notes") or {}).get("refund_job") == receipt:
+                return refund
+        return None
 
     @staticmethod
     def create_razorpay_refund(
         payment: Payment,
         amount: Decimal | None = None,
         notes: dict | None = None,
+        receipt: str | None = None,
     ) -> tuple[bool, str, Decimal]:
         """
         Create a Razorpay refund for a completed payment.
@@ -788,6 +1034,7 @@ class PaymentService:
             payment: Payment record with status=COMPLETED and gateway_payment_id set.
             amount: Refund amount (default: full amount). Must be <= payment.amount.
             notes: Optional notes for Razorpay (e.g. {"reason": "booking_cancelled"}).
+            receipt: Optional refund receipt; RefundJob passes its idempotency key.
 
         Returns:
             Tuple of (success, message, refund_amount).
@@ -796,8 +1043,7 @@ class PaymentService:
         """
         from decimal import Decimal as D
 
-        key_id = getattr(settings, "RZP_TEST_KEY_ID", None) or os.getenv("RZP_TEST_KEY_ID")
-        key_secret = getattr(settings, "RZP_TEST_KEY_SECRET", None) or os.getenv("RZP_TEST_KEY_SECRET")
+        key_id, key_secret = get_gateway_credentials()
         if not key_id or not key_secret:
             return False, "Payment gateway not configured. Refund could not be processed.", D("0")
 
@@ -821,19 +1067,20 @@ class PaymentService:
             return False, "Refund amount must be at least ₹1.00.", D("0")
 
         try:
-            import razorpay
-            client = razorpay.Client(auth=(key_id, key_secret))
-        except ImportError:
-            return False, "Payment gateway not available.", D("0")
+            gateway = get_gateway()
+        except GatewayNotConfigured as e:
+            return False, str(e), D("0")
 
         refund_data = {
             "amount": amount_paise,
             "notes": notes or {},
         }
+        if receipt:
+            refund_data["receipt"] = receipt
 
         try:
-            refund = PaymentService.call_gateway_with_retry(
-                lambda: client.payment.refund(
+            refund = PaymentService.call_gateway_once(
+                lambda: gateway.refund_payment(
                     payment.gateway_payment_id,
                     refund_data,
                 ),
@@ -849,17 +1096,6 @@ class PaymentService:
                 return False, "Refund not possible for payments older than 6 months.", D("0")
             return False, f"Refund failed: {str(e)}", D("0")
 
-        gateway_refund_id = refund.get("id", "")
-        payment.refund_amount += refund_amount
-        payment.refunded_at = timezone.now()
-        payment.gateway_refund_id = gateway_refund_id or payment.gateway_refund_id
-        payment.status = (
-            Payment.Status.REFUNDED
-            if payment.refund_amount >= payment.amount
-            else Payment.Status.PARTIALLY_REFUNDED
-        )
-        payment.save(update_fields=[
-            "refund_amount", "refunded_at", "gateway_refund_id", "status", "updated_at"
-        ])
+        PaymentService.record_refund(payment, refund.get("id", ""), refund_amount)
 
         return True, "Refund initiated successfully.", refund_amount
@@ -0,0 +1,30 @@
+"""
+Signals to invalidate the in-memory availability index when a booking's
+dates or status change.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.bookings.availability import invalidate_listing_availability, is_index_enabled
+from apps.bookings.models import Booking
+
+
+AVAILABILITY_FIELDS = {"status", "check_in", "check_out", "listing", "listing_id"}
+
+
+@receiver(post_save, sender=Booking)
+def on_booking_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Booking created, cancelled, expired, confirmed or completed."""
+    if not is_index_enabled():
+        return
+    if not created and update_fields is not None and not AVAILABILITY_FIELDS & set(update_fields):
+        return
+    invalidate_listing_availability(instance.listing_id)
+
+
+@receiver(post_delete, sender=Booking)
+def on_booking_deleted(sender, instance, **kwargs):
+    if not is_index_enabled():
+        return
+    invalidate_listing_availability(instance.listing_id)
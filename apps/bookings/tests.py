@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingListRowSerializer, BookingListSerializer
+from apps.common.row_serializers import assert_same_json
+from apps.listings.models import Listing
+from apps.users.models import User
+
+
+class BookingListRowSerializerTests(TestCase):
+    def test_renders_same_json_as_model_serializer(self):
+        host = User.objects.create_user(email="host@example.com", username="host", password=None)
+        guest = User.objects.create_user(
+            email="guest@example.com", username="guest", password=None, avatar="avatars/guest.jpg"
+        )
+        listing = Listing.objects.create(
+            host=host,
+            title="Beach house",
+            description="",
+            location="Goa",
+            price_per_night=Decimal("2499.5"),
+            images=["https://res.cloudinary.com/demo/image/upload/v1/listing.jpg"],
+        )
+        start = date.today() + timedelta(days=1)
+        statuses = list(Booking.Status)
+        Booking.objects.bulk_create([
+            Booking(
+                listing=listing,
+                guest=guest,
+                check_in=start + timedelta(days=3 * i),
+                check_out=start + timedelta(days=3 * i + 2),
+                num_nights=2,
+                total_price=Decimal("5598.88"),
+                status=status,
+                cancellation_reason="Payment window expired" if i % 2 else "",
+            )
+            for i, status in enumerate(statuses)
+        ])
+        queryset = (
+            Booking.objects.select_related("listing", "guest", "listing__host")
+            .filter(guest=guest)
+            .order_by("-created_at")
+        )
+        context = {"request": RequestFactory().get("/api/v1/bookings/")}
+
+        assert_same_json(
+            BookingListSerializer(queryset, many=True, context=context).data,
+            BookingListRowSerializer(BookingListRowSerializer.queryset(queryset), context=context).data,
+        )
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from apps.common.api.views import LocalDirectUploadView
+
+
+urlpatterns = [
+    path("local/", LocalDirectUploadView.as_view(), name="uploads-local"),
+]
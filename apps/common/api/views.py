@@ -0,0 +1,150 @@
+import hmac
+import logging
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.common.cache import cache_stats
+from apps.common.db import pool_stats
+from apps.common.metrics import REGISTRY
+from apps.common.uploads import LOCAL_UPLOAD_SALT, LocalUploadBackend, get_upload_backend
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalDirectUploadView(APIView):
+    """
+    POST: receiver for direct uploads when MEDIA_UPLOAD_BACKEND is the local
+    stand-in. Plays the role of the storage provider's upload endpoint: the
+    signed `token` from the upload fields authorizes one public_id.
+    """
+
+    authentication_classes: list = []
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        backend = get_upload_backend()
+        if not isinstance(backend, LocalUploadBackend):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            data = signing.loads(request.data.get("token", ""), salt=LOCAL_UPLOAD_SALT, max_age=60 * 60)
+        except signing.BadSignature:
+            return Response({"detail": "Invalid upload token."}, status=status.HTTP_403_FORBIDDEN)
+
+        file_obj = request.FILES.get("file")
+        if not file_obj:
+            return Response({"detail": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = backend.upload(
+            file_obj,
+            public_id=data["public_id"],
+            resource_type=data["resource_type"],
+        )
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class HealthView(APIView):
+    """GET: liveness probe. The process is up and serving requests; touches no backing service."""
+
+    authentication_classes: list = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes: list = []
+
+    def get(self, request):
+        return Response({"status": "ok"})
+
+
+class ReadinessView(APIView):
+    """
+    GET: readiness probe. 200 when every configured database answers a query
+    and the cache round-trips a value, otherwise 503 naming the failed checks
+    (details go to the log, not the response).
+    """
+
+    authentication_classes: list = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes: list = []
+
+    def get(self, request):
+        checks = {}
+        for alias in connections:
+            checks[f"database:{alias}"] = self._check(self._check_database, alias)
+        checks["cache"] = self._check(self._check_cache)
+        ready = all(result == "ok" for result in checks.values())
+        return Response(
+            {"status": "ok" if ready else "unavailable", "checks": checks},
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    @staticmethod
+    def _check(func, *args) -> str:
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Readiness check %s%s failed", func.__name__, args)
+            return "error"
+        return "ok"
+
+    @staticmethod
+    def _check_database(alias: str) -> None:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+
+    @staticmethod
+    def _check_cache() -> None:
+        key, value = "common:readyz", uuid.uuid4().hex
+        cache.set(key, value, timeout=10)
+        if cache.get(key) != value:
+            raise RuntimeError("cache did not return the value just written")
+
+
+class DatabasePoolStatsView(APIView):
+    """GET (staff only): connection pool metrics of the worker process that serves the request."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"pools": pool_stats()})
+
+
+class CacheStatsView(APIView):
+    """GET (staff only): cache hit/miss counters of the worker process that serves the request."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"caches": cache_stats()})
+
+
+class HasMetricsToken(permissions.BasePermission):
+    """`Authorization: Bearer <METRICS_TOKEN>`; without a configured token, only in DEBUG."""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if not token:
+            return settings.DEBUG
+        scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(credentials.encode(), token.encode())
+
+
+class MetricsView(APIView):
+    """GET: Prometheus scrape endpoint (apps/common/metrics.py), for scrapers holding METRICS_TOKEN."""
+
+    authentication_classes: list = []
+    permission_classes = [HasMetricsToken]
+    throttle_classes: list = []
+
+    def get(self, request):
+        return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.backends.signals import connection_created
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.common"
 
+    def ready(self):
+        from apps.common.checks import check_cloudinary_credentials, check_shared_cache
+
+        checks.register(check_cloudinary_credentials, deploy=True)
+        checks.register(check_shared_cache, deploy=True)
+
+        from apps.common.profiling import install_db_wrapper, profiling_enabled
+
+        if profiling_enabled():
+            connection_created.connect(install_db_wrapper, dispatch_uid="apps.common.profiling")
@@ -0,0 +1,34 @@
+"""
+ASGI middleware used by `config.asgi` when served by `serve.py`.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SyncThreadLimitMiddleware:
+    """
+    Caps how many HTTP requests one worker process runs at a time.
+
+    Django runs each request's sync code (views, ORM) on a dedicated
+    sync_to_async thread, so in-flight requests equal threads, and each of
+    those can hold a database connection. Past `max_threads`, requests wait on
+    the event loop instead. The loop's default executor, which runs
+    `sync_to_async(thread_sensitive=False)` calls, gets the same size.
+    `max_threads=0` disables the limit. Websockets are not limited.
+    """
+
+    def __init__(self, app, max_threads: int):
+        self.app = app
+        self.max_threads = max_threads
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __call__(self, scope, receive, send):
+        if not self.max_threads or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._semaphore is None:
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="asgi-sync")
+            )
+            self._semaphore = asyncio.Semaphore(self.max_threads)
+        async with self._semaphore:
+            return await self.app(scope, receive, send)
@@ -0,0 +1,360 @@
+"""
+Tiny registry for micro-benchmarks run via `python manage.py benchmark`.
+
+Apps register scenarios in their own `benchmarks.py` module, which is
+autodiscovered the same way Django discovers `admin.py`.
+"""
+import time
+from collections.abc import Callable
+
+from django.utils.module_loading import autodiscover_modules
+
+
+_registry: dict[str, tuple[Callable[[int], dict[str, float]], str]] = {}
+
+
+def register(name: str, description: str = ""):
+    """
+    Register a scenario. The function receives an iteration count and returns
+    a mapping of variant label -> total elapsed seconds for those iterations.
+    """
+
+    def decorator(func):
+        _registry[name] = (func, description or (func.__doc__ or "").strip().splitlines()[0])
+        return func
+
+    return decorator
+
+
+def get_scenarios() -> dict[str, tuple[Callable[[int], dict[str, float]], str]]:
+    autodiscover_modules("benchmarks")
+    return dict(sorted(_registry.items()))
+
+
+def timed(func: Callable[[], object], iterations: int) -> float:
+    """Call `func` `iterations` times and return the total elapsed seconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - start
+
+
+def _json_payloads() -> dict[str, object]:
+    """Listing page, booking quotes and a conversation shaped like the API's responses."""
+    import base64
+    import uuid
+    from datetime import date, datetime, timedelta, timezone
+    from decimal import Decimal
+
+    now = datetime(2026, 3, 14, 9, 26, 53, 589793, tzinfo=timezone.utc)
+    listing_page = {
+        "count": 2400,
+        "next": "http://localhost/api/v1/listings/?page=2",
+        "previous": None,
+        "results": [
+            {
+                "id": str(uuid.uuid4()),
+                "title": f"Riverside cabin {i} — “quiet” stay",
+                "location": "Manali, Himachal Pradesh",
+                "category": "cabins",
+                "price_per_night": "4500.00",
+                "bedrooms": 2,
+                "bathrooms": "1.5",
+                "max_guests": 4,
+                "amenities": ["WiFi", "Kitchen", "Fireplace", "Parking"],
+                "images": [f"https://res.cloudinary.com/demo/image/upload/c_limit,w_640/v1/l{i}-{n}.webp" for n in range(5)],
+                "latitude": "32.239600",
+                "longitude": "77.188700",
+                "is_active": True,
+                "host": {"id": str(uuid.uuid4()), "name": "host", "email": "host@example.com", "avatar": None},
+                "rating": "4.8",
+                "review_count": 112,
+                "created_at": "2026-01-02T10:00:00Z",
+                "updated_at": "2026-02-02T10:00:00.123456Z",
+            }
+            for i in range(100)
+        ],
+    }
+    booking_quotes = [
+        {
+            "booking_id": uuid.uuid4(),
+            "check_in": date(2026, 4, 1) + timedelta(days=i),
+            "check_out": date(2026, 4, 4) + timedelta(days=i),
+            "price_per_night": Decimal("4500.00"),
+            "subtotal": Decimal("13500.00"),
+            "service_fee": Decimal("1620.00"),
+            "cleaning_fee": Decimal("25.00"),
+            "total_price": Decimal("15145.00"),
+            "payment_deadline": now + timedelta(minutes=15),
+        }
+        for i in range(200)
+    ]
+    ciphertext = base64.b64encode(bytes(range(256)) * 8).decode()
+    conversation = {
+        "id": str(uuid.uuid4()),
+        "booking_status": "confirmed",
+        "messages": [
+            {
+                "id": str(uuid.uuid4()),
+                "sender": {"id": str(uuid.uuid4()), "name": "guest", "email": "guest@example.com", "avatar": None,
+                           "chat_encryption": {"public_key": ciphertext[:180], "algorithm": "ECDH-P256", "version": 1}},
+                "body": "",
+                "encrypted_body": {"ciphertext": ciphertext, "iv": ciphertext[:16], "algorithm": "AES-GCM", "version": 1},
+                "is_encrypted": True,
+                "message_type": "text",
+                "attachment_url": "",
+                "attachment_name": "",
+                "attachment_mime": "",
+                "attachment_bytes": None,
+                "created_at": "2026-03-14T09:26:53.589793Z",
+                "updated_at": "2026-03-14T09:26:53.589793Z",
+            }
+            for _ in range(500)
+        ],
+    }
+    return {"listing page": listing_page, "booking quotes": booking_quotes, "conversation": conversation}
+
+
+@register("common.json", "Render and parse listing, booking and conversation payloads: DRF JSON vs orjson")
+def json_codec(iterations: int) -> dict[str, float]:
+    import io
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from apps.common.parsers import FastJSONParser
+    from apps.common.renderers import FastJSONRenderer
+
+    stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+    results: dict[str, float] = {}
+    for label, payload in _json_payloads().items():
+        body = stdlib_renderer.render(payload)
+        if fast_renderer.render(payload) != body:
+            raise AssertionError(f"FastJSONRenderer output differs from JSONRenderer for the {label}.")
+        results[f"{label}: render stdlib"] = timed(lambda: stdlib_renderer.render(payload), iterations)
+        results[f"{label}: render orjson"] = timed(lambda: fast_renderer.render(payload), iterations)
+        results[f"{label}: parse stdlib"] = timed(lambda: stdlib_parser.parse(io.BytesIO(body)), iterations)
+        results[f"{label}: parse orjson"] = timed(lambda: fast_parser.parse(io.BytesIO(body)), iterations)
+    return results
+
+
+SERVING_CONCURRENCY = 16
+SERVING_PATH = "/api/v1/listings/"
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, path: str) -> int:
+    import http.client
+
+    conn = http.client.HTTPConnection("localhost", port, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+@register(
+    "common.asgi_serving",
+    f"Waves of {SERVING_CONCURRENCY} concurrent GET {SERVING_PATH}: runserver vs serve.py worker pools",
+)
+def asgi_serving(iterations: int) -> dict[str, float]:
+    import os
+    import subprocess
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.conf import settings
+
+    base_dir = str(settings.BASE_DIR)
+    workers = max(2, os.cpu_count() or 1)
+    servers = {
+        "runserver (1 process)": lambda port: [
+            sys.executable, "manage.py", "runserver", "--noreload", f"127.0.0.1:{port}",
+        ],
+        "serve.py --workers 1": lambda port: [
+            sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+        ],
+        f"serve.py --workers {workers}": lambda port: [
+            sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        ],
+    }
+    results: dict[str, float] = {}
+    with ThreadPoolExecutor(max_workers=SERVING_CONCURRENCY) as clients:
+        for label, command in servers.items():
+            port = _free_port()
+            server = subprocess.Popen(
+                command(port), cwd=base_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                for _ in range(300):
+                    try:
+                        if _get(port, "/healthz/") == 200:
+                            break
+                    except OSError:
+                        pass
+                    if server.poll() is not None:
+                        raise RuntimeError(f"{label} exited with {server.returncode} before serving.")
+                    time.sleep(0.1)
+                else:
+                    raise RuntimeError(f"{label} did not answer /healthz/ in time.")
+
+                def wave():
+                    statuses = list(clients.map(lambda _: _get(port, SERVING_PATH), range(SERVING_CONCURRENCY)))
+                    if any(code != 200 for code in statuses):
+                        raise AssertionError(f"{label} returned {statuses}")
+
+                wave()
+                results[label] = timed(wave, iterations)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    return results
+
+
+CACHE_CALLERS = 16
+CACHE_COMPUTE_SECONDS = 0.02
+
+
+@register(
+    "common.cache_single_flight",
+    f"{CACHE_CALLERS} threads read one cold key ({CACHE_COMPUTE_SECONDS * 1000:.0f} ms to compute): get+set vs get_or_set",
+)
+def cache_single_flight(iterations: int) -> dict[str, float]:
+    import itertools
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+
+    from apps.common.cache import CacheNamespace
+
+    namespace = CacheNamespace(f"bench:{uuid.uuid4().hex}", timeout=60)
+    keys = itertools.count()
+    computes = {"get+set": 0, "get_or_set": 0}
+
+    def compute(label):
+        computes[label] += 1
+        time.sleep(CACHE_COMPUTE_SECONDS)
+        return {"computed": True}
+
+    def get_then_set(key):
+        value = namespace.get([key])
+        if value is None:
+            value = compute("get+set")
+            namespace.set([key], value)
+        return value
+
+    def get_or_set(key):
+        return namespace.get_or_set([key], lambda: compute("get_or_set"))
+
+    results: dict[str, float] = {}
+    with ThreadPoolExecutor(max_workers=CACHE_CALLERS) as callers:
+        for label, read in (("get+set", get_then_set), ("get_or_set", get_or_set)):
+            def wave():
+                key = next(keys)
+                list(callers.map(lambda _: read(key), range(CACHE_CALLERS)))
+
+            elapsed = timed(wave, iterations)
+            results[f"{label}: {computes[label] / iterations:.1f} computes/key"] = elapsed
+    return results
+
+
+
+THROTTLE_CLIENTS = 10_000
+
+
+@register("common.throttle", "Per-request cost of TokenBucketThrottle on a minimal APIView, by bucket store")
+def throttle(iterations: int) -> dict[str, float]:
+    import itertools
+
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework import permissions
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+
+    from apps.common.throttling import LocalTokenBucketStore, RedisTokenBucketStore, TokenBucketThrottle, get_store
+
+    class Unthrottled(APIView):
+        authentication_classes: list = []
+        permission_classes = [permissions.AllowAny]
+        throttle_classes: list = []
+
+        def get(self, request):
+            return Response({})
+
+    def throttled_view(store):
+        class StoreThrottle(TokenBucketThrottle):
+            def get_store(self):
+                return store
+
+        class Throttled(Unthrottled):
+            throttle_classes = [StoreThrottle]
+            throttle_scope = "bench"
+
+        return Throttled.as_view()
+
+    factory = APIRequestFactory()
+    clients = itertools.cycle([f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(THROTTLE_CLIENTS)])
+    stores = {"local store": LocalTokenBucketStore()}
+    if isinstance(get_store(), RedisTokenBucketStore):
+        stores["redis store"] = get_store()
+
+    def run(view):
+        def call():
+            response = view(factory.get("/bench/", REMOTE_ADDR=next(clients)))
+            assert response.status_code == 200, response.status_code
+        return call
+
+    results = {"no throttle": timed(run(Unthrottled.as_view()), iterations)}
+    rates = {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "bench": "1000000/s"}
+    with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}):
+        for label, store in stores.items():
+            results[f"{label}, {THROTTLE_CLIENTS} clients"] = timed(run(throttled_view(store)), iterations)
+    return results
+
+
+COMPRESSION_SPARSE_FIELDS = "id,title,price_per_night,latitude,longitude"
+
+
+@register("common.compression", "Serve JSON payloads through CompressionMiddleware: identity vs each codec (and ?fields=)")
+def compression(iterations: int) -> dict[str, float]:
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from apps.common.compression import available_codecs
+    from apps.common.middleware import CompressionMiddleware
+    from apps.common.renderers import FastJSONRenderer
+    from apps.common.sparse_fields import trim
+
+    renderer = FastJSONRenderer()
+    payloads = _json_payloads()
+    listing_page = payloads["listing page"]
+    # ?fields= as a map view would send it.
+    payloads["listing page, sparse"] = {
+        **listing_page,
+        "results": trim(listing_page["results"], frozenset(COMPRESSION_SPARSE_FIELDS.split(","))),
+    }
+    factory = RequestFactory()
+    results: dict[str, float] = {}
+    for label, payload in payloads.items():
+        body = renderer.render(payload)
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type="application/json"))
+        for encoding in ["identity", *available_codecs()]:
+            request = factory.get("/bench/", HTTP_ACCEPT_ENCODING=encoding)
+            response = middleware(request)
+            assert response.get("Content-Encoding", "identity") == encoding, response.get("Content-Encoding")
+            size = len(response.content)
+            saved = f", -{1 - size / len(body):.0%}" if size < len(body) else ""
+            results[f"{label}: {encoding} ({size:,} B{saved})"] = timed(lambda: middleware(request), iterations)
+    return results
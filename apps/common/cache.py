@@ -0,0 +1,313 @@
+"""
+Caching helpers on top of Django's cache framework.
+
+Aliases (CACHES in config/settings/base.py, one backend picked by CACHE_URL):
+
+- `HOT`: small objects read on most requests (auth principals, versions).
+- `FRAGMENTS`: rendered response data (serialized pages, detail payloads).
+- `RATELIMIT`: throttle counters.
+- "default": everything else.
+
+`get_cache(alias)` falls back to "default" for an alias that is not
+configured, so settings overriding CACHES need not list all of them.
+
+A `CacheNamespace` owns one family of entries:
+
+    listing_detail = CacheNamespace("listings:detail", alias=FRAGMENTS, version=1, timeout=300)
+    data = listing_detail.get_or_set(
+        [listing.pk], lambda: ListingDetailSerializer(listing).data, tags=[f"listing:{listing.pk}"]
+    )
+    invalidate_tags(f"listing:{listing.pk}")
+
+- Keys are `<namespace>:<part>:<part>...` under the namespace's `version`
+  (Django's key version); bump it when the shape of the cached value
+  changes, so a deploy never reads entries written by older code.
+- Entries written with `tags` remember each tag's version at write time. A
+  read whose remembered versions no longer match is a miss, and
+  `invalidate_tags()` gives the tags new versions. Nothing is deleted by
+  pattern, so this works on locmem, file and Redis backends alike. Untagged
+  entries are read in one cache round-trip, tagged ones in two.
+- `get_or_set()` computes a missing entry once: callers in the same process
+  wait on a per-key lock, callers in other processes wait (up to
+  `lock_timeout`) for a short lease that the computing process holds in the
+  cache, then read its result.
+
+Hits, misses, stale reads, writes, computations and coalesced waits are
+counted per alias and namespace in this process: `cache_stats()`.
+"""
+import hashlib
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Sequence
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+HOT = "hot"
+FRAGMENTS = "fragments"
+RATELIMIT = "ratelimit"
+
+TAG_KEY_PREFIX = "cache:tag:"
+MAX_KEY_LENGTH = 200
+_MISSING = object()
+
+
+def get_cache(alias: str = DEFAULT_CACHE_ALIAS) -> BaseCache:
+    """The cache for `alias`, or the default cache if the alias is not configured."""
+    if alias in settings.CACHES:
+        return caches[alias]
+    return caches[DEFAULT_CACHE_ALIAS]
+
+
+class CacheStats:
+    """Thread-safe per-process counters, keyed by (alias, namespace)."""
+
+    EVENTS = ("hits", "misses", "stale", "sets", "deletes", "computes", "waits")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, str], Counter] = defaultdict(Counter)
+
+    def incr(self, alias: str, namespace: str, event: str, count: int = 1) -> None:
+        with self._lock:
+            self._counts[(alias, namespace)][event] += count
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        """`{alias: {namespace: {event: count, ..., "hit_ratio": float}}}`."""
+        with self._lock:
+            counts = {key: dict(counter) for key, counter in self._counts.items()}
+        stats: dict[str, dict[str, dict]] = defaultdict(dict)
+        for (alias, namespace), counter in sorted(counts.items()):
+            row = {event: counter.get(event, 0) for event in self.EVENTS}
+            reads = row["hits"] + row["misses"]
+            row["hit_ratio"] = round(row["hits"] / reads, 4) if reads else 0.0
+            stats[alias][namespace] = row
+        return dict(stats)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_stats = CacheStats()
+
+
+def cache_stats() -> dict[str, dict[str, dict]]:
+    """Counters of every CacheNamespace used by this process since it started."""
+    return _stats.snapshot()
+
+
+def _tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+def invalidate_tags(*tags: str, alias: str | None = None) -> None:
+    """
+    Make every entry written with any of `tags` stale. Tag versions live in
+    the alias holding the entries; without `alias`, tags are invalidated in
+    every configured alias.
+    """
+    if not tags:
+        return
+    aliases = [alias] if alias else list(settings.CACHES)
+    new_versions = {_tag_key(tag): uuid.uuid4().hex for tag in tags}
+    for name in aliases:
+        get_cache(name).set_many(new_versions, timeout=None)
+
+
+class _KeyLock:
+    __slots__ = ("lock", "__weakref__")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class CacheNamespace:
+    """Versioned, tag-aware keys for one family of entries in one cache alias."""
+
+    def __init__(
+        self,
+        namespace: str,
+        alias: str = DEFAULT_CACHE_ALIAS,
+        version: int = 1,
+        timeout=DEFAULT_TIMEOUT,
+        lock_timeout: float = 10.0,
+    ):
+        self.namespace = namespace
+        self.alias = alias
+        self.version = version
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self._key_locks: weakref.WeakValueDictionary[str, _KeyLock] = weakref.WeakValueDictionary()
+        self._key_locks_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<CacheNamespace {self.namespace!r} alias={self.alias!r} version={self.version}>"
+
+    @property
+    def cache(self) -> BaseCache:
+        # caches[] is per thread / async context: look it up on every use.
+        return get_cache(self.alias)
+
+    def key(self, *parts) -> str:
+        key = ":".join([self.namespace, *(str(part) for part in parts)])
+        if len(key) > MAX_KEY_LENGTH or any(char.isspace() for char in key):
+            digest = hashlib.sha256(key.encode()).hexdigest()
+            key = f"{self.namespace}:#{digest}"
+        return key
+
+    # Reads
+
+    def get(self, parts: Sequence, default=None):
+        value = self._get(self.key(*parts))
+        return default if value is _MISSING else value
+
+    def get_many(self, parts_list: Iterable[Sequence]) -> dict[tuple, object]:
+        """`{tuple(parts): value}` for the entries that are present and fresh."""
+        keys = {self.key(*parts): tuple(parts) for parts in parts_list}
+        if not keys:
+            return {}
+        entries = self.cache.get_many(list(keys), version=self.version)
+        tags = {tag for tag_versions, _ in entries.values() if tag_versions for tag in tag_versions}
+        current = self._current_tag_versions(tags) if tags else {}
+
+        found, stale = {}, 0
+        for key, (tag_versions, value) in entries.items():
+            if tag_versions and any(current.get(tag) != version for tag, version in tag_versions.items()):
+                stale += 1
+                continue
+            found[keys[key]] = value
+        self._count("hits", len(found))
+        self._count("misses", len(keys) - len(found))
+        self._count("stale", stale)
+        return found
+
+    def _get(self, key: str):
+        entry = self.cache.get(key, _MISSING, version=self.version)
+        if entry is _MISSING:
+            self._count("misses")
+            return _MISSING
+        tag_versions, value = entry
+        if tag_versions:
+            current = self._current_tag_versions(tag_versions)
+            if any(current.get(tag) != version for tag, version in tag_versions.items()):
+                self._count("misses")
+                self._count("stale")
+                return _MISSING
+        self._count("hits")
+        return value
+
+    # Writes
+
+    def set(self, parts: Sequence, value, timeout=DEFAULT_TIMEOUT, tags: Iterable[str] = ()) -> None:
+        self._set(self.key(*parts), value, timeout, self._tag_versions(tags))
+
+    def delete(self, parts: Sequence) -> None:
+        self.cache.delete(self.key(*parts), version=self.version)
+        self._count("deletes")
+
+    def get_or_set(
+        self,
+        parts: Sequence,
+        compute: Callable[[], object],
+        timeout=DEFAULT_TIMEOUT,
+        tags: Iterable[str] = (),
+    ):
+        """The cached value, or `compute()`'s result (stored) if there is none."""
+        key = self.key(*parts)
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+
+        key_lock = self._key_lock(key)  # Strong reference: the registry only holds weak ones.
+        with key_lock.lock:
+            # Another thread of this process may have filled it meanwhile.
+            value = self._peek(key)
+            if value is not _MISSING:
+                self._count("waits")
+                return value
+
+            lease_key = f"{key}:lease"
+            leased = self.cache.add(lease_key, 1, timeout=self.lock_timeout, version=self.version)
+            if not leased:
+                value = self._wait_for(key)
+                if value is not _MISSING:
+                    self._count("waits")
+                    return value
+            try:
+                # Versions read before computing: an invalidation that lands
+                # while compute() runs leaves the written entry stale.
+                tag_versions = self._tag_versions(tags)
+                value = compute()
+                self._count("computes")
+                self._set(key, value, timeout, tag_versions)
+            finally:
+                if leased:
+                    self.cache.delete(lease_key, version=self.version)
+        return value
+
+    def _set(self, key: str, value, timeout, tag_versions: dict[str, str] | None) -> None:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        self.cache.set(key, (tag_versions, value), timeout=timeout, version=self.version)
+        self._count("sets")
+
+    # Helpers
+
+    def _peek(self, key: str):
+        """Like `_get`, without counting a miss (the caller already counted one)."""
+        entry = self.cache.get(key, _MISSING, version=self.version)
+        if entry is _MISSING:
+            return _MISSING
+        tag_versions, value = entry
+        if tag_versions:
+            current = self._current_tag_versions(tag_versions)
+            if any(current.get(tag) != version for tag, version in tag_versions.items()):
+                return _MISSING
+        return value
+
+    def _wait_for(self, key: str):
+        """Poll for the value another process is computing, until its lease would expire."""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            value = self._peek(key)
+            if value is not _MISSING:
+                return value
+        return _MISSING
+
+    def _key_lock(self, key: str) -> _KeyLock:
+        with self._key_locks_lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = _KeyLock()
+            return key_lock
+
+    def _current_tag_versions(self, tags: Iterable[str]) -> dict[str, str]:
+        found = self.cache.get_many([_tag_key(tag) for tag in tags])
+        return {key[len(TAG_KEY_PREFIX):]: version for key, version in found.items()}
+
+    def _tag_versions(self, tags: Iterable[str]) -> dict[str, str] | None:
+        """Current version of each tag, giving a version to tags that have none."""
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return None
+        versions = self._current_tag_versions(tags)
+        missing = [tag for tag in tags if tag not in versions]
+        for tag in missing:
+            self.cache.add(_tag_key(tag), uuid.uuid4().hex, timeout=None)
+        if missing:
+            # Re-read: another process may have added a different version first.
+            versions.update(self._current_tag_versions(missing))
+        return versions
+
+    def _count(self, event: str, count: int = 1) -> None:
+        if count:
+            _stats.incr(self.alias, self.namespace, event, count)
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, Warning
+
+
+def check_cloudinary_credentials(app_configs, **kwargs):
+    """Media storage needs Cloudinary credentials; only reported by `check --deploy`."""
+    storage = settings.CLOUDINARY_STORAGE
+    if all(storage.get(key) for key in ("CLOUD_NAME", "API_KEY", "API_SECRET")):
+        return []
+    return [
+        Error(
+            "Cloudinary credentials are not configured.",
+            hint="Set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET.",
+            id="common.E001",
+        )
+    ]
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Per-process caches make invalidation reach one worker only; only reported by `check --deploy`."""
+    local = sorted(
+        alias
+        for alias, config in settings.CACHES.items()
+        if config["BACKEND"] == "django.core.cache.backends.locmem.LocMemCache"
+    )
+    if not local:
+        return []
+    return [
+        Warning(
+            f"Cache aliases {', '.join(local)} are per process (LocMemCache).",
+            hint="Set CACHE_URL to a redis:// (or file://) URL so every worker shares cached entries.",
+            id="common.W001",
+        )
+    ]
@@ -0,0 +1,95 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Views build `Validators` from cheap aggregate queries over what a response
+renders (latest `updated_at` and row counts of the objects and their related
+rows) and answer a matching If-None-Match / If-Modified-Since with 304
+before any serializer runs:
+
+    validators = Validators.for_request(request, *parts, last_modified=changed)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    ...
+    return validators.apply(Response(data))
+
+The ETag is weak (equivalent JSON, not identical bytes) and also covers the
+request's host and full path, so query parameters and absolute URLs are part
+of it. Responses carry `Cache-Control: no-cache`: clients keep the body but
+revalidate on every use instead of guessing a freshness lifetime from
+Last-Modified. Counts go into the ETag so deletions, which leave no
+`updated_at` behind, still change it.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def conditional_get_enabled() -> bool:
+    return getattr(settings, "CONDITIONAL_GET_ENABLED", True)
+
+
+def latest(*timestamps: datetime | None) -> datetime | None:
+    """The most recent of `timestamps`, ignoring None."""
+    present = [value for value in timestamps if value is not None]
+    return max(present) if present else None
+
+
+def start_of_today() -> datetime:
+    """Midnight in the current timezone: responses that depend on today's date change then."""
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+class Validators:
+    """ETag and Last-Modified of one response."""
+
+    def __init__(self, etag: str, last_modified: datetime | None = None, private: bool = False):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.private = private
+
+    @classmethod
+    def for_request(cls, request, *parts, last_modified: datetime | None = None, private: bool = False):
+        """
+        Validators over `parts` (anything with a stable `repr`). `private`
+        responses depend on the authenticated user: they are not stored by
+        shared caches and vary on Authorization.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (request.get_host(), request.get_full_path(), *parts):
+            digest.update(repr(part).encode())
+            digest.update(b"\0")
+        return cls(f'W/"{digest.hexdigest()}"', last_modified, private)
+
+    @property
+    def last_modified_timestamp(self) -> int | None:
+        return int(self.last_modified.timestamp()) if self.last_modified else None
+
+    def not_modified(self, request):
+        """A 304 (or 412 for a failed If-Match) response, or None to render the full response."""
+        response = get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=self.last_modified_timestamp,
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        """Set the validator and cache headers on a 2xx response."""
+        if not 200 <= response.status_code < 300 and response.status_code != 304:
+            return response
+        response.headers["ETag"] = self.etag
+        if self.last_modified is not None:
+            response.headers["Last-Modified"] = http_date(self.last_modified_timestamp)
+        if self.private:
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,39 @@
+"""
+Connection pool metrics for databases configured with `pool=true`
+(see `_parse_database_url` in config/settings/base.py).
+"""
+from django.db import connections
+
+
+def pool_stats() -> dict[str, dict]:
+    """
+    Metrics for this process's pool of each pooled database alias:
+    connections in use / idle, requests waiting for a connection right now,
+    and cumulative request count, wait time, timeouts and reconnects since
+    the pool opened. Aliases without a pool are omitted.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        raw = pool.get_stats()
+        requests = raw.get("requests_num", 0)
+        wait_ms = raw.get("requests_wait_ms", 0)
+        stats[alias] = {
+            "min_size": raw.get("pool_min", 0),
+            "max_size": raw.get("pool_max", 0),
+            "size": raw.get("pool_size", 0),
+            "in_use": raw.get("pool_size", 0) - raw.get("pool_available", 0),
+            "idle": raw.get("pool_available", 0),
+            "waiting": raw.get("requests_waiting", 0),
+            "requests": requests,
+            "requests_queued": raw.get("requests_queued", 0),
+            "wait_ms_total": wait_ms,
+            "wait_ms_avg": round(wait_ms / requests, 3) if requests else 0.0,
+            "request_errors": raw.get("requests_errors", 0),
+            "connections_opened": raw.get("connections_num", 0),
+            "connections_lost": raw.get("connections_lost", 0),
+            "connections_bad_on_return": raw.get("returns_bad", 0),
+        }
+    return stats
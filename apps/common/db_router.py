@@ -0,0 +1,110 @@
+"""
+Read-replica routing.
+
+Replicas are configured with `DATABASE_REPLICA_URLS` (see
+config/settings/base.py). Writes always go to `default`, and so do reads
+unless `ReplicaRoutingMiddleware` has opened a replica scope for the current
+request. It does that only for safe-method HTTP requests whose view allows it
+(`replica_reads`) and whose client has not written in the last
+`DATABASE_REPLICA_PIN_SECONDS`, so users read their own writes. Management
+commands, background workers and websocket consumers never read from a
+replica. Inside a scope, reads still go to the primary while a transaction is
+open on it, and models of `PRIMARY_ONLY_APP_LABELS` never leave the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+
+PRIMARY_ONLY_APP_LABELS = frozenset({"payments"})
+PIN_COOKIE = "db_primary_pin"
+PIN_KEY_PREFIX = "db:primary-pin:"
+
+# The current request's ReplicaScope, or None: read from the primary.
+_replica_scope: ContextVar["ReplicaScope | None"] = ContextVar("replica_scope", default=None)
+
+
+def replica_aliases() -> list[str]:
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def pin_seconds() -> int:
+    return getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 10)
+
+
+def pin_user(user) -> None:
+    """Send `user`'s reads to the primary for the next `pin_seconds()`."""
+    cache.set(f"{PIN_KEY_PREFIX}{user.pk}", 1, timeout=pin_seconds())
+
+
+def is_user_pinned(user) -> bool:
+    return cache.get(f"{PIN_KEY_PREFIX}{user.pk}") is not None
+
+
+class ReplicaScope:
+    """
+    Replica reads for one request. The replica is picked once, so all reads
+    of the request see the same snapshot lag. The per-user pin is checked as
+    soon as the request's user has been authenticated; the cookie pin is
+    checked by the middleware before opening the scope.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._alias: str | None = None
+        self._user_checked = False
+
+    def alias(self) -> str:
+        if not self._user_checked:
+            user = self.request.__dict__.get("user")
+            # Don't force Django's lazy session user here: loading it queries the database.
+            if user is not None and not (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+                self._user_checked = True
+                if user.is_authenticated and is_user_pinned(user):
+                    self._alias = DEFAULT_DB_ALIAS
+        if self._alias is None:
+            self._alias = random.choice(replica_aliases())
+        return self._alias
+
+
+def open_replica_scope(request):
+    return _replica_scope.set(ReplicaScope(request))
+
+
+def close_replica_scope(token) -> None:
+    _replica_scope.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        scope = _replica_scope.get()
+        if (
+            scope is None
+            or not replica_aliases()
+            or model._meta.app_label in PRIMARY_ONLY_APP_LABELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        # Related objects and deferred fields load from wherever the instance came from.
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return scope.alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
@@ -1,13 +1,22 @@
 import logging
+import time
 from collections.abc import Iterable
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 
+from apps.common.metrics import Histogram
+from apps.common.profiling import span
+
 
 logger = logging.getLogger(__name__)
 
+EMAIL_SEND_SECONDS = Histogram(
+    "email_send_seconds", "Render and send time of one notification email, by template and outcome.",
+    ["template", "outcome"],
+)
+
 
 class NotificationEmailService:
     """Sends booking and payment lifecycle emails to guests and hosts."""
@@ -129,9 +138,13 @@ class NotificationEmailService:
         html_template: str,
         context: dict,
     ) -> None:
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            text_body = render_to_string(text_template, context)
-            html_body = render_to_string(html_template, context)
+            with span("template", text_template):
+                text_body = render_to_string(text_template, context)
+            with span("template", html_template):
+                html_body = render_to_string(html_template, context)
             message = EmailMultiAlternatives(
                 subject=subject,
                 body=text_body,
@@ -139,7 +152,9 @@ class NotificationEmailService:
                 to=[to_email],
             )
             message.attach_alternative(html_body, "text/html")
-            message.send(fail_silently=False)
+            with span("email", "send", template=text_template):
+                message.send(fail_silently=False)
+            outcome = "sent"
         except Exception:
             logger.exception(
                 "Failed to send notification email '%s' for booking %s to %s.",
@@ -147,6 +162,8 @@ class NotificationEmailService:
                 context["booking"].id,
                 to_email,
             )
+        finally:
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, template=text_template, outcome=outcome)
 
     @staticmethod
     def _email_backend_is_available() -> bool:
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.benchmarks import get_scenarios
+
+
+class Command(BaseCommand):
+    help = "Run registered micro-benchmarks (see apps/*/benchmarks.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Scenario names or prefixes (default: all).")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--list", action="store_true", help="List scenarios and exit.")
+
+    def handle(self, *args, **options):
+        scenarios = get_scenarios()
+        if options["list"]:
+            for name, (_, description) in scenarios.items():
+                self.stdout.write(f"{name:32} {description}")
+            return
+
+        names = options["names"]
+        selected = {
+            name: scenario
+            for name, scenario in scenarios.items()
+            if not names or any(name == n or name.startswith(f"{n}.") for n in names)
+        }
+        if not selected:
+            raise CommandError(f"No benchmark matches {', '.join(names)}. Use --list.")
+
+        iterations = max(1, options["iterations"])
+        for name, (func, description) in selected.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {description}"))
+            results = func(iterations)
+            baseline = next(iter(results.values()), None)
+            for label, elapsed in results.items():
+                per_op_us = elapsed / iterations * 1_000_000
+                speedup = f"  x{baseline / elapsed:.2f}" if baseline and elapsed else ""
+                self.stdout.write(
+                    f"  {label:36} {iterations / elapsed if elapsed else float('inf'):>12.1f} ops/s"
+                    f" {per_op_us:>12.1f} us/op{speedup}"
+                )
@@ -0,0 +1,83 @@
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# What each target imports in a fresh interpreter.
+TARGETS = {
+    "setup": "import django; django.setup()",
+    "urls": "import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns",
+    "asgi": "import config.asgi; from django.urls import get_resolver; get_resolver().url_patterns",
+}
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile cold start: import a target in a fresh interpreter under `python -X importtime` "
+        "and report the slowest modules and packages against the COLD_START_BUDGET_MS budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(TARGETS), default="asgi",
+                            help="setup: django.setup(); urls: + URLconf; asgi: what a serve.py worker loads (default).")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--runs", type=int, default=3, help="Report the fastest of this many runs.")
+        parser.add_argument("--budget-ms", type=float, default=None,
+                            help="Cold-start budget in ms (default: COLD_START_BUDGET_MS).")
+        parser.add_argument("--check", action="store_true", help="Exit with an error when over budget.")
+
+    def handle(self, *args, **options):
+        budget_ms = options["budget_ms"] or getattr(settings, "COLD_START_BUDGET_MS", 1000)
+        best = None
+        for _ in range(max(1, options["runs"])):
+            run = self._profile(TARGETS[options["target"]])
+            if best is None or run[0] < best[0]:
+                best = run
+        wall_ms, modules = best
+
+        packages: dict[str, int] = defaultdict(int)
+        for name, (self_us, _) in modules.items():
+            packages[name.split(".")[0]] += self_us
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Slowest modules ({options['target']}, self time)"))
+        for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][0])[:options["top"]]:
+            self.stdout.write(f"  {name:56} {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:.1f} ms)")
+        self.stdout.write(self.style.MIGRATE_HEADING("Slowest top-level packages (self time)"))
+        for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:options["top"]]:
+            self.stdout.write(f"  {name:56} {self_us / 1000:8.1f} ms")
+
+        imports_ms = sum(self_us for self_us, _ in modules.values()) / 1000
+        summary = (
+            f"Cold start: {wall_ms:.0f} ms wall ({imports_ms:.0f} ms importing {len(modules)} modules), "
+            f"budget {budget_ms:.0f} ms."
+        )
+        if wall_ms <= budget_ms:
+            self.stdout.write(self.style.SUCCESS(summary))
+        elif options["check"]:
+            raise CommandError(summary)
+        else:
+            self.stdout.write(self.style.WARNING(summary))
+
+    def _profile(self, code: str) -> tuple[float, dict[str, tuple[int, int]]]:
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode:
+            raise CommandError(f"Target failed to import:\n{proc.stderr[-2000:]}")
+        modules = {}
+        for line in proc.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                modules[match.group(3).strip()] = (int(match.group(1)), int(match.group(2)))
+        return wall_ms, modules
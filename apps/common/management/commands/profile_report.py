@@ -0,0 +1,73 @@
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.profiling import read
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise sampled request profiles (PROFILING_SINK_PATH): per endpoint, request latency, "
+        "time by span kind and the top-N spans by total time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Profile file (default: PROFILING_SINK_PATH).")
+        parser.add_argument("--top", type=int, default=10, help="Spans listed per endpoint.")
+        parser.add_argument("--endpoints", type=int, default=20, help="Endpoints listed, slowest total first.")
+        parser.add_argument("--endpoint", default="", help="Only endpoints containing this text.")
+        parser.add_argument("--kind", choices=["http", "websocket"], default=None)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"] or settings.PROFILING_SINK_PATH)
+        if not path.exists():
+            raise CommandError(f"No profiles at {path}. Set PROFILING_SAMPLE_RATE to record some.")
+
+        durations: dict[str, list[float]] = defaultdict(list)
+        kind_totals: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # endpoint -> (span kind, span name) -> [count, total ms, max ms]
+        spans: dict[str, dict[tuple[str, str], list]] = defaultdict(lambda: defaultdict(lambda: [0, 0.0, 0.0]))
+        for record in read(path):
+            if options["kind"] and record.get("kind") != options["kind"]:
+                continue
+            endpoint = f"{record.get('method', '')} {record.get('endpoint', '')}".strip()
+            if options["endpoint"] not in endpoint:
+                continue
+            durations[endpoint].append(record["duration_ms"])
+            for kind, total in record.get("span_totals_ms", {}).items():
+                kind_totals[endpoint][kind] += total
+            for item in record.get("spans", []):
+                row = spans[endpoint][(item["kind"], item["name"])]
+                row[0] += 1
+                row[1] += item["duration_ms"]
+                row[2] = max(row[2], item["duration_ms"])
+
+        if not durations:
+            self.stdout.write("No matching profiles.")
+            return
+
+        ranked = sorted(durations, key=lambda endpoint: -sum(durations[endpoint]))[:options["endpoints"]]
+        for endpoint in ranked:
+            values = sorted(durations[endpoint])
+            total = sum(values)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{endpoint}: {len(values)} profiled, p50 {_percentile(values, 0.5):.1f} ms, "
+                f"p95 {_percentile(values, 0.95):.1f} ms, max {values[-1]:.1f} ms"
+            ))
+            by_kind = ", ".join(
+                f"{kind} {kind_total / (total or 1):.0%}"
+                for kind, kind_total in sorted(kind_totals[endpoint].items(), key=lambda item: -item[1])
+            )
+            if by_kind:
+                self.stdout.write(f"  time in spans: {by_kind}")
+            top = sorted(spans[endpoint].items(), key=lambda item: -item[1][1])[:options["top"]]
+            for (kind, name), (count, span_total, span_max) in top:
+                self.stdout.write(
+                    f"  {kind:9} {span_total:10.1f} ms total {count:6}x  max {span_max:8.1f} ms  {name[:100]}"
+                )
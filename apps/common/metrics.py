@@ -0,0 +1,362 @@
+"""
+In-process operational metrics in the Prometheus text format.
+
+Metrics are declared once at module level and updated from hot paths:
+
+    BOOKING_LOCK_WAIT = Histogram("booking_lock_wait_seconds", "Time to lock the listing row.")
+    BOOKING_LOCK_WAIT.observe(elapsed)
+    GATEWAY_RETRIES = Counter("payment_gateway_retries_total", "Retried gateway calls.", ["action"])
+    GATEWAY_RETRIES.inc(action="create_order")
+
+Updates take a per-metric lock and touch only this process's memory.
+`GET /metrics` (see `MetricsView`) renders them.
+
+Several worker processes: set METRICS_DIR to a directory shared by the
+workers of one host. Each process then writes its values to
+`<METRICS_DIR>/metrics-<pid>-<token>.json` at most every
+METRICS_FLUSH_SECONDS (and when it exits); the random token keeps a reused
+pid from overwriting an earlier process's file. A scrape served by any worker
+first folds the counters and histograms of exited processes into
+`metrics-aggregate.json` and deletes their files, then adds up the aggregate
+and the running processes' files: totals never go backwards, and gauges
+cover running processes only. serve.py empties the directory when the
+supervisor starts.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+FILE_PREFIX = "metrics-"
+AGGREGATE_FILE = f"{FILE_PREFIX}aggregate.json"
+LOCK_FILE = "metrics.lock"
+_PROCESS_TOKEN = uuid.uuid4().hex[:12]
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[list]:
+        """`[[label values, value], ...]`, JSON-serialisable."""
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def merge(current, value):
+        return current + value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        REGISTRY.maybe_flush()
+
+
+class Gauge(Metric):
+    """A value that goes up and down; in multi-process mode, summed over running processes."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        REGISTRY.maybe_flush()
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative `le` buckets, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        buckets = tuple(sorted(buckets))
+        self.buckets = buckets if buckets[-1] == math.inf else (*buckets, math.inf)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        """Count `value` in its bucket. NaN and infinities are dropped: they would poison the sum."""
+        key = self._key(labels)
+        if not math.isfinite(value):
+            return
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+        REGISTRY.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def _copy(value):
+        counts, total, count = value
+        return [list(counts), total, count]
+
+    @staticmethod
+    def merge(current, value):
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._flush_lock = threading.Lock()
+        self._next_flush = 0.0
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> dict[str, list]:
+        return {name: metric.samples() for name, metric in self._metrics.items()}
+
+    # Multi-process mode
+
+    @staticmethod
+    def directory() -> Path | None:
+        path = getattr(settings, "METRICS_DIR", "")
+        return Path(path) if path else None
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write this process's values to METRICS_DIR (no-op without it)."""
+        with self._flush_lock:
+            self._next_flush = time.monotonic() + getattr(settings, "METRICS_FLUSH_SECONDS", 5.0)
+            directory = self.directory()
+            if directory is None:
+                return
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{FILE_PREFIX}{os.getpid()}-{_PROCESS_TOKEN}.json"
+            _write_json(path, {"pid": os.getpid(), "metrics": self.snapshot()})
+
+    def collect(self) -> dict[str, dict[tuple[str, ...], object]]:
+        """Values by metric and label values: this process's, or every process's in multi-process mode."""
+        merged: dict[str, dict[tuple[str, ...], object]] = {name: {} for name in self._metrics}
+        directory = self.directory()
+        if directory is None:
+            self._merge(merged, self.snapshot(), live=True)
+            return merged
+
+        self.flush()
+        with _locked(directory / LOCK_FILE):
+            aggregate, folded = self._fold_exited(directory)
+            self._merge(merged, aggregate, live=False)
+            for path, data in _process_files(directory):
+                if path in folded:
+                    continue
+                self._merge(merged, data["metrics"], live=_process_running(data["pid"]))
+        return merged
+
+    def _fold_exited(self, directory: Path) -> tuple[dict[str, list], set[Path]]:
+        """
+        Add the files of exited processes to the aggregate file and delete
+        them; returns the aggregate's metrics and the files folded into it.
+        Runs under LOCK_FILE.
+
+        The aggregate lists the files it has absorbed, so a file whose delete
+        was interrupted is not counted twice.
+        """
+        path = directory / AGGREGATE_FILE
+        try:
+            aggregate = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            aggregate = {"metrics": {}, "folded": []}
+        folded = {tuple(entry) for entry in aggregate["folded"]}
+
+        totals: dict[str, dict[tuple[str, ...], object]] = {}
+        self._merge(totals, aggregate["metrics"], live=False)
+        exited = []
+        for file, data in _process_files(directory):
+            if _process_running(data["pid"]):
+                continue
+            stat = file.stat()
+            marker = (file.name, stat.st_ino, stat.st_mtime_ns)
+            if marker not in folded:
+                self._merge(totals, data["metrics"], live=False)
+            exited.append((file, marker))
+        if not exited:
+            return aggregate["metrics"], set()
+
+        metrics = {name: [[list(key), value] for key, value in values.items()] for name, values in totals.items()}
+        _write_json(path, {"metrics": metrics, "folded": [list(marker) for _, marker in exited]})
+        for file, _ in exited:
+            file.unlink(missing_ok=True)
+        return metrics, {file for file, _ in exited}
+
+    def _merge(self, merged: dict[str, dict[tuple[str, ...], object]], metrics: dict[str, list], live: bool) -> None:
+        """Add one snapshot's samples into `merged`; gauges only from running processes."""
+        for name, samples in metrics.items():
+            metric = self._metrics.get(name)
+            if metric is None or (metric.type == "gauge" and not live):
+                continue
+            values = merged.setdefault(name, {})
+            for labelvalues, value in samples:
+                key = tuple(labelvalues)
+                values[key] = metric.merge(values[key], value) if key in values else value
+
+    def render(self) -> str:
+        """The Prometheus text exposition (format 0.0.4) of `collect()`."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(values.items()):
+                labels = dict(zip(metric.labelnames, key))
+                if metric.type != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _process_files(directory: Path):
+    """`(path, data)` of each readable per-process file in `directory`."""
+    for path in directory.glob(f"{FILE_PREFIX}[0-9]*.json"):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        yield path, data
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _locked(path: Path):
+    """Exclusive lock on `path` shared by every process of the host (flock)."""
+    import fcntl
+
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _process_running(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _number(value: float) -> str:
+    """A sample value as the exposition format spells it (`+Inf`, `-Inf`, `NaN` for non-finite values)."""
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+
+class MeteredConsumerMixin:
+    """
+    Counts a Channels websocket consumer's open connections and received
+    frames, labelled by consumer class. Put it before the consumer base class.
+    """
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        self._metered_connection = True
+        WEBSOCKET_CONNECTIONS.inc(consumer=type(self).__name__)
+
+    async def websocket_receive(self, message):
+        WEBSOCKET_MESSAGES.inc(consumer=type(self).__name__)
+        await super().websocket_receive(message)
+
+    async def websocket_disconnect(self, message):
+        if getattr(self, "_metered_connection", False):
+            self._metered_connection = False
+            WEBSOCKET_CONNECTIONS.dec(consumer=type(self).__name__)
+        await super().websocket_disconnect(message)
+
+
+# Shared metrics. Domain metrics live next to the code that records them.
+
+WEBSOCKET_CONNECTIONS = Gauge("websocket_connections", "Open websocket connections.", ["consumer"])
+WEBSOCKET_MESSAGES = Counter("websocket_messages_received_total", "Websocket frames received.", ["consumer"])
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from apps.common.compression import choose_encoding, compress, is_compressible
+from apps.common.db_router import (
+    PIN_COOKIE,
+    close_replica_scope,
+    open_replica_scope,
+    pin_seconds,
+    pin_user,
+    replica_aliases,
+)
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _view_allows_replica(view_func, method: str) -> bool:
+    """
+    A view opts out of replica reads with `replica_reads = False`, or allows
+    them for some viewset actions only with a set of action names.
+    """
+    policy = getattr(getattr(view_func, "cls", None), "replica_reads", True)
+    if isinstance(policy, bool):
+        return policy
+    actions = getattr(view_func, "actions", None) or {}
+    return actions.get(method.lower()) in policy
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Opens a replica read scope (apps.common.db_router) for safe-method
+    requests, and pins the client to the primary after any other request:
+    with a short-lived cookie, and per user for authenticated requests, whose
+    JWT clients may not send cookies back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = request.__dict__.pop("_replica_scope_token", None)
+            if token is not None:
+                close_replica_scope(token)
+
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=pin_seconds(), secure=request.is_secure(), httponly=True, samesite="Lax"
+            )
+            user = request.__dict__.get("user")
+            if getattr(user, "is_authenticated", False):
+                pin_user(user)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and replica_aliases()
+            and PIN_COOKIE not in request.COOKIES
+            and _view_allows_replica(view_func, request.method)
+        ):
+            request._replica_scope_token = open_replica_scope(request)
+        return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of COMPRESSION_CONTENT_TYPES that are at
+    least COMPRESSION_MIN_BYTES long, with the preferred encoding the client
+    accepts (apps.common.compression). Streaming responses (upload
+    progress, files) are left alone so they keep flushing as they go.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not is_compressible(response.get("Content-Type", ""))
+            or len(response.content) < getattr(settings, "COMPRESSION_MIN_BYTES", 1024)
+        ):
+            return response
+
+        # Whether or not this client gets it compressed, the body depends on it.
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        compressed = compress(encoding, response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # The bytes differ from the uncompressed representation's.
+            response.headers["ETag"] = f"W/{etag}"
+        return response
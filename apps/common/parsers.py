@@ -0,0 +1,30 @@
+"""
+JSON request parser backed by orjson, with DRF's stdlib parser as the fallback.
+
+Non-UTF-8 bodies and anything orjson rejects (including malformed JSON, so
+error messages stay DRF's) are re-parsed by `rest_framework.parsers.JSONParser`.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from apps.common.renderers import FastJSONRenderer, orjson, orjson_enabled
+
+
+class FastJSONParser(JSONParser):
+    """Drop-in replacement for DRF's JSONParser."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not orjson_enabled() or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
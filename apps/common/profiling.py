@@ -0,0 +1,195 @@
+"""
+Sampled per-request profiling.
+
+With PROFILING_SAMPLE_RATE above 0, `ProfilingMiddleware` (HTTP) and
+`ProfiledConsumerMixin` (websocket messages) profile that fraction of
+requests. A profile collects timed spans from the code the request runs:
+
+- every SQL query (a database execute wrapper, installed on each new
+  connection while profiling is enabled),
+- `span(kind, name)` blocks around templates, email sends, payment gateway
+  calls and storage uploads.
+
+Profiles of requests lasting at least PROFILING_MIN_DURATION_MS are appended
+to PROFILING_SINK_PATH, one JSON object per line; `manage.py profile_report`
+aggregates them into the slowest spans per endpoint.
+
+Spans follow the request through `sync_to_async` / `database_sync_to_async`
+(they copy context variables). Work handed to other threads is only covered
+when the submitter copies the context, as `upload_files` does. Outside a
+sampled request, `span()` costs one context variable lookup.
+"""
+import contextvars
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+
+_current: contextvars.ContextVar["Profile | None"] = contextvars.ContextVar("profile", default=None)
+_sink_lock = threading.Lock()
+
+# `IN (%s, %s, %s)` groups queries that differ only in the number of parameters.
+_REPEATED_PARAMS = re.compile(r"%s(?:\s*,\s*%s)+")
+MAX_SQL_LENGTH = 300
+
+
+def sample_rate() -> float:
+    return getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+
+
+def profiling_enabled() -> bool:
+    return sample_rate() > 0
+
+
+class Profile:
+    """Spans of one request or websocket message."""
+
+    def __init__(self, kind: str, method: str = ""):
+        self.kind = kind
+        self.method = method
+        self.endpoint = ""
+        self.status = None
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+
+    def add(self, kind: str, name: str, started: float, duration: float, **attrs) -> None:
+        self.spans.append({
+            "kind": kind,
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attrs,
+        })
+
+    def record(self) -> dict:
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        totals: dict[str, float] = {}
+        for item in self.spans:
+            totals[item["kind"]] = totals.get(item["kind"], 0.0) + item["duration_ms"]
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "kind": self.kind,
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "duration_ms": round(duration_ms, 3),
+            "span_totals_ms": {kind: round(total, 3) for kind, total in sorted(totals.items())},
+            "spans": self.spans,
+        }
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Time the block as a `kind` span of the current profile, if any."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(kind, name, started, time.perf_counter() - started, **attrs)
+
+
+@contextmanager
+def profile_scope(kind: str, method: str = ""):
+    """
+    Profile the block if it is sampled: yields the Profile (or None) and
+    writes it to the sink on exit. Nested scopes record into the outer one.
+    """
+    if _current.get() is not None or not profiling_enabled() or random.random() >= sample_rate():
+        yield None
+        return
+    profile = Profile(kind, method)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        write(profile.record())
+
+
+def write(record: dict) -> None:
+    """Append `record` to the sink if it is slow enough to keep."""
+    if record["duration_ms"] < getattr(settings, "PROFILING_MIN_DURATION_MS", 0):
+        return
+    path = Path(settings.PROFILING_SINK_PATH)
+    line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+    with _sink_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write() per line in append mode: lines from several worker
+        # processes do not interleave.
+        with path.open("a", encoding="utf-8") as sink:
+            sink.write(line)
+
+
+def read(path: str | Path):
+    """Yield the records of a sink file, skipping lines that are not valid JSON."""
+    with Path(path).open(encoding="utf-8") as sink:
+        for line in sink:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def query_name(sql: str) -> str:
+    """A query's SQL with repeated placeholders collapsed, for grouping."""
+    sql = _REPEATED_PARAMS.sub("%s, ...", " ".join(sql.split()))
+    return sql if len(sql) <= MAX_SQL_LENGTH else f"{sql[:MAX_SQL_LENGTH]}..."
+
+
+def _db_execute_wrapper(alias: str):
+    def wrapper(execute, sql, params, many, context):
+        if _current.get() is None:
+            return execute(sql, params, many, context)
+        with span("db", query_name(sql), alias=alias, many=many):
+            return execute(sql, params, many, context)
+
+    return wrapper
+
+
+def install_db_wrapper(sender, connection, **kwargs) -> None:
+    """`connection_created` receiver: time this connection's queries."""
+    if not any(getattr(wrapper, "profiling", False) for wrapper in connection.execute_wrappers):
+        wrapper = _db_execute_wrapper(connection.alias)
+        wrapper.profiling = True
+        connection.execute_wrappers.append(wrapper)
+
+
+class ProfilingMiddleware:
+    """Profiles a PROFILING_SAMPLE_RATE fraction of HTTP requests."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_scope("http", request.method) as profile:
+            response = self.get_response(request)
+            if profile is not None:
+                match = request.resolver_match
+                profile.endpoint = match.view_name if match and match.view_name else request.path
+                profile.status = response.status_code
+            return response
+
+
+class ProfiledConsumerMixin:
+    """
+    Profiles a PROFILING_SAMPLE_RATE fraction of the messages a Channels
+    consumer handles (connects, received frames, group events), as endpoint
+    `<Consumer> <message type>`. Put it before the consumer base class.
+    """
+
+    async def dispatch(self, message):
+        with profile_scope("websocket") as profile:
+            if profile is not None:
+                profile.endpoint = f"{type(self).__name__} {message['type']}"
+            await super().dispatch(message)
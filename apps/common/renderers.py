@@ -0,0 +1,49 @@
+"""
+JSON renderer backed by orjson, with DRF's stdlib renderer as the fallback.
+
+Output matches `rest_framework.renderers.JSONRenderer` for the API's data:
+compact separators, UTF-8 text, datetimes ending in "Z" for UTC, UUIDs as
+strings and every other type (Decimal, lazy strings, querysets, ...)
+converted by DRF's own encoder hook. Indented output, ASCII-only output,
+integers beyond 64 bits and non-string dict keys go through the stdlib
+renderer. `API_JSON_BACKEND = "stdlib"` switches orjson off entirely.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def orjson_enabled() -> bool:
+    return orjson is not None and getattr(settings, "API_JSON_BACKEND", "orjson") == "orjson"
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in replacement for DRF's JSONRenderer."""
+
+    _default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            not orjson_enabled()
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-safety escaping as DRF.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,112 @@
+"""
+Read-only fast path for large list pages.
+
+A RowSerializer renders `.values()` rows instead of model instances: the
+columns it needs are declared once in `values`, and `to_representation`
+builds each item directly with the formatters below, which reproduce DRF's
+output for the same field types (UUIDs as strings, ISO dates, UTC datetimes
+with a trailing "Z", decimals quantized and coerced to strings). That skips
+model instantiation and DRF's per-field dispatch, which dominate CPU on
+pages of hundreds of rows.
+
+Every RowSerializer must produce exactly the JSON of the ModelSerializer it
+shadows; the `<app>.row_serializers` benchmarks check that with
+`assert_same_json` before timing.
+"""
+import decimal
+from collections.abc import Callable, Iterable
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+def row_serializers_enabled() -> bool:
+    return getattr(settings, "ROW_SERIALIZERS_ENABLED", True)
+
+
+def format_date(value) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def datetime_formatter() -> Callable[[object], str | None]:
+    """
+    Formatter equivalent to `serializers.DateTimeField()`, bound to the
+    current timezone so it is looked up once per page, not per value.
+    """
+    field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def format_datetime(value) -> str | None:
+        if value is None:
+            return None
+        if field_timezone is not None and value.tzinfo is not None:
+            value = value.astimezone(field_timezone)
+        text = value.isoformat()
+        if text.endswith("+00:00"):
+            text = text[:-6] + "Z"
+        return text
+
+    return format_datetime
+
+
+def decimal_formatter(max_digits: int, decimal_places: int) -> Callable[[object], str | None]:
+    """Formatter equivalent to `serializers.DecimalField(max_digits, decimal_places)`."""
+    exponent = decimal.Decimal(".1") ** decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = max_digits
+
+    def format_decimal(value) -> str | None:
+        if value is None:
+            return None
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return "{:f}".format(value.quantize(exponent, context=context))
+
+    return format_decimal
+
+
+class RowSerializer:
+    """
+    Base class for read-only serializers over `.values()` rows.
+
+    Usage mirrors a `many=True` DRF serializer:
+
+        rows = MyRowSerializer.queryset(queryset)
+        MyRowSerializer(rows, context={"request": request}).data
+    """
+
+    values: tuple[str, ...] = ()
+
+    def __init__(self, rows: Iterable[dict], context: dict | None = None):
+        self.rows = rows
+        self.context = context or {}
+        self.format_datetime = datetime_formatter()
+
+    @classmethod
+    def queryset(cls, queryset):
+        """Restrict `queryset` to the columns this serializer reads."""
+        return queryset.values(*cls.values)
+
+    def prepare(self, rows: list[dict]) -> None:
+        """Hook for page-wide lookups before rendering (e.g. one batched query)."""
+
+    def to_representation(self, row: dict) -> dict:
+        raise NotImplementedError
+
+    @property
+    def data(self) -> list[dict]:
+        rows = list(self.rows)
+        self.prepare(rows)
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+def assert_same_json(expected: list[dict], actual: list[dict]) -> None:
+    """Raise AssertionError unless both lists render to the same JSON bytes."""
+    renderer = JSONRenderer()
+    if renderer.render(expected) == renderer.render(actual):
+        return
+    for index, (left, right) in enumerate(zip(expected, actual)):
+        if renderer.render(left) != renderer.render(right):
+            raise AssertionError(f"Row {index} differs:\n  expected {left!r}\n  actual   {right!r}")
+    raise AssertionError(f"Row counts differ: expected {len(expected)}, got {len(actual)}.")
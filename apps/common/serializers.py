@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+
+class DirectUploadRequestSerializer(serializers.Serializer):
+    """File the client is about to upload straight to storage."""
+
+    name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+
+
+class DirectUploadConfirmSerializer(serializers.Serializer):
+    """Ticket returned when the upload was signed."""
+
+    ticket = serializers.CharField()
@@ -0,0 +1,28 @@
+"""
+Sparse fieldsets for list endpoints.
+
+`?fields=id,title,price_per_night` keeps only those top-level keys of each
+item, so clients that render a compact view (map pins, pickers) do not
+download the full cards. Names that an item does not have are ignored, and
+a missing or empty parameter returns items unchanged:
+
+    data = trim(serializer.data, requested_fields(request))
+"""
+from collections.abc import Iterable
+
+FIELDS_PARAM = "fields"
+
+
+def requested_fields(request) -> frozenset[str] | None:
+    """The field names asked for in `?fields=`, or None for all fields."""
+    params = getattr(request, "query_params", request.GET)
+    names = {name.strip() for value in params.getlist(FIELDS_PARAM) for name in value.split(",")}
+    names.discard("")
+    return frozenset(names) or None
+
+
+def trim(items: Iterable[dict], fields: frozenset[str] | None) -> list[dict]:
+    """`items` restricted to `fields` (all of them when None)."""
+    if fields is None:
+        return items if isinstance(items, list) else list(items)
+    return [{key: value for key, value in item.items() if key in fields} for item in items]
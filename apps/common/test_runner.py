@@ -0,0 +1,31 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    `manage.py test` with media on the local filesystem. The default
+    MediaCloudinaryStorage refuses to import without credentials, and tests
+    should never write to the real cloud account anyway.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._media_root = tempfile.mkdtemp(prefix="test-media-")
+        self._storage_override = override_settings(
+            STORAGES={
+                **settings.STORAGES,
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            },
+            MEDIA_ROOT=self._media_root,
+        )
+        self._storage_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._storage_override.disable()
+        shutil.rmtree(self._media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,241 @@
+"""
+Token-bucket rate limiting for public hot paths.
+
+A bucket holds up to `capacity` tokens and refills continuously at
+`capacity / period`; each request takes one token and is refused while the
+bucket is empty. Rates use DRF's notation ("120/min") and live in
+`REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`, keyed by scope. A scope without a
+rate (None) is not limited.
+
+Buckets are kept by a store:
+
+- `LocalTokenBucketStore` (default): sharded in-process dict, so limits are
+  per worker process.
+- `RedisTokenBucketStore`: one Lua script per request, shared by every
+  worker. Used when the `ratelimit` cache alias is on Redis. While Redis is
+  unreachable it falls back to per-process buckets rather than failing the
+  request.
+
+`RATELIMIT_STORE` (dotted path to a TokenBucketStore subclass) overrides
+the choice.
+
+`TokenBucketThrottle` is in DEFAULT_THROTTLE_CLASSES and limits views that
+declare a `throttle_scope`: a scope name, or a dict of action name -> scope
+for viewsets. Requests are keyed by user id when authenticated, else by
+client IP (DRF's `get_ident`, which honours NUM_PROXIES).
+`MessageThrottle` applies the same buckets to websocket messages.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from apps.common.cache import RATELIMIT
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+REDIS_KEY_PREFIX = "ratelimit:"
+
+
+def parse_rate(rate: str | None) -> tuple[int, int] | None:
+    """`"120/min"` -> `(120, 60)`: bucket capacity and the seconds it takes to refill."""
+    if rate is None:
+        return None
+    num, period = rate.split("/")
+    return int(num), PERIODS[period.strip()[0]]
+
+
+class TokenBucketStore:
+    """Atomic take-a-token operation over named buckets."""
+
+    def consume(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> tuple[bool, float]:
+        """
+        Take `cost` tokens from bucket `key` if it has them. Returns
+        `(allowed, wait)`: wait is the seconds until `cost` tokens are
+        available again (0 when allowed).
+        """
+        raise NotImplementedError
+
+    async def aconsume(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> tuple[bool, float]:
+        return await sync_to_async(self.consume, thread_sensitive=False)(key, capacity, refill_per_second, cost)
+
+
+class LocalTokenBucketStore(TokenBucketStore):
+    """
+    In-process buckets split across shards, each with its own lock, so
+    concurrent request threads rarely contend. Each shard keeps its
+    `max_keys_per_shard` most recently used buckets.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10_000):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def consume(self, key, capacity, refill_per_second, cost=1):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            state = buckets.pop(key, None)
+            if state is None:
+                tokens = capacity
+            else:
+                tokens, updated = state
+                tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / refill_per_second
+
+    async def aconsume(self, key, capacity, refill_per_second, cost=1):
+        # No I/O: cheaper to run inline than to hop to a thread.
+        return self.consume(key, capacity, refill_per_second, cost)
+
+
+class RedisTokenBucketStore(TokenBucketStore):
+    """
+    Buckets in Redis hashes, updated atomically by a Lua script; shared by all
+    workers. A Redis error or timeout falls back to a `LocalTokenBucketStore`
+    for that request, so an outage loosens limits to per-process instead of
+    failing every throttled request.
+    """
+
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+local updated = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+end
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+    # Seconds a call may wait on Redis before the local fallback is used.
+    SOCKET_TIMEOUT = 0.25
+    # Outages are logged at most this often per process.
+    WARN_INTERVAL = 60.0
+
+    def __init__(self, url: str | None = None):
+        import redis
+
+        url = url or settings.CACHES[RATELIMIT]["LOCATION"]
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=self.SOCKET_TIMEOUT,
+            socket_connect_timeout=self.SOCKET_TIMEOUT,
+        )
+        self._script = self._client.register_script(self.SCRIPT)
+        self._redis_error = redis.RedisError
+        self._fallback = LocalTokenBucketStore()
+        self._warned_at = float("-inf")
+
+    def consume(self, key, capacity, refill_per_second, cost=1):
+        try:
+            allowed, tokens = self._script(
+                keys=[f"{REDIS_KEY_PREFIX}{key}"],
+                args=[capacity, refill_per_second, time.time(), cost],
+            )
+        except self._redis_error as exc:
+            now = time.monotonic()
+            if now - self._warned_at >= self.WARN_INTERVAL:
+                self._warned_at = now
+                logger.warning("Rate limit store unavailable, using per-process buckets: %s", exc)
+            return self._fallback.consume(key, capacity, refill_per_second, cost)
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / refill_per_second
+
+
+@functools.cache
+def get_store() -> TokenBucketStore:
+    """The process-wide bucket store, created on first use."""
+    path = getattr(settings, "RATELIMIT_STORE", "")
+    if path:
+        return import_string(path)()
+    backend = settings.CACHES.get(RATELIMIT, {}).get("BACKEND", "")
+    if backend == "django.core.cache.backends.redis.RedisCache":
+        return RedisTokenBucketStore()
+    return LocalTokenBucketStore()
+
+
+def get_rate(scope: str) -> tuple[int, int] | None:
+    try:
+        rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+    except KeyError as exc:
+        raise ImproperlyConfigured(f"No throttle rate set for scope {scope!r}.") from exc
+    return parse_rate(rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Limits views declaring `throttle_scope` (a scope, or {action: scope})."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        if scope is None:
+            return True
+        rate = get_rate(scope)
+        if rate is None:
+            return True
+
+        capacity, period = rate
+        user = request.user
+        if user is not None and user.is_authenticated:
+            ident = f"user:{user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        allowed, self.wait_seconds = self.get_store().consume(f"{scope}:{ident}", capacity, capacity / period)
+        return allowed
+
+    def get_store(self) -> TokenBucketStore:
+        return get_store()
+
+    @staticmethod
+    def get_scope(view) -> str | None:
+        scope = getattr(view, "throttle_scope", None)
+        if isinstance(scope, dict):
+            return scope.get(getattr(view, "action", None))
+        return scope
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class MessageThrottle:
+    """Token bucket for messages received on a websocket, keyed by user id."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+
+    async def allow(self, user_id) -> tuple[bool, float]:
+        """`(allowed, wait)` for one message from `user_id`."""
+        rate = get_rate(self.scope)
+        if rate is None:
+            return True, 0.0
+        capacity, period = rate
+        return await get_store().aconsume(f"{self.scope}:user:{user_id}", capacity, capacity / period)
@@ -0,0 +1,449 @@
+"""
+Media upload backends, a bounded concurrent upload stage and signed
+direct-to-storage uploads.
+
+Views hand files to `upload_files`, which pushes them to the configured
+backend (`MEDIA_UPLOAD_BACKEND`) on a shared thread pool sized by
+`MEDIA_UPLOAD_CONCURRENCY`, so one request with many files no longer pays
+one storage round-trip per file in sequence. Each backend lists the
+exceptions it raises for storage and transport failures in `errors`.
+
+For direct uploads the API never sees the bytes: `issue_direct_upload`
+returns storage upload parameters signed for one server-chosen public_id
+plus a short-lived ticket, the client uploads straight to storage, and
+`confirm_direct_upload` checks the stored object against the policy.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.utils.module_loading import import_string
+
+from apps.common.profiling import span
+
+
+DIRECT_UPLOAD_SALT = "apps.common.uploads.direct"
+LOCAL_UPLOAD_SALT = "apps.common.uploads.local"
+
+# Storage format names for the MIME types the API accepts.
+MIME_FORMATS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "video/mp4": "mp4",
+    "video/webm": "webm",
+    "video/quicktime": "mov",
+    "application/pdf": "pdf",
+}
+
+
+@functools.cache
+def get_cloudinary():
+    """
+    The Cloudinary SDK, imported and configured on first use. Credentials come
+    from CLOUDINARY_STORAGE through cloudinary_storage, which raises
+    ImproperlyConfigured if they are missing.
+    """
+    import cloudinary
+    import cloudinary.api
+    import cloudinary.exceptions
+    import cloudinary.uploader
+    import cloudinary.utils
+    from cloudinary_storage import app_settings  # noqa: F401 - applies the credentials
+
+    return cloudinary
+
+
+class CloudinaryUploadBackend:
+    """Uploads through the Cloudinary API (production default)."""
+
+    @property
+    def errors(self) -> tuple[type[Exception], ...]:
+        """Storage and transport failures; the SDK reports network errors as cloudinary.exceptions.Error."""
+        return (get_cloudinary().exceptions.Error, OSError)
+
+    def upload(self, file, **options) -> dict:
+        return get_cloudinary().uploader.upload(file, **options)
+
+    def sign_upload(
+        self,
+        *,
+        public_id: str,
+        resource_type: str,
+        allowed_formats: list[str],
+        transformation: str = "",
+    ) -> dict:
+        """Signed parameters for a browser/mobile POST straight to Cloudinary."""
+        params = {
+            "public_id": public_id,
+            "timestamp": int(time.time()),
+            "allowed_formats": ",".join(allowed_formats),
+        }
+        if transformation:
+            params["transformation"] = transformation
+        cloudinary = get_cloudinary()
+        config = cloudinary.config()
+        params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params["api_key"] = config.api_key
+        return {
+            "method": "POST",
+            "upload_url": cloudinary.utils.cloudinary_api_url("upload", resource_type=resource_type),
+            "fields": params,
+        }
+
+    def fetch_upload(self, public_id: str, resource_type: str) -> dict | None:
+        cloudinary = get_cloudinary()
+        try:
+            return cloudinary.api.resource(public_id, resource_type=resource_type)
+        except cloudinary.api.NotFound:
+            return None
+
+    def delete(self, public_id: str, resource_type: str) -> None:
+        get_cloudinary().uploader.destroy(public_id, resource_type=resource_type, invalidate=True)
+
+    def upload_chunk(
+        self,
+        *,
+        upload_id: str,
+        public_id: str,
+        resource_type: str,
+        file_name: str,
+        chunks: Iterable[bytes],
+        start: int,
+        total: int,
+    ) -> dict | None:
+        """
+        Forward one part of a chunked upload (Cloudinary's Content-Range
+        protocol; every part but the last must be at least 5 MB). Returns
+        the upload result once the final byte is in, else None.
+        """
+        data = b"".join(chunks)
+        end = start + len(data)
+        result = get_cloudinary().uploader.upload_large_part(
+            (file_name, data),
+            public_id=public_id,
+            resource_type=resource_type,
+            http_headers={
+                "Content-Range": f"bytes {start}-{end - 1}/{total}",
+                "X-Unique-Upload-Id": upload_id,
+            },
+        )
+        return result if end >= total else None
+
+    def abort_chunked(self, upload_id: str) -> None:
+        # Cloudinary discards unfinished chunked uploads on its own.
+        return None
+
+
+class LocalUploadBackend:
+    """
+    Writes uploads under a local directory and returns Cloudinary-shaped
+    results. Stand-in for offline development and benchmarks; `latency`
+    simulates the storage round-trip.
+    """
+
+    errors: tuple[type[Exception], ...] = (OSError,)
+
+    def __init__(
+        self,
+        root: str | os.PathLike | None = None,
+        base_url: str | None = None,
+        latency: float = 0.0,
+    ):
+        self.root = Path(root or getattr(settings, "MEDIA_UPLOAD_LOCAL_ROOT", settings.BASE_DIR / "local_uploads"))
+        self.base_url = (base_url or f"{settings.BACKEND_BASE_URL}{settings.MEDIA_URL}").rstrip("/")
+        self.latency = latency
+
+    def upload(self, file, *, folder: str = "", resource_type: str = "auto", public_id: str = "", **options) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+
+        extension = Path(getattr(file, "name", "") or "").suffix.lower()
+        public_id = public_id or f"{folder.strip('/')}/{uuid.uuid4().hex}".strip("/")
+        for stale in self.root.glob(f"{public_id}.*"):
+            stale.unlink()
+        target = self.root / f"{public_id}{extension}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        size = 0
+        with open(target, "wb") as out:
+            chunks = file.chunks() if hasattr(file, "chunks") else iter(lambda: file.read(64 * 1024), b"")
+            for chunk in chunks:
+                out.write(chunk)
+                size += len(chunk)
+
+        return {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "bytes": size,
+            "secure_url": f"{self.base_url}/{public_id}{extension}",
+        }
+
+    def sign_upload(
+        self,
+        *,
+        public_id: str,
+        resource_type: str,
+        allowed_formats: list[str],
+        transformation: str = "",
+    ) -> dict:
+        """Upload target is the local receiver view (`/api/v1/uploads/local/`)."""
+        token = signing.dumps(
+            {"public_id": public_id, "resource_type": resource_type},
+            salt=LOCAL_UPLOAD_SALT,
+        )
+        return {
+            "method": "POST",
+            "upload_url": f"{settings.BACKEND_BASE_URL}/api/v1/uploads/local/",
+            "fields": {"token": token},
+        }
+
+    def fetch_upload(self, public_id: str, resource_type: str) -> dict | None:
+        matches = sorted(self.root.glob(f"{public_id}.*")) or sorted(self.root.glob(public_id))
+        if not matches:
+            return None
+        path = matches[0]
+        return {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "format": path.suffix.lstrip("."),
+            "bytes": path.stat().st_size,
+            "secure_url": f"{self.base_url}/{path.relative_to(self.root).as_posix()}",
+        }
+
+    def delete(self, public_id: str, resource_type: str) -> None:
+        for path in self.root.glob(f"{public_id}.*"):
+            path.unlink()
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.root / "_chunked" / f"{upload_id}.part"
+
+    def upload_chunk(
+        self,
+        *,
+        upload_id: str,
+        public_id: str,
+        resource_type: str,
+        file_name: str,
+        chunks: Iterable[bytes],
+        start: int,
+        total: int,
+    ) -> dict | None:
+        """Append to a part file at `start`; move it into place when complete."""
+        part = self._part_path(upload_id)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        with open(part, "r+b" if part.exists() else "wb") as out:
+            out.seek(start)
+            out.truncate()
+            for chunk in chunks:
+                out.write(chunk)
+            end = out.tell()
+
+        if end < total:
+            return None
+
+        extension = Path(file_name).suffix.lower()
+        target = self.root / f"{public_id}{extension}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        part.replace(target)
+        return {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "bytes": end,
+            "secure_url": f"{self.base_url}/{public_id}{extension}",
+        }
+
+    def abort_chunked(self, upload_id: str) -> None:
+        self._part_path(upload_id).unlink(missing_ok=True)
+
+
+@dataclass
+class UploadOutcome:
+    """Result of one file in a batch; exactly one of `result`/`error` is set."""
+
+    index: int
+    file: object
+    result: dict | None = None
+    error: Exception | None = None
+
+
+_backend = None
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_upload_backend():
+    """Process-wide backend instance from `MEDIA_UPLOAD_BACKEND`."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                path = getattr(settings, "MEDIA_UPLOAD_BACKEND", "apps.common.uploads.CloudinaryUploadBackend")
+                _backend = import_string(path)()
+    return _backend
+
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    """Shared pool so concurrent requests together stay within the configured bound."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "MEDIA_UPLOAD_CONCURRENCY", 4),
+                    thread_name_prefix="media-upload",
+                )
+    return _executor
+
+
+def upload_files(
+    files: Iterable[tuple[int, object]],
+    *,
+    backend=None,
+    executor: ThreadPoolExecutor | None = None,
+    **options,
+) -> Iterator[UploadOutcome]:
+    """
+    Upload `(index, file)` pairs concurrently and yield an UploadOutcome per
+    file as each one finishes. Callers needing input order sort by `index`.
+    """
+    backend = backend or get_upload_backend()
+    executor = executor or get_upload_executor()
+
+    def upload(file):
+        with span("storage", "upload"):
+            return backend.upload(file, **options)
+
+    # Each upload runs in a copy of the caller's context, so it is part of the request's profile.
+    futures = {
+        executor.submit(contextvars.copy_context().run, upload, file): (index, file)
+        for index, file in files
+    }
+    for future in as_completed(futures):
+        index, file = futures[future]
+        try:
+            yield UploadOutcome(index=index, file=file, result=future.result())
+        except Exception as exc:
+            yield UploadOutcome(index=index, file=file, error=exc)
+
+
+@dataclass(frozen=True)
+class DirectUploadPolicy:
+    """What a direct upload for one purpose may contain and where it lands."""
+
+    purpose: str
+    folder: str
+    allowed_types: frozenset[str]
+    max_bytes: int
+    transformation: str = ""
+
+    @property
+    def max_megabytes(self) -> int:
+        return self.max_bytes // (1024 * 1024)
+
+    def validate(self, content_type: str, size: int) -> str | None:
+        if content_type not in self.allowed_types:
+            return f"Unsupported file type '{content_type}'."
+        if size > self.max_bytes:
+            return f"File exceeds the {self.max_megabytes} MB limit."
+        return None
+
+
+def _resource_type_for(content_type: str) -> str:
+    return "video" if content_type.startswith("video/") else "image"
+
+
+def issue_direct_upload(
+    user,
+    policy: DirectUploadPolicy,
+    *,
+    name: str,
+    content_type: str,
+    size: int,
+    context: dict | None = None,
+) -> tuple[dict | None, str | None]:
+    """
+    Sign a direct upload for `user`. Returns (upload, error) where upload has
+    the storage `upload_url`/`fields` and the `ticket` to send to confirm.
+    """
+    error = policy.validate(content_type, size)
+    if error:
+        return None, error
+
+    public_id = f"{policy.folder}/{uuid.uuid4().hex}"
+    resource_type = _resource_type_for(content_type)
+    allowed_formats = sorted({MIME_FORMATS[mime] for mime in policy.allowed_types if mime in MIME_FORMATS})
+    upload = get_upload_backend().sign_upload(
+        public_id=public_id,
+        resource_type=resource_type,
+        allowed_formats=allowed_formats,
+        transformation=policy.transformation,
+    )
+    ticket = signing.dumps(
+        {
+            "user": str(user.pk),
+            "purpose": policy.purpose,
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "name": name,
+            "content_type": content_type,
+            "context": context or {},
+        },
+        salt=DIRECT_UPLOAD_SALT,
+    )
+    expires_in = getattr(settings, "DIRECT_UPLOAD_TICKET_SECONDS", 15 * 60)
+    return {**upload, "ticket": ticket, "expires_in": expires_in, "max_bytes": policy.max_bytes}, None
+
+
+def confirm_direct_upload(
+    user,
+    policy: DirectUploadPolicy,
+    ticket: str,
+    *,
+    context: dict | None = None,
+) -> tuple[dict | None, str | None]:
+    """
+    Validate a ticket and the object it points at. Returns (upload, error);
+    upload is the storage result plus the `name` and `content_type` the
+    client declared when signing. Oversized objects are deleted.
+    """
+    try:
+        data = signing.loads(
+            ticket,
+            salt=DIRECT_UPLOAD_SALT,
+            max_age=getattr(settings, "DIRECT_UPLOAD_TICKET_SECONDS", 15 * 60),
+        )
+    except signing.SignatureExpired:
+        return None, "Upload ticket has expired. Request a new upload."
+    except signing.BadSignature:
+        return None, "Invalid upload ticket."
+
+    if (
+        data.get("user") != str(user.pk)
+        or data.get("purpose") != policy.purpose
+        or data.get("context") != (context or {})
+    ):
+        return None, "Invalid upload ticket."
+
+    backend = get_upload_backend()
+    with span("storage", "fetch_upload"):
+        result = backend.fetch_upload(data["public_id"], data["resource_type"])
+    if result is None:
+        return None, "Upload not found. Upload the file before confirming."
+
+    if int(result.get("bytes") or 0) > policy.max_bytes:
+        backend.delete(data["public_id"], data["resource_type"])
+        return None, f"File exceeds the {policy.max_megabytes} MB limit."
+
+    return {**result, "name": data["name"], "content_type": data["content_type"]}, None
@@ -1,13 +1,7 @@
 """
 Common utility functions for the project.
 """
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables once
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-load_dotenv(BASE_DIR / ".env")
+from config.env import django_env
 
 
 def get_django_env() -> str:
@@ -17,8 +11,7 @@ def get_django_env() -> str:
     Returns:
         str: 'production' or 'development' (defaults to 'development')
     """
-    env = os.getenv("DJANGO_ENV", "development").lower().strip()
-    return "production" if env in {"production", "prod"} else "development"
+    return django_env()
 
 
 def is_production() -> bool:
@@ -1,21 +1,109 @@
+import json
 import uuid
 
-import cloudinary.uploader
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 
+from apps.common.conditional import Validators, conditional_get_enabled, latest, start_of_today
+from apps.common.row_serializers import row_serializers_enabled
+from apps.common.serializers import DirectUploadRequestSerializer
+from apps.common.sparse_fields import requested_fields, trim
+from apps.common.uploads import (
+    DirectUploadPolicy,
+    confirm_direct_upload,
+    get_upload_executor,
+    issue_direct_upload,
+)
+from apps.listings.images import process_listing_images
 from apps.listings.models import Listing
 from apps.listings.serializers import (
+    ListingListRowSerializer,
     ListingListSerializer,
     ListingDetailSerializer,
     ListingCreateUpdateSerializer,
 )
 
 
+LISTING_IMAGE_UPLOAD = DirectUploadPolicy(
+    purpose="listing_image",
+    folder="wanderleaf/listings",
+    allowed_types=frozenset({"image/jpeg", "image/png", "image/webp", "image/gif"}),
+    max_bytes=10 * 1024 * 1024,  # 10 MB
+    transformation="c_limit,h_800,q_auto,w_1200",
+)
+MAX_IMAGES_PER_UPLOAD = 10
+
+
+IMAGE_VARIANT_KEYS = ("url", "card_url", "thumb_url", "width", "height", "blurhash")
+
+
+def _record_upload_outcome(outcome, results_by_index: dict[int, dict], errors_by_index: dict[int, str]) -> None:
+    if outcome.error is not None:
+        errors_by_index[outcome.index] = (
+            f"File {outcome.index + 1} ({outcome.file.name}): upload failed — {str(outcome.error)}"
+        )
+    else:
+        results_by_index[outcome.index] = outcome.result
+
+
+def _upload_summary(results_by_index: dict[int, dict], errors_by_index: dict[int, str]) -> dict:
+    results = [results_by_index[i] for i in sorted(results_by_index)]
+    return {
+        "urls": [result["secure_url"] for result in results],
+        "uploaded": len(results),
+        "errors": [errors_by_index[i] for i in sorted(errors_by_index)],
+        "images": [{key: result[key] for key in IMAGE_VARIANT_KEYS} for result in results],
+    }
+
+
+async def _stream_upload_progress(files, errors_by_index: dict[int, str], outcomes):
+    """
+    Yield NDJSON progress lines for upload_images, then the usual summary.
+
+    An async iterator, so the ASGI handler sends each line as soon as its
+    file finishes (it would buffer a sync iterator to the end). Outcomes are
+    pulled one at a time on the request's sync thread, where
+    `process_listing_images` also does its database work.
+    """
+    total = len(files)
+    completed = 0
+    for i in sorted(errors_by_index):
+        completed += 1
+        yield json.dumps({
+            "event": "progress", "index": i, "file": files[i].name, "status": "rejected",
+            "error": errors_by_index[i], "completed": completed, "total": total,
+        }) + "\n"
+
+    results_by_index: dict[int, dict] = {}
+    next_outcome = sync_to_async(next)
+    outcomes = iter(outcomes)
+    while (outcome := await next_outcome(outcomes, None)) is not None:
+        _record_upload_outcome(outcome, results_by_index, errors_by_index)
+        completed += 1
+        event = {
+            "event": "progress", "index": outcome.index, "file": outcome.file.name,
+            "completed": completed, "total": total,
+        }
+        if outcome.error is not None:
+            event.update(status="failed", error=errors_by_index[outcome.index])
+        else:
+            result = results_by_index[outcome.index]
+            event.update(
+                status="uploaded",
+                url=result["secure_url"],
+                image={key: result[key] for key in IMAGE_VARIANT_KEYS},
+            )
+        yield json.dumps(event) + "\n"
+
+    yield json.dumps({"event": "done", **_upload_summary(results_by_index, errors_by_index)}) + "\n"
+
+
 class FuzzySearchFilter(filters.SearchFilter):
     """
     Splits the search query by commas into separate terms, then matches
@@ -88,6 +176,7 @@ class ListingViewSet(viewsets.ModelViewSet):
     search_fields = ["title", "location", "description", "category"]
     ordering_fields = ["price_per_night", "created_at", "bedrooms", "max_guests"]
     ordering = ["-created_at"]
+    throttle_scope = {"list": "listings.search", "host_listings": "listings.search"}
 
     def get_queryset(self):
         qs = Listing.objects.select_related("host").all()
@@ -134,6 +223,86 @@ class ListingViewSet(viewsets.ModelViewSet):
             raise NotFound(detail="Listing not found.")
         return super().get_object()
 
+    def list(self, request, *args, **kwargs):
+        qs = self.filter_queryset(self.get_queryset())
+        validators = self._list_validators(request, qs)
+        if validators is not None:
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+        response = self._list_response(qs)
+        return validators.apply(response) if validators is not None else response
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self._detail_validators(request)
+        if validators is not None:
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        return validators.apply(response) if validators is not None else response
+
+    def _list_validators(self, request, qs) -> Validators | None:
+        """From the matching listings and their hosts (name, avatar on the cards)."""
+        if not conditional_get_enabled():
+            return None
+        summary = qs.aggregate(
+            count=Count("id"),
+            changed=Max("updated_at"),
+            hosts_changed=Max("host__updated_at"),
+        )
+        return Validators.for_request(
+            request,
+            summary["count"],
+            summary["changed"],
+            summary["hosts_changed"],
+            last_modified=latest(summary["changed"], summary["hosts_changed"]),
+        )
+
+    def _detail_validators(self, request) -> Validators | None:
+        """
+        From the listing, its host and its bookings (the booked-dates
+        calendar, which also moves on with today's date). Review changes
+        touch the listing's cached rating, so they are covered too.
+        """
+        if not conditional_get_enabled():
+            return None
+        try:
+            pk = uuid.UUID(str(self.kwargs.get("pk", "")))
+        except ValueError:
+            return None
+        summary = self.get_queryset().filter(pk=pk).aggregate(
+            found=Count("id", distinct=True),
+            changed=Max("updated_at"),
+            host_changed=Max("host__updated_at"),
+            booking_count=Count("bookings"),
+            bookings_changed=Max("bookings__updated_at"),
+        )
+        if not summary["found"]:
+            return None
+        today = start_of_today()
+        return Validators.for_request(
+            request,
+            summary,
+            today,
+            last_modified=latest(summary["changed"], summary["host_changed"], summary["bookings_changed"], today),
+        )
+
+    def _list_response(self, qs):
+        """Paginated list-card response (`?fields=` trims the cards); uses the `.values()` fast path when enabled."""
+        context = self.get_serializer_context()
+        if row_serializers_enabled():
+            rows = ListingListRowSerializer.queryset(qs)
+            page = self.paginate_queryset(rows)
+            data = ListingListRowSerializer(rows if page is None else page, context=context).data
+        else:
+            page = self.paginate_queryset(qs)
+            data = ListingListSerializer(qs if page is None else page, many=True, context=context).data
+        data = trim(data, requested_fields(self.request))
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
 
@@ -164,12 +333,7 @@ class ListingViewSet(viewsets.ModelViewSet):
         Returns all listings owned by the current user (including inactive).
         """
         qs = Listing.objects.filter(host=request.user).order_by("-created_at")
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = ListingListSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
-        serializer = ListingListSerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._list_response(qs)
 
     @action(
         detail=False,
@@ -181,10 +345,16 @@ class ListingViewSet(viewsets.ModelViewSet):
     def upload_images(self, request):
         """
         POST /api/v1/listings/upload-images/
-        Accepts multipart file uploads, pushes each to Cloudinary,
-        and returns a list of secure URLs.
+        Accepts multipart file uploads, decodes and resizes them into full,
+        card and thumb variants on the image pipeline, uploads them
+        concurrently, and returns the full-size secure URLs in upload order
+        (`images` carries the variant URLs, dimensions and blurhash).
 
         Send files as 'images' (multiple files) in multipart/form-data.
+        Add ?stream=true to receive newline-delimited JSON progress events
+        (one per file as it finishes) followed by the summary. Lines are
+        sent as they happen under ASGI (serve.py); a WSGI server sends them
+        all at the end.
         """
         files = request.FILES.getlist("images")
         if not files:
@@ -193,38 +363,135 @@ class ListingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if len(files) > 10:
+        if len(files) > MAX_IMAGES_PER_UPLOAD:
             return Response(
                 {"detail": "Maximum 10 images allowed per upload."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        allowed_types = {"image/jpeg", "image/png", "image/webp", "image/gif"}
-        max_size = 10 * 1024 * 1024  # 10 MB
+        allowed_types = LISTING_IMAGE_UPLOAD.allowed_types
+        max_size = LISTING_IMAGE_UPLOAD.max_bytes
 
-        urls = []
-        errors = []
+        errors_by_index: dict[int, str] = {}
+        valid_files = []
 
         for i, f in enumerate(files):
             if f.content_type not in allowed_types:
-                errors.append(f"File {i + 1} ({f.name}): unsupported type '{f.content_type}'.")
+                errors_by_index[i] = f"File {i + 1} ({f.name}): unsupported type '{f.content_type}'."
                 continue
             if f.size > max_size:
-                errors.append(f"File {i + 1} ({f.name}): exceeds 10 MB limit.")
+                errors_by_index[i] = f"File {i + 1} ({f.name}): exceeds 10 MB limit."
                 continue
+            valid_files.append((i, f))
 
-            try:
-                result = cloudinary.uploader.upload(
-                    f,
-                    folder="wanderleaf/listings",
-                    resource_type="image",
-                    transformation=[
-                        {"width": 1200, "height": 800, "crop": "limit", "quality": "auto"},
-                    ],
-                )
-                urls.append(result["secure_url"])
-            except Exception as e:
-                errors.append(f"File {i + 1} ({f.name}): upload failed — {str(e)}")
+        outcomes = process_listing_images(valid_files, request.user)
+
+        if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+            return StreamingHttpResponse(
+                _stream_upload_progress(files, errors_by_index, outcomes),
+                content_type="application/x-ndjson",
+            )
+
+        results_by_index: dict[int, dict] = {}
+        for outcome in outcomes:
+            _record_upload_outcome(outcome, results_by_index, errors_by_index)
+
+        summary = _upload_summary(results_by_index, errors_by_index)
+        return Response(
+            summary,
+            status=status.HTTP_200_OK if summary["urls"] else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="upload-images/direct",
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def upload_images_direct(self, request):
+        """
+        POST /api/v1/listings/upload-images/direct/
+        Signs direct-to-storage uploads so image bytes never pass through the API.
+
+        Request: {"files": [{"name": "a.jpg", "content_type": "image/jpeg", "size": 12345}, ...]}
+        Response: {"uploads": [{"index", "method", "upload_url", "fields", "ticket", ...}], "errors": [...]}
+
+        Upload each file to its `upload_url` with `fields` plus the file as
+        `file`, then POST the tickets to upload-images/direct/confirm/.
+        """
+        files = request.data.get("files")
+        if not isinstance(files, list) or not files:
+            return Response(
+                {"detail": "Provide 'files' as a non-empty list of {name, content_type, size}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(files) > MAX_IMAGES_PER_UPLOAD:
+            return Response(
+                {"detail": "Maximum 10 images allowed per upload."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = DirectUploadRequestSerializer(data=files, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        uploads = []
+        errors = []
+        for i, f in enumerate(serializer.validated_data):
+            upload, error = issue_direct_upload(
+                request.user,
+                LISTING_IMAGE_UPLOAD,
+                name=f["name"],
+                content_type=f["content_type"],
+                size=f["size"],
+            )
+            if error:
+                errors.append(f"File {i + 1} ({f['name']}): {error}")
+                continue
+            uploads.append({"index": i, **upload})
+
+        return Response(
+            {"uploads": uploads, "errors": errors},
+            status=status.HTTP_200_OK if uploads else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="upload-images/direct/confirm",
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def confirm_upload_images_direct(self, request):
+        """
+        POST /api/v1/listings/upload-images/direct/confirm/
+        Verifies directly uploaded images and returns their URLs in ticket
+        order, in the same shape as upload-images/.
+
+        Request: {"tickets": ["...", ...]}
+        """
+        tickets = request.data.get("tickets")
+        if not isinstance(tickets, list) or not tickets:
+            return Response(
+                {"detail": "Provide 'tickets' as a non-empty list."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(tickets) > MAX_IMAGES_PER_UPLOAD:
+            return Response(
+                {"detail": "Maximum 10 images allowed per upload."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = get_upload_executor().map(
+            lambda ticket: confirm_direct_upload(request.user, LISTING_IMAGE_UPLOAD, str(ticket)),
+            tickets,
+        )
+
+        urls = []
+        errors = []
+        for i, (upload, error) in enumerate(results):
+            if error:
+                errors.append(f"File {i + 1}: {error}")
+                continue
+            urls.append(upload["secure_url"])
 
         return Response(
             {
@@ -254,9 +521,4 @@ class ListingViewSet(viewsets.ModelViewSet):
             .filter(host_id=host_uuid, is_active=True)
             .order_by("-created_at")
         )
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = ListingListSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
-        serializer = ListingListSerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._list_response(qs)
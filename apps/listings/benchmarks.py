@@ -0,0 +1,182 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.common.benchmarks import register, timed
+from apps.common.row_serializers import assert_same_json
+from apps.common.uploads import LocalUploadBackend, upload_files
+from apps.listings.models import Listing, ListingImage
+from apps.listings.serializers import ListingListRowSerializer, ListingListSerializer
+from apps.users.models import User
+
+
+FILES_PER_REQUEST = 10
+SIMULATED_LATENCY = 0.05
+PAGE_ROWS = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+@register("listings.upload_images", "Upload 10 listing photos: sequential vs concurrent upload stage")
+def upload_images(iterations: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as root:
+        backend = LocalUploadBackend(root=root, base_url="http://localhost/media", latency=SIMULATED_LATENCY)
+        executor = ThreadPoolExecutor(max_workers=4)
+
+        def make_files():
+            return [
+                (i, SimpleUploadedFile(f"photo{i}.jpg", b"\xff\xd8" + b"\0" * 200_000, content_type="image/jpeg"))
+                for i in range(FILES_PER_REQUEST)
+            ]
+
+        def sequential():
+            for _, f in make_files():
+                backend.upload(f, folder="bench")
+
+        def concurrent():
+            list(upload_files(make_files(), backend=backend, executor=executor, folder="bench"))
+
+        try:
+            return {
+                "sequential": timed(sequential, iterations),
+                "concurrent (4 workers)": timed(concurrent, iterations),
+            }
+        finally:
+            executor.shutdown()
+
+
+@register("listings.row_serializers", "Serialize a 1,000-listing page: ListingListSerializer vs .values() fast path")
+def row_serializers(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            hosts = [
+                User.objects.create_user(
+                    email=f"bench-host-{i}@example.com",
+                    username=f"bench-host-{i}",
+                    password=None,
+                    avatar=f"avatars/bench-host-{i}.jpg" if i % 2 else "",
+                )
+                for i in range(10)
+            ]
+            ListingImage.objects.create(
+                phash="0" * 16,
+                full_url="https://res.cloudinary.com/demo/image/upload/v1/full-0.webp",
+                card_url="https://res.cloudinary.com/demo/image/upload/v1/card-0.webp",
+                thumb_url="https://res.cloudinary.com/demo/image/upload/v1/thumb-0.webp",
+                width=1200,
+                height=800,
+            )
+            Listing.objects.bulk_create([
+                Listing(
+                    host=hosts[i % len(hosts)],
+                    title=f"Listing {i}",
+                    description="",
+                    location="Manali",
+                    category="cabins",
+                    price_per_night=Decimal("1500.5") + i,
+                    bathrooms=Decimal("1.5"),
+                    amenities=["WiFi", "Kitchen"],
+                    images=[
+                        "https://res.cloudinary.com/demo/image/upload/v1/full-0.webp",
+                        f"https://res.cloudinary.com/demo/image/upload/v1/listing-{i}.jpg",
+                    ],
+                    latitude=Decimal("32.2396") if i % 3 else None,
+                    longitude=Decimal("77.1887") if i % 3 else None,
+                    average_rating=Decimal("4.25"),
+                    review_count=i,
+                )
+                for i in range(PAGE_ROWS)
+            ])
+            queryset = Listing.objects.select_related("host").order_by("-created_at")
+            request = RequestFactory().get("/api/v1/listings/")
+
+            def model_serializer():
+                return ListingListSerializer(queryset, many=True, context={"request": request}).data
+
+            def row_serializer():
+                rows = ListingListRowSerializer.queryset(queryset)
+                return ListingListRowSerializer(rows, context={"request": request}).data
+
+            assert_same_json(model_serializer(), row_serializer())
+            results["ListingListSerializer"] = timed(model_serializer, iterations)
+            results["ListingListRowSerializer"] = timed(row_serializer, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+@register("listings.conditional_get", "GET a listing detail and its reviews page: full response vs revalidated 304")
+def conditional_get(iterations: int) -> dict[str, float]:
+    from datetime import date, timedelta
+
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory
+
+    from apps.bookings.models import Booking
+    from apps.listings.api.views import ListingViewSet
+    from apps.reviews.api.views import ReviewListCreateView
+    from apps.reviews.models import Review
+
+    results: dict[str, float] = {}
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+            host = User.objects.create_user(
+                email="bench-cond-host@example.com", username="bench-cond-host", password=None
+            )
+            listing = Listing.objects.create(
+                host=host,
+                title="Conditional GET cabin",
+                description="A cabin. " * 50,
+                location="Manali",
+                price_per_night=Decimal("2500"),
+                amenities=["WiFi", "Kitchen"],
+            )
+            for i in range(20):
+                guest = User.objects.create_user(
+                    email=f"bench-cond-guest-{i}@example.com", username=f"bench-cond-guest-{i}", password=None
+                )
+                check_in = date.today() + timedelta(days=3 * i)
+                booking = Booking.objects.create(
+                    listing=listing,
+                    guest=guest,
+                    check_in=check_in,
+                    check_out=check_in + timedelta(days=2),
+                    total_price=Decimal("5600"),
+                    status=Booking.Status.CONFIRMED,
+                )
+                Review.objects.create(
+                    booking=booking, listing=listing, author=guest, rating=4 + i % 2, comment="Lovely stay."
+                )
+
+            factory = APIRequestFactory()
+            detail = ListingViewSet.as_view({"get": "retrieve"})
+            reviews = ReviewListCreateView.as_view()
+            detail_url = f"/api/v1/listings/{listing.pk}/"
+            reviews_query = {"listing": str(listing.pk), "limit": 20}
+            endpoints = {
+                "detail": lambda **headers: detail(factory.get(detail_url, **headers), pk=str(listing.pk)),
+                "reviews": lambda **headers: reviews(factory.get("/api/v1/reviews/", reviews_query, **headers)),
+            }
+            for name, get in endpoints.items():
+                etag = get().render()["ETag"]
+
+                def full(get=get):
+                    assert get().render().status_code == 200
+
+                def revalidated(get=get, etag=etag):
+                    assert get(HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+                results[f"{name}: full"] = timed(full, iterations)
+                results[f"{name}: 304"] = timed(revalidated, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
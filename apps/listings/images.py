@@ -0,0 +1,313 @@
+"""
+Listing photo pipeline: decode, resize into responsive variants, hash and
+upload.
+
+Each file is decoded with Pillow (the bytes decide whether it is an image,
+not the declared content type), EXIF-rotated and rendered as full, card and
+thumb WebP variants, together with its dimensions, a blurhash placeholder,
+a SHA-256 of the decoded pixels and a 64-bit difference hash. CPU work runs
+on a worker pool (`IMAGE_PIPELINE_WORKERS`); uploads go through the shared
+upload stage. Re-uploads of a photo the same host already uploaded (same
+pixels, whatever the file name or container) reuse the stored variants
+instead of uploading again. The difference hash is kept as a similarity hint
+only: distinct shots of the same room can share it.
+"""
+import hashlib
+import io
+import math
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from apps.common.uploads import UploadOutcome, upload_files
+from apps.listings.models import ListingImage
+
+
+LISTING_IMAGE_FOLDER = "wanderleaf/listings"
+ALLOWED_IMAGE_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+# name -> bounding box; images are only ever scaled down.
+VARIANTS = {
+    "full": (1200, 800),
+    "card": (640, 427),
+    "thumb": (240, 160),
+}
+WEBP_QUALITY = 80
+CARD_TRANSFORMATION = "c_limit,w_640,h_427,q_auto,f_auto"
+
+
+class InvalidImage(ValueError):
+    """The upload could not be decoded as a supported image."""
+
+
+@dataclass
+class PreparedImage:
+    content_hash: str
+    phash: str
+    width: int
+    height: int
+    blurhash: str
+    variants: dict[str, bytes]
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_image_executor() -> ThreadPoolExecutor:
+    """Pool for decode/resize/encode; Pillow releases the GIL for that work."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "IMAGE_PIPELINE_WORKERS", None) or os.cpu_count() or 2,
+                    thread_name_prefix="image-pipeline",
+                )
+    return _executor
+
+
+def _decode(file) -> Image.Image:
+    file.seek(0)
+    try:
+        with Image.open(file) as probe:
+            probe.verify()
+        file.seek(0)
+        image = Image.open(file)
+        if image.format not in ALLOWED_IMAGE_FORMATS:
+            raise InvalidImage(f"Unsupported image format '{image.format}'.")
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        raise InvalidImage("Not a valid JPEG, PNG, WebP or GIF image.") from exc
+    finally:
+        file.seek(0)
+
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def content_hash(image: Image.Image) -> str:
+    """SHA-256 of the decoded, EXIF-rotated pixels together with their mode and size."""
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def difference_hash(image: Image.Image) -> str:
+    """64-bit dHash: row-wise brightness gradients of a 9x8 grayscale thumbnail."""
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return f"{value:016x}"
+
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode83(value: int, length: int) -> str:
+    return "".join(_BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def encode_blurhash(image: Image.Image, x_components: int = 4, y_components: int = 3) -> str:
+    """Blurhash (https://blurha.sh) computed on a 32x32 downsample."""
+    size = 32
+    rgb = image.convert("RGB").resize((size, size), Image.Resampling.BILINEAR)
+    linear = [tuple(_srgb_to_linear(c) for c in px) for px in rgb.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / size) for x in range(size)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / size) for y in range(size)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(size):
+                row_basis = cos_y[j][y]
+                row = y * size
+                for x in range(size):
+                    basis = row_basis * cos_x[i][x]
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (size * size)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1.0
+    result += _encode83(quantised_max, 1)
+    result += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4,
+    )
+
+    def quantise(v: float) -> int:
+        signed = math.copysign(abs(v / max_value) ** 0.5, v)
+        return max(0, min(18, int(signed * 9 + 9.5)))
+
+    for r, g, b in ac:
+        result += _encode83(quantise(r) * 19 * 19 + quantise(g) * 19 + quantise(b), 2)
+    return result
+
+
+def prepare_image(file) -> PreparedImage:
+    """Decode one upload and render every variant (runs on the image pool)."""
+    image = _decode(file)
+
+    variants: dict[str, bytes] = {}
+    full_size = image.size
+    for name, box in VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail(box, Image.Resampling.LANCZOS)
+        if name == "full":
+            full_size = variant.size
+        buffer = io.BytesIO()
+        variant.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        variants[name] = buffer.getvalue()
+
+    return PreparedImage(
+        content_hash=content_hash(image),
+        phash=difference_hash(image),
+        width=full_size[0],
+        height=full_size[1],
+        blurhash=encode_blurhash(image),
+        variants=variants,
+    )
+
+
+def _outcome_result(listing_image: ListingImage) -> dict:
+    return {**listing_image.as_variants(), "secure_url": listing_image.full_url}
+
+
+def process_listing_images(
+    files: Iterable[tuple[int, object]],
+    user,
+) -> Iterator[UploadOutcome]:
+    """
+    Run `(index, file)` pairs through the pipeline and yield an UploadOutcome
+    per file (result holds `secure_url` plus the variant URLs and metadata),
+    in completion order.
+    """
+    files = list(files)
+    executor = get_image_executor()
+    futures = {executor.submit(prepare_image, file): (index, file) for index, file in files}
+
+    prepared: dict[int, tuple[object, PreparedImage]] = {}
+    for future in as_completed(futures):
+        index, file = futures[future]
+        try:
+            prepared[index] = (file, future.result())
+        except Exception as exc:
+            yield UploadOutcome(index=index, file=file, error=exc)
+
+    known = {
+        image.content_hash: image
+        for image in ListingImage.objects.filter(
+            uploaded_by=user,
+            content_hash__in={p.content_hash for _, p in prepared.values()},
+        ).order_by("created_at")
+    }
+
+    to_upload: dict[str, list[int]] = {}
+    for index in sorted(prepared):
+        file, image = prepared[index]
+        if image.content_hash in known:
+            yield UploadOutcome(index=index, file=file, result=_outcome_result(known[image.content_hash]))
+        else:
+            # Identical photos within one batch are uploaded once.
+            to_upload.setdefault(image.content_hash, []).append(index)
+
+    jobs = []
+    for digest, indexes in to_upload.items():
+        _, image = prepared[indexes[0]]
+        for name, data in image.variants.items():
+            jobs.append(((digest, name), ContentFile(data, name=f"{name}.webp")))
+
+    uploaded: dict[str, dict[str, str]] = {}
+    failed: set[str] = set()
+    for outcome in upload_files(
+        [(key, content) for key, content in jobs],
+        folder=LISTING_IMAGE_FOLDER,
+        resource_type="image",
+    ):
+        digest, name = outcome.index
+        if digest in failed:
+            continue
+        indexes = to_upload[digest]
+        if outcome.error is not None:
+            failed.add(digest)
+            for index in indexes:
+                yield UploadOutcome(index=index, file=prepared[index][0], error=outcome.error)
+            continue
+
+        uploaded.setdefault(digest, {})[name] = outcome.result["secure_url"]
+        if len(uploaded[digest]) < len(VARIANTS):
+            continue
+
+        _, image = prepared[indexes[0]]
+        urls = uploaded[digest]
+        listing_image = ListingImage.objects.create(
+            uploaded_by=user,
+            content_hash=digest,
+            phash=image.phash,
+            full_url=urls["full"],
+            card_url=urls["card"],
+            thumb_url=urls["thumb"],
+            width=image.width,
+            height=image.height,
+            blurhash=image.blurhash,
+        )
+        for index in indexes:
+            yield UploadOutcome(index=index, file=prepared[index][0], result=_outcome_result(listing_image))
+
+
+def card_url_for(url: str) -> str:
+    """
+    Card-sized URL for images without a ListingImage row (uploaded before the
+    pipeline or signed direct uploads): Cloudinary URLs get an on-the-fly
+    resize, anything else is returned unchanged.
+    """
+    marker = "/image/upload/"
+    if "res.cloudinary.com" in url and marker in url:
+        head, tail = url.split(marker, 1)
+        return f"{head}{marker}{CARD_TRANSFORMATION}/{tail}"
+    return url
+
+
+def get_card_urls(urls: Iterable[str]) -> dict[str, str]:
+    """Map full-size listing image URLs to their card variants in one query."""
+    urls = {url for url in urls if isinstance(url, str)}
+    if not urls:
+        return {}
+    card_urls = dict(
+        ListingImage.objects.filter(full_url__in=urls).values_list("full_url", "card_url")
+    )
+    return {url: card_urls.get(url) or card_url_for(url) for url in urls}
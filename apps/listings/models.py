@@ -96,3 +96,56 @@ class Listing(TimeStampedModel):
 
     def __str__(self):
         return f"{self.title} ({self.location})"
+
+
+class ListingImage(TimeStampedModel):
+    """
+    A processed listing photo: responsive variants plus layout metadata.
+
+    `Listing.images` keeps storing the full-size URLs; list views look the
+    smaller variants up here by `full_url`.
+    """
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="listing_images",
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="SHA-256 (hex) of the decoded pixels; repeat uploads of the same photo match on it.",
+    )
+    phash = models.CharField(
+        max_length=16,
+        db_index=True,
+        help_text="64-bit difference hash (hex). Similar photos share it, so it is only a similarity hint.",
+    )
+    full_url = models.URLField(max_length=500, unique=True)
+    card_url = models.URLField(max_length=500)
+    thumb_url = models.URLField(max_length=500)
+    width = models.PositiveIntegerField(help_text="Width of the full variant in pixels.")
+    height = models.PositiveIntegerField(help_text="Height of the full variant in pixels.")
+    blurhash = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["uploaded_by", "content_hash"]),
+        ]
+
+    def __str__(self):
+        return f"ListingImage {self.full_url}"
+
+    def as_variants(self) -> dict:
+        return {
+            "url": self.full_url,
+            "card_url": self.card_url,
+            "thumb_url": self.thumb_url,
+            "width": self.width,
+            "height": self.height,
+            "blurhash": self.blurhash,
+        }
@@ -2,8 +2,11 @@ from django.db.models import Avg, Count
 from rest_framework import serializers
 
 from apps.bookings.services import BookingService
+from apps.common.row_serializers import RowSerializer, decimal_formatter
+from apps.listings.images import get_card_urls
 from apps.listings.models import Listing
 from apps.reviews.models import Review
+from apps.users.avatars import resolve_avatar_name, resolve_avatar_url
 from apps.users.serializers import UserSerializer
 
 # Fee constants exposed for frontend price calculation (must match BookingService)
@@ -20,28 +23,30 @@ class HostSummarySerializer(serializers.Serializer):
     avatar = serializers.SerializerMethodField()
 
     def get_avatar(self, obj) -> str | None:
-        host = obj.host
-        if not getattr(host, "avatar", None):
-            return None
-        try:
-            url = host.avatar.url
-            if isinstance(url, str) and url.startswith(("http://", "https://")):
-                return url
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(url)
-            return url
-        except Exception:
-            return None
+        return resolve_avatar_url(obj.host, self.context.get("request"))
+
+
+class ListingCardListSerializer(serializers.ListSerializer):
+    """Resolves card-size image URLs for the whole page in one query."""
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, "all") else data
+        items = list(iterable)
+        self.context["listing_card_urls"] = get_card_urls(
+            url for item in items for url in (item.images or [])
+        )
+        return super().to_representation(items)
 
 
 class ListingListSerializer(serializers.ModelSerializer):
     """
     Compact serializer used for list views.
-    Includes host summary but omits the full description.
+    Includes host summary but omits the full description; `images` are the
+    card-size variants.
     """
 
     host = HostSummarySerializer(source="*", read_only=True)
+    images = serializers.SerializerMethodField()
     rating = serializers.DecimalField(
         source="average_rating",
         max_digits=3,
@@ -72,6 +77,82 @@ class ListingListSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+        list_serializer_class = ListingCardListSerializer
+
+    def get_images(self, obj) -> list:
+        images = obj.images or []
+        card_urls = self.context.get("listing_card_urls")
+        if card_urls is None:
+            card_urls = get_card_urls(images)
+        return [card_urls.get(url, url) if isinstance(url, str) else url for url in images]
+
+
+_format_price = decimal_formatter(10, 2)
+_format_bathrooms = decimal_formatter(3, 1)
+_format_coordinate = decimal_formatter(9, 6)
+_format_rating = decimal_formatter(3, 1)
+
+
+class ListingListRowSerializer(RowSerializer):
+    """Fast path for `ListingListSerializer` over `.values()` rows."""
+
+    values = (
+        "id",
+        "title",
+        "location",
+        "category",
+        "price_per_night",
+        "bedrooms",
+        "bathrooms",
+        "max_guests",
+        "amenities",
+        "images",
+        "latitude",
+        "longitude",
+        "is_active",
+        "host_id",
+        "host__username",
+        "host__email",
+        "host__avatar",
+        "average_rating",
+        "review_count",
+        "created_at",
+        "updated_at",
+    )
+
+    def prepare(self, rows):
+        self.card_urls = get_card_urls(url for row in rows for url in (row["images"] or []))
+
+    def to_representation(self, row):
+        card_urls = self.card_urls
+        return {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "location": row["location"],
+            "category": row["category"],
+            "price_per_night": _format_price(row["price_per_night"]),
+            "bedrooms": row["bedrooms"],
+            "bathrooms": _format_bathrooms(row["bathrooms"]),
+            "max_guests": row["max_guests"],
+            "amenities": row["amenities"],
+            "images": [
+                card_urls.get(url, url) if isinstance(url, str) else url
+                for url in (row["images"] or [])
+            ],
+            "latitude": _format_coordinate(row["latitude"]),
+            "longitude": _format_coordinate(row["longitude"]),
+            "is_active": row["is_active"],
+            "host": {
+                "id": str(row["host_id"]),
+                "name": row["host__username"],
+                "email": row["host__email"],
+                "avatar": resolve_avatar_name(row["host__avatar"], self.context.get("request")),
+            },
+            "rating": _format_rating(row["average_rating"]),
+            "review_count": row["review_count"],
+            "created_at": self.format_datetime(row["created_at"]),
+            "updated_at": self.format_datetime(row["updated_at"]),
+        }
 
 
 class ListingDetailSerializer(serializers.ModelSerializer):
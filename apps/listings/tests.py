@@ -0,0 +1,107 @@
+import io
+import json
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, RequestFactory, TestCase
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.common import uploads
+from apps.common.row_serializers import assert_same_json
+from apps.listings.models import Listing, ListingImage
+from apps.listings.serializers import ListingListRowSerializer, ListingListSerializer
+from apps.users.models import User
+
+
+class ListingListRowSerializerTests(TestCase):
+    def test_renders_same_json_as_model_serializer(self):
+        hosts = [
+            User.objects.create_user(
+                email=f"host-{i}@example.com",
+                username=f"host-{i}",
+                password=None,
+                avatar="avatars/host.jpg" if i else "",
+            )
+            for i in range(2)
+        ]
+        ListingImage.objects.create(
+            phash="0" * 16,
+            full_url="https://res.cloudinary.com/demo/image/upload/v1/full-0.webp",
+            card_url="https://res.cloudinary.com/demo/image/upload/v1/card-0.webp",
+            thumb_url="https://res.cloudinary.com/demo/image/upload/v1/thumb-0.webp",
+            width=1200,
+            height=800,
+        )
+        Listing.objects.bulk_create([
+            Listing(
+                host=hosts[i % 2],
+                title=f"Listing {i}",
+                description="",
+                location="Manali",
+                category="cabins",
+                price_per_night=Decimal("1500.5") + i,
+                bathrooms=Decimal("1.5"),
+                amenities=["WiFi"] if i % 2 else [],
+                images=[
+                    "https://res.cloudinary.com/demo/image/upload/v1/full-0.webp",
+                    f"https://res.cloudinary.com/demo/image/upload/v1/listing-{i}.jpg",
+                ] if i % 3 else [],
+                latitude=Decimal("32.2396") if i % 2 else None,
+                longitude=Decimal("77.1887") if i % 2 else None,
+                average_rating=Decimal("4.25"),
+                review_count=i,
+            )
+            for i in range(6)
+        ])
+        queryset = Listing.objects.select_related("host").order_by("-created_at")
+        context = {"request": RequestFactory().get("/api/v1/listings/")}
+
+        assert_same_json(
+            ListingListSerializer(queryset, many=True, context=context).data,
+            ListingListRowSerializer(ListingListRowSerializer.queryset(queryset), context=context).data,
+        )
+
+
+class UploadImagesStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="host@example.com", username="host", password=None)
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        backend = uploads.LocalUploadBackend(root=root.name, base_url="http://testserver/media")
+        patcher = mock.patch.object(uploads, "_backend", backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _image(name: str, colour: tuple[int, int, int]) -> SimpleUploadedFile:
+        buffer = io.BytesIO()
+        Image.new("RGB", (32, 24), colour).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    async def test_streams_progress_lines_under_asgi(self):
+        response = await AsyncClient().post(
+            "/api/v1/listings/upload-images/?stream=true",
+            {
+                "images": [
+                    self._image("a.png", (200, 30, 30)),
+                    self._image("b.png", (30, 200, 30)),
+                    SimpleUploadedFile("c.txt", b"text", content_type="text/plain"),
+                ],
+            },
+            headers={"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        # An async iterator is sent line by line by the ASGI handler instead of being buffered.
+        self.assertTrue(response.is_async)
+        events = [json.loads(line) async for line in response.streaming_content]
+        self.assertEqual([event["event"] for event in events], ["progress"] * 3 + ["done"])
+        self.assertEqual(
+            sorted(event["status"] for event in events[:3]),
+            ["rejected", "uploaded", "uploaded"],
+        )
+        self.assertEqual(len(events[-1]["urls"]), 2)
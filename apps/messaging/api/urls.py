@@ -2,6 +2,10 @@ from django.urls import path
 
 from apps.messaging.api.views import (
     BookingConversationView,
+    ConversationAttachmentChunkView,
+    ConversationAttachmentConfirmView,
+    ConversationAttachmentDirectUploadView,
+    ConversationAttachmentResumableUploadView,
     ConversationAttachmentUploadView,
     InboxListView,
     MarkConversationReadView,
@@ -21,6 +25,26 @@ urlpatterns = [
         ConversationAttachmentUploadView.as_view(),
         name="conversation-attachments",
     ),
+    path(
+        "conversations/<uuid:conversation_id>/attachments/direct/",
+        ConversationAttachmentDirectUploadView.as_view(),
+        name="conversation-attachments-direct",
+    ),
+    path(
+        "conversations/<uuid:conversation_id>/attachments/direct/confirm/",
+        ConversationAttachmentConfirmView.as_view(),
+        name="conversation-attachments-direct-confirm",
+    ),
+    path(
+        "conversations/<uuid:conversation_id>/attachments/uploads/",
+        ConversationAttachmentResumableUploadView.as_view(),
+        name="conversation-attachment-uploads",
+    ),
+    path(
+        "conversations/<uuid:conversation_id>/attachments/uploads/<uuid:upload_id>/",
+        ConversationAttachmentChunkView.as_view(),
+        name="conversation-attachment-upload-detail",
+    ),
     path(
         "conversations/<uuid:conversation_id>/mark-read/",
         MarkConversationReadView.as_view(),
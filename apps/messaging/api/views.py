@@ -1,6 +1,5 @@
 import uuid
 
-import cloudinary.uploader
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
@@ -9,6 +8,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.bookings.models import Booking
+from apps.common.serializers import DirectUploadConfirmSerializer, DirectUploadRequestSerializer
+from apps.common.sparse_fields import requested_fields, trim
+from apps.common.uploads import confirm_direct_upload, get_upload_backend, issue_direct_upload
 from apps.messaging.selectors import (
     get_conversation_for_user,
     get_inbox_conversations_with_unread,
@@ -19,7 +21,13 @@ from apps.messaging.serializers import (
     ConversationSerializer,
     MessageSerializer,
 )
+from apps.messaging.models import AttachmentUpload
 from apps.messaging.services import (
+    CHAT_ATTACHMENT_UPLOAD,
+    abort_attachment_upload,
+    append_attachment_chunk,
+    create_attachment_upload,
+    get_attachment_chunk_bytes,
     can_access_booking_chat,
     get_or_create_conversation_for_booking,
     is_booking_chat_active,
@@ -64,7 +72,7 @@ class BookingConversationView(APIView):
             conversation.__class__.objects.select_related(
                 "booking", "booking__guest", "booking__listing", "booking__listing__host"
             )
-            .prefetch_related("participants", "messages__sender")
+            .prefetch_related("participants__chat_key")
             .get(id=conversation.id)
         )
         mark_conversation_as_read(request.user, conversation)
@@ -72,23 +80,42 @@ class BookingConversationView(APIView):
         return Response(serializer.data)
 
 
+def _attachment_payload(url: str, name: str, content_type: str, size: int) -> dict:
+    message_type = "image" if (content_type or "").startswith("image/") else "file"
+    return {
+        "attachment_url": url,
+        "attachment_name": name,
+        "attachment_mime": content_type or "",
+        "attachment_bytes": size,
+        "message_type": message_type,
+    }
+
+
+def _get_chat_conversation(user, conversation_id: str):
+    """Returns (conversation, error_response) for attachment endpoints."""
+    conversation = get_conversation_for_user(conversation_id, user)
+    if not conversation or not conversation.booking:
+        return None, Response(
+            {"detail": "Conversation not found."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    if not is_booking_chat_active(conversation.booking):
+        return None, Response(
+            {"detail": "Chat is unavailable for this booking."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    return conversation, None
+
+
 class ConversationAttachmentUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, conversation_id: str):
-        conversation = get_conversation_for_user(conversation_id, request.user)
-        if not conversation or not conversation.booking:
-            return Response(
-                {"detail": "Conversation not found."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        if not is_booking_chat_active(conversation.booking):
-            return Response(
-                {"detail": "Chat is unavailable for this booking."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+        conversation, error_response = _get_chat_conversation(request.user, conversation_id)
+        if error_response:
+            return error_response
 
         file_obj = request.FILES.get("file")
         if not file_obj:
@@ -97,35 +124,22 @@ class ConversationAttachmentUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        allowed_types = {
-            "image/jpeg",
-            "image/jpg",
-            "image/png",
-            "image/webp",
-            "image/gif",
-            "video/mp4",
-            "video/webm",
-            "video/quicktime",
-            "application/pdf",
-        }
-        max_size = 25 * 1024 * 1024
-
-        if file_obj.content_type not in allowed_types:
+        if file_obj.content_type not in CHAT_ATTACHMENT_UPLOAD.allowed_types:
             return Response(
                 {"detail": f"Unsupported attachment type '{file_obj.content_type}'."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if file_obj.size > max_size:
+        if file_obj.size > CHAT_ATTACHMENT_UPLOAD.max_bytes:
             return Response(
                 {"detail": "Attachment exceeds the 25 MB limit."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         try:
-            upload_result = cloudinary.uploader.upload(
+            upload_result = get_upload_backend().upload(
                 file_obj,
-                folder="wanderleaf/messages",
+                folder=CHAT_ATTACHMENT_UPLOAD.folder,
                 resource_type="auto",
             )
         except Exception as exc:
@@ -134,21 +148,235 @@ class ConversationAttachmentUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        content_type = file_obj.content_type or ""
-        message_type = "image" if content_type.startswith("image/") else "file"
+        return Response(
+            _attachment_payload(
+                upload_result["secure_url"],
+                file_obj.name,
+                file_obj.content_type or "",
+                file_obj.size,
+            ),
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ConversationAttachmentDirectUploadView(APIView):
+    """
+    POST: sign a direct-to-storage attachment upload.
+
+    Request: {"name": "clip.mp4", "content_type": "video/mp4", "size": 1234567}
+    Response: {"method", "upload_url", "fields", "ticket", "expires_in", "max_bytes"}
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, conversation_id: str):
+        conversation, error_response = _get_chat_conversation(request.user, conversation_id)
+        if error_response:
+            return error_response
+
+        serializer = DirectUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload, error = issue_direct_upload(
+            request.user,
+            CHAT_ATTACHMENT_UPLOAD,
+            context={"conversation_id": str(conversation.id)},
+            **serializer.validated_data,
+        )
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(upload, status=status.HTTP_200_OK)
+
+
+class ConversationAttachmentConfirmView(APIView):
+    """
+    POST: confirm a direct attachment upload; returns the same payload as the
+    multipart attachments endpoint.
+
+    Request: {"ticket": "..."}
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, conversation_id: str):
+        conversation, error_response = _get_chat_conversation(request.user, conversation_id)
+        if error_response:
+            return error_response
+
+        serializer = DirectUploadConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload, error = confirm_direct_upload(
+            request.user,
+            CHAT_ATTACHMENT_UPLOAD,
+            serializer.validated_data["ticket"],
+            context={"conversation_id": str(conversation.id)},
+        )
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
-            {
-                "attachment_url": upload_result["secure_url"],
-                "attachment_name": file_obj.name,
-                "attachment_mime": content_type,
-                "attachment_bytes": file_obj.size,
-                "message_type": message_type,
-            },
+            _attachment_payload(
+                upload["secure_url"],
+                upload["name"],
+                upload["content_type"],
+                int(upload["bytes"]),
+            ),
             status=status.HTTP_201_CREATED,
         )
 
 
+CHUNK_ERRORS = {
+    "not_in_progress": (status.HTTP_409_CONFLICT, "Upload is no longer in progress."),
+    "expired": (status.HTTP_410_GONE, "Upload has expired. Start a new upload."),
+    "offset_mismatch": (status.HTTP_409_CONFLICT, "Upload-Offset does not match the server offset."),
+    "invalid_length": (
+        status.HTTP_400_BAD_REQUEST,
+        "Each chunk must be exactly chunk_size bytes, except the last one which carries the remainder.",
+    ),
+    "incomplete": (status.HTTP_400_BAD_REQUEST, "Chunk body ended early; resend it from the current offset."),
+    "storage_error": (status.HTTP_502_BAD_GATEWAY, "Storage rejected the chunk; resend it from the current offset."),
+}
+
+
+def _attachment_upload_state(upload: AttachmentUpload) -> dict:
+    state = {
+        "upload_id": str(upload.id),
+        "offset": upload.offset,
+        "size": upload.total_bytes,
+        "chunk_size": get_attachment_chunk_bytes(),
+        "status": upload.status,
+        "expires_at": upload.expires_at.isoformat(),
+    }
+    if upload.status == AttachmentUpload.Status.COMPLETED:
+        state.update(_attachment_payload(
+            upload.result_url,
+            upload.file_name,
+            upload.content_type,
+            upload.total_bytes,
+        ))
+    return state
+
+
+def _attachment_upload_response(upload: AttachmentUpload, data: dict, status_code: int) -> Response:
+    response = Response(data, status=status_code)
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.total_bytes)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+class ConversationAttachmentResumableUploadView(APIView):
+    """
+    POST: start a chunked, resumable attachment upload.
+
+    Request: {"name": "clip.mp4", "content_type": "video/mp4", "size": 20000000}
+    Response: {"upload_id", "offset", "size", "chunk_size", "status", "expires_at"}
+
+    Then PATCH .../uploads/<upload_id>/ with the raw chunk bytes
+    (Content-Type: application/offset+octet-stream) and an Upload-Offset
+    header. After a failure, GET or HEAD the upload to learn the offset to
+    resume from. The final PATCH returns the attachment payload.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, conversation_id: str):
+        conversation, error_response = _get_chat_conversation(request.user, conversation_id)
+        if error_response:
+            return error_response
+
+        serializer = DirectUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload, error = create_attachment_upload(
+            request.user,
+            conversation,
+            **serializer.validated_data,
+        )
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = _attachment_upload_response(upload, _attachment_upload_state(upload), status.HTTP_201_CREATED)
+        response["Location"] = request.build_absolute_uri(f"{upload.id}/")
+        return response
+
+
+class ConversationAttachmentChunkView(APIView):
+    """
+    GET/HEAD: current offset of a resumable upload.
+    PATCH: append one chunk at Upload-Offset.
+    DELETE: abort the upload.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _get_upload(self, request, conversation_id: str, upload_id: str):
+        conversation, error_response = _get_chat_conversation(request.user, conversation_id)
+        if error_response:
+            return None, error_response
+        upload = AttachmentUpload.objects.filter(
+            id=upload_id,
+            conversation=conversation,
+            user=request.user,
+        ).first()
+        if upload is None:
+            return None, Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        return upload, None
+
+    def get(self, request, conversation_id: str, upload_id: str):
+        upload, error_response = self._get_upload(request, conversation_id, upload_id)
+        if error_response:
+            return error_response
+        return _attachment_upload_response(upload, _attachment_upload_state(upload), status.HTTP_200_OK)
+
+    def head(self, request, conversation_id: str, upload_id: str):
+        return self.get(request, conversation_id, upload_id)
+
+    def patch(self, request, conversation_id: str, upload_id: str):
+        upload, error_response = self._get_upload(request, conversation_id, upload_id)
+        if error_response:
+            return error_response
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Read the raw body stream; request.data would buffer and parse it.
+        upload, error = append_attachment_chunk(
+            upload,
+            offset=offset,
+            length=length,
+            stream=request.stream,
+        )
+        if error:
+            error_status, detail = CHUNK_ERRORS[error]
+            return _attachment_upload_response(
+                upload,
+                {"detail": detail, "code": error, **_attachment_upload_state(upload)},
+                error_status,
+            )
+
+        completed = upload.status == AttachmentUpload.Status.COMPLETED
+        return _attachment_upload_response(
+            upload,
+            _attachment_upload_state(upload),
+            status.HTTP_201_CREATED if completed else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, conversation_id: str, upload_id: str):
+        upload, error_response = self._get_upload(request, conversation_id, upload_id)
+        if error_response:
+            return error_response
+        abort_attachment_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class MarkConversationReadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -216,7 +444,7 @@ class InboxListView(APIView):
                     "unread_count": item["unread_count"],
                 }
             )
-        return Response(data)
+        return Response(trim(data, requested_fields(request)))
 
 
 class UnreadCountView(APIView):
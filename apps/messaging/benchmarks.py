@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.common.benchmarks import register, timed
+from apps.common.row_serializers import assert_same_json
+from apps.messaging.models import Conversation, Message
+from apps.messaging.serializers import MessageRowSerializer, MessageSerializer
+from apps.users.models import User, UserChatKey
+
+
+PAGE_ROWS = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+@register("messaging.row_serializers", "Serialize 1,000 chat messages: MessageSerializer vs .values() fast path")
+def row_serializers(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            host = User.objects.create_user(
+                email="bench-host@example.com",
+                username="bench-host",
+                password=None,
+                avatar="avatars/bench-host.jpg",
+            )
+            UserChatKey.objects.create(user=host, public_key="bench-public-key", algorithm="ECDH-P256", version=1)
+            guest = User.objects.create_user(email="bench-guest@example.com", username="bench-guest", password=None)
+            conversation = Conversation.objects.create()
+            conversation.participants.add(host, guest)
+            Message.objects.bulk_create([
+                Message(
+                    conversation=conversation,
+                    sender=(host, guest)[i % 2],
+                    body="" if i % 3 == 0 else f"message {i}",
+                    encrypted_body={"ciphertext": "abc", "iv": "def"} if i % 3 == 0 else None,
+                    message_type=Message.MessageType.FILE if i % 10 == 0 else Message.MessageType.TEXT,
+                    attachment_url="https://res.cloudinary.com/demo/raw/upload/v1/file.pdf" if i % 10 == 0 else "",
+                    attachment_bytes=2048 if i % 10 == 0 else None,
+                )
+                for i in range(PAGE_ROWS)
+            ])
+            queryset = Message.objects.filter(conversation=conversation).select_related("sender__chat_key")
+            request = RequestFactory().get("/api/v1/messaging/")
+
+            def model_serializer():
+                return MessageSerializer(queryset, many=True, context={"request": request}).data
+
+            def row_serializer():
+                rows = MessageRowSerializer.queryset(queryset)
+                return MessageRowSerializer(rows, context={"request": request}).data
+
+            assert_same_json(model_serializer(), row_serializer())
+            results["MessageSerializer"] = timed(model_serializer, iterations)
+            results["MessageRowSerializer"] = timed(row_serializer, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
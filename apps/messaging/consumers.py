@@ -1,18 +1,32 @@
+import math
+
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from django.utils import timezone
 
+from apps.common.metrics import Counter, Histogram, MeteredConsumerMixin
+from apps.common.profiling import ProfiledConsumerMixin
+from apps.common.throttling import MessageThrottle
 from apps.messaging.models import Message
 from apps.messaging.selectors import get_conversation_for_user
 from apps.messaging.serializers import MessageSerializer
 from apps.messaging.services import is_booking_chat_active
 
 
+chat_message_throttle = MessageThrottle("messaging.send")
+
+CHAT_MESSAGES = Counter("chat_messages_total", "Chat messages created over websockets.")
+GROUP_SEND_SECONDS = Histogram(
+    "channel_layer_group_send_seconds", "Channel layer group_send latency, by group kind.", ["group"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
 def _notification_group_name(user_id) -> str:
     return f"user_{user_id}"
 
 
-class BookingChatConsumer(AsyncJsonWebsocketConsumer):
+class BookingChatConsumer(ProfiledConsumerMixin, MeteredConsumerMixin, AsyncJsonWebsocketConsumer):
     async def connect(self):
         user = self.scope.get("user")
         if not user or not getattr(user, "is_authenticated", False):
@@ -42,24 +56,40 @@ class BookingChatConsumer(AsyncJsonWebsocketConsumer):
             )
             return
 
+        allowed, wait = await chat_message_throttle.allow(self.scope["user"].pk)
+        if not allowed:
+            await self.send_json(
+                {
+                    "type": "error",
+                    "code": "throttled",
+                    "detail": f"Too many messages. Try again in {math.ceil(wait)} seconds.",
+                    "retry_after": math.ceil(wait),
+                }
+            )
+            return
+
         try:
             message_data = await self._create_message(content.get("payload") or {})
         except ValueError as exc:
             await self.send_json({"type": "error", "detail": str(exc)})
             return
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {"type": "chat.message_created", "message": message_data["message"]},
-        )
-        for recipient_id in message_data["recipient_ids"]:
+        CHAT_MESSAGES.inc()
+
+        with GROUP_SEND_SECONDS.time(group="conversation"):
             await self.channel_layer.group_send(
-                _notification_group_name(recipient_id),
-                {
-                    "type": "notification.message_created",
-                    "notification": message_data["notification"],
-                },
+                self.room_group_name,
+                {"type": "chat.message_created", "message": message_data["message"]},
             )
+        for recipient_id in message_data["recipient_ids"]:
+            with GROUP_SEND_SECONDS.time(group="notification"):
+                await self.channel_layer.group_send(
+                    _notification_group_name(recipient_id),
+                    {
+                        "type": "notification.message_created",
+                        "notification": message_data["notification"],
+                    },
+                )
 
     async def chat_message_created(self, event):
         await self.send_json(
@@ -196,7 +226,7 @@ class BookingChatConsumer(AsyncJsonWebsocketConsumer):
         }
 
 
-class NotificationConsumer(AsyncJsonWebsocketConsumer):
+class NotificationConsumer(ProfiledConsumerMixin, MeteredConsumerMixin, AsyncJsonWebsocketConsumer):
     async def connect(self):
         user = self.scope.get("user")
         if not user or not getattr(user, "is_authenticated", False):
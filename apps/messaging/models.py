@@ -97,3 +97,60 @@ class ConversationReadState(TimeStampedModel):
             )
         ]
 
+
+
+class AttachmentUpload(TimeStampedModel):
+    """
+    Server-side state of a chunked, resumable chat attachment upload.
+
+    `offset` is the number of bytes already handed to storage; clients
+    resume by asking for it and sending the next chunk from there.
+    """
+
+    class Status(models.TextChoices):
+        IN_PROGRESS = "in_progress", "In progress"
+        COMPLETED = "completed", "Completed"
+        ABORTED = "aborted", "Aborted"
+
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="attachment_uploads",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="attachment_uploads",
+    )
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255)
+    total_bytes = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Bytes received and forwarded to storage so far.",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.IN_PROGRESS,
+        db_index=True,
+    )
+    storage_upload_id = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Identifier tying the chunks together at the storage backend.",
+    )
+    public_id = models.CharField(max_length=255)
+    resource_type = models.CharField(max_length=20, default="auto")
+    result_url = models.URLField(blank=True, default="")
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"AttachmentUpload {self.id} ({self.offset}/{self.total_bytes})"
+
+    @property
+    def is_expired(self) -> bool:
+        return timezone.now() >= self.expires_at
@@ -1,18 +1,13 @@
-from django.db.models import F, OuterRef, Prefetch, Q, Subquery
+from django.db.models import F, OuterRef, Q, Subquery
 
 from apps.messaging.models import Conversation, ConversationReadState, Message
 
 
 def get_user_conversations_queryset(user):
+    # No messages prefetch: ConversationSerializer.get_messages queries the
+    # rows it renders, and the other callers do not read messages.
     return (
         Conversation.objects.select_related("booking", "booking__listing", "booking__guest", "booking__listing__host")
-        .prefetch_related(
-            "participants",
-            Prefetch(
-                "messages",
-                queryset=Message.objects.select_related("sender").order_by("created_at"),
-            ),
-        )
         .filter(
             Q(booking__guest=user) | Q(booking__listing__host=user)
         )
@@ -56,6 +51,8 @@ def get_inbox_conversations_with_unread(user):
         get_user_conversations_queryset(user)
         .filter(booking__isnull=False)
         .select_related("booking", "booking__listing", "booking__guest", "booking__listing__host")
+        # The inbox renders participants with their chat keys (ChatUserSummarySerializer).
+        .prefetch_related("participants__chat_key")
     )
     # Filter to active chat only, and only conversations with at least one message
     result = []
@@ -65,6 +62,10 @@ def get_inbox_conversations_with_unread(user):
         last_msg = conv.messages.order_by("-created_at").first()
         if not last_msg:
             continue
+        # The sender is a participant, already loaded with their chat key.
+        sender = next((p for p in conv.participants.all() if p.id == last_msg.sender_id), None)
+        if sender is not None:
+            last_msg.sender = sender
         last_read = None
         try:
             rs = ConversationReadState.objects.get(user=user, conversation=conv)
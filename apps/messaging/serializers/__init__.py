@@ -1,7 +1,9 @@
 from rest_framework import serializers
 
+from apps.common.row_serializers import RowSerializer, row_serializers_enabled
 from apps.messaging.models import Conversation, Message
 from apps.messaging.services import is_booking_chat_active
+from apps.users.avatars import resolve_avatar_name, resolve_avatar_url
 
 
 class ChatUserSummarySerializer(serializers.Serializer):
@@ -12,26 +14,17 @@ class ChatUserSummarySerializer(serializers.Serializer):
     chat_encryption = serializers.SerializerMethodField()
 
     def get_avatar(self, obj) -> str | None:
-        if not getattr(obj, "avatar", None):
-            return None
-        try:
-            url = obj.avatar.url
-            if isinstance(url, str) and url.startswith(("http://", "https://")):
-                return url
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(url)
-            return url
-        except Exception:
-            return None
+        return resolve_avatar_url(obj, self.context.get("request"))
 
     def get_chat_encryption(self, obj) -> dict | None:
-        if not getattr(obj, "chat_public_key", ""):
+        # Callers select_related/prefetch_related "chat_key" to avoid a query per user.
+        chat_key = obj.get_chat_key()
+        if not chat_key.public_key:
             return None
         return {
-            "public_key": obj.chat_public_key,
-            "algorithm": obj.chat_key_algorithm,
-            "version": obj.chat_key_version,
+            "public_key": chat_key.public_key,
+            "algorithm": chat_key.algorithm,
+            "version": chat_key.version,
         }
 
 
@@ -61,6 +54,58 @@ class MessageSerializer(serializers.ModelSerializer):
         return obj.is_encrypted
 
 
+class MessageRowSerializer(RowSerializer):
+    """Fast path for `MessageSerializer` over `.values()` rows."""
+
+    values = (
+        "id",
+        "sender_id",
+        "sender__username",
+        "sender__email",
+        "sender__avatar",
+        "sender__chat_key__public_key",
+        "sender__chat_key__algorithm",
+        "sender__chat_key__version",
+        "body",
+        "encrypted_body",
+        "message_type",
+        "attachment_url",
+        "attachment_name",
+        "attachment_mime",
+        "attachment_bytes",
+        "created_at",
+        "updated_at",
+    )
+
+    def to_representation(self, row):
+        encrypted_body = row["encrypted_body"]
+        public_key = row["sender__chat_key__public_key"]
+        return {
+            "id": str(row["id"]),
+            "sender": {
+                "id": str(row["sender_id"]),
+                "name": row["sender__username"],
+                "email": row["sender__email"],
+                "avatar": resolve_avatar_name(row["sender__avatar"], self.context.get("request")),
+                "chat_encryption": {
+                    "public_key": public_key,
+                    "algorithm": row["sender__chat_key__algorithm"],
+                    "version": row["sender__chat_key__version"],
+                } if public_key else None,
+            },
+            "body": row["body"],
+            "encrypted_body": encrypted_body,
+            "is_encrypted": bool(encrypted_body and encrypted_body.get("ciphertext")),
+            "message_type": row["message_type"],
+            "attachment_url": row["attachment_url"],
+            "attachment_name": row["attachment_name"],
+            "attachment_mime": row["attachment_mime"],
+            "attachment_bytes": row["attachment_bytes"],
+            "created_at": self.format_datetime(row["created_at"]),
+            "updated_at": self.format_datetime(row["updated_at"]),
+        }
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     booking_id = serializers.UUIDField(source="booking.id", read_only=True)
     booking_status = serializers.CharField(source="booking.status", read_only=True)
@@ -70,7 +115,7 @@ class ConversationSerializer(serializers.ModelSerializer):
     )
     is_chat_available = serializers.SerializerMethodField()
     participants = ChatUserSummarySerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
@@ -87,6 +132,14 @@ class ConversationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def get_messages(self, obj) -> list[dict]:
+        """The conversation's history in one query (not prefetched by the selectors)."""
+        if row_serializers_enabled():
+            rows = MessageRowSerializer.queryset(obj.messages.all())
+            return MessageRowSerializer(rows, context=self.context).data
+        messages = obj.messages.select_related("sender__chat_key")
+        return MessageSerializer(messages, many=True, context=self.context).data
+
     def get_is_chat_available(self, obj) -> bool:
         if not obj.booking:
             return False
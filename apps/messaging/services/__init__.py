@@ -1,7 +1,17 @@
+import logging
+import uuid
+from collections.abc import Iterator
+from datetime import timedelta
+
+from django.conf import settings
 from django.utils import timezone
 
 from apps.bookings.models import Booking
-from apps.messaging.models import Conversation, ConversationReadState
+from apps.common.uploads import DirectUploadPolicy, get_upload_backend
+from apps.messaging.models import AttachmentUpload, Conversation, ConversationReadState
+
+
+logger = logging.getLogger(__name__)
 
 
 ACTIVE_BOOKING_CHAT_STATUSES = (
@@ -9,6 +19,29 @@ ACTIVE_BOOKING_CHAT_STATUSES = (
     Booking.Status.CONFIRMED,
 )
 
+CHAT_ATTACHMENT_UPLOAD = DirectUploadPolicy(
+    purpose="chat_attachment",
+    folder="wanderleaf/messages",
+    allowed_types=frozenset({
+        "image/jpeg",
+        "image/jpg",
+        "image/png",
+        "image/webp",
+        "image/gif",
+        "video/mp4",
+        "video/webm",
+        "video/quicktime",
+        "application/pdf",
+    }),
+    max_bytes=25 * 1024 * 1024,
+)
+
+STREAM_READ_BYTES = 64 * 1024
+
+
+class IncompleteChunk(Exception):
+    """The request body ended before the declared chunk length."""
+
 
 def is_booking_chat_active(booking: Booking) -> bool:
     """Chat is only available while the booking is pending payment or confirmed."""
@@ -39,3 +72,115 @@ def mark_conversation_as_read(user, conversation: Conversation) -> None:
         defaults={"last_read_at": timezone.now()},
     )
 
+
+
+def get_attachment_chunk_bytes() -> int:
+    """Required size of every chunk except the last one."""
+    return getattr(settings, "CHAT_ATTACHMENT_CHUNK_BYTES", 5 * 1024 * 1024)
+
+
+def create_attachment_upload(
+    user,
+    conversation: Conversation,
+    *,
+    name: str,
+    content_type: str,
+    size: int,
+) -> tuple[AttachmentUpload | None, str | None]:
+    """Start a resumable chat attachment upload. Returns (upload, error)."""
+    error = CHAT_ATTACHMENT_UPLOAD.validate(content_type, size)
+    if error:
+        return None, error
+
+    ttl_hours = getattr(settings, "CHAT_ATTACHMENT_UPLOAD_TTL_HOURS", 24)
+    upload = AttachmentUpload.objects.create(
+        conversation=conversation,
+        user=user,
+        file_name=name,
+        content_type=content_type,
+        total_bytes=size,
+        storage_upload_id=uuid.uuid4().hex,
+        public_id=f"{CHAT_ATTACHMENT_UPLOAD.folder}/{uuid.uuid4().hex}",
+        resource_type="video" if content_type.startswith("video/") else "image",
+        expires_at=timezone.now() + timedelta(hours=ttl_hours),
+    )
+    return upload, None
+
+
+def _read_exactly(stream, length: int) -> Iterator[bytes]:
+    remaining = length
+    while remaining > 0:
+        data = stream.read(min(STREAM_READ_BYTES, remaining))
+        if not data:
+            raise IncompleteChunk()
+        remaining -= len(data)
+        yield data
+
+
+def append_attachment_chunk(
+    upload: AttachmentUpload,
+    *,
+    offset: int,
+    length: int,
+    stream,
+) -> tuple[AttachmentUpload, str | None]:
+    """
+    Stream one chunk from `stream` to storage and advance the stored offset.
+
+    Returns (upload, error_code); error_code is one of "not_in_progress",
+    "expired", "offset_mismatch", "invalid_length", "incomplete" or
+    "storage_error". The offset only moves once storage has the chunk, so a
+    failed or interrupted chunk is simply sent again from the same offset.
+    """
+    if upload.status != AttachmentUpload.Status.IN_PROGRESS:
+        return upload, "not_in_progress"
+    if upload.is_expired:
+        return upload, "expired"
+    if offset != upload.offset:
+        return upload, "offset_mismatch"
+
+    expected = min(get_attachment_chunk_bytes(), upload.total_bytes - upload.offset)
+    if length != expected:
+        return upload, "invalid_length"
+
+    backend = get_upload_backend()
+    try:
+        result = backend.upload_chunk(
+            upload_id=upload.storage_upload_id,
+            public_id=upload.public_id,
+            resource_type=upload.resource_type,
+            file_name=upload.file_name,
+            chunks=_read_exactly(stream, length),
+            start=offset,
+            total=upload.total_bytes,
+        )
+    except IncompleteChunk:
+        return upload, "incomplete"
+    except backend.errors:
+        logger.exception("Storing chunk at offset %s of attachment upload %s failed", offset, upload.pk)
+        return upload, "storage_error"
+
+    new_offset = offset + length
+    updates = {"offset": new_offset, "updated_at": timezone.now()}
+    if result is not None:
+        updates.update(status=AttachmentUpload.Status.COMPLETED, result_url=result["secure_url"])
+
+    # Conditional on the old offset so two concurrent PATCHes cannot both advance it.
+    advanced = AttachmentUpload.objects.filter(
+        pk=upload.pk,
+        offset=offset,
+        status=AttachmentUpload.Status.IN_PROGRESS,
+    ).update(**updates)
+    upload.refresh_from_db()
+    if not advanced:
+        return upload, "offset_mismatch"
+    return upload, None
+
+
+def abort_attachment_upload(upload: AttachmentUpload) -> None:
+    """Cancel an unfinished upload and drop any partial data at the backend."""
+    if upload.status != AttachmentUpload.Status.IN_PROGRESS:
+        return
+    get_upload_backend().abort_chunked(upload.storage_upload_id)
+    upload.status = AttachmentUpload.Status.ABORTED
+    upload.save(update_fields=["status", "updated_at"])
@@ -0,0 +1,36 @@
+from django.test import RequestFactory, TestCase
+
+from apps.common.row_serializers import assert_same_json
+from apps.messaging.models import Conversation, Message
+from apps.messaging.serializers import MessageRowSerializer, MessageSerializer
+from apps.users.models import User, UserChatKey
+
+
+class MessageRowSerializerTests(TestCase):
+    def test_renders_same_json_as_model_serializer(self):
+        host = User.objects.create_user(
+            email="host@example.com", username="host", password=None, avatar="avatars/host.jpg"
+        )
+        UserChatKey.objects.create(user=host, public_key="host-public-key", algorithm="ECDH-P256", version=1)
+        guest = User.objects.create_user(email="guest@example.com", username="guest", password=None)
+        conversation = Conversation.objects.create()
+        conversation.participants.add(host, guest)
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                sender=(host, guest)[i % 2],
+                body="" if i % 3 == 0 else f"message {i}",
+                encrypted_body={"ciphertext": "abc", "iv": "def"} if i % 3 == 0 else None,
+                message_type=Message.MessageType.FILE if i % 4 == 0 else Message.MessageType.TEXT,
+                attachment_url="https://res.cloudinary.com/demo/raw/upload/v1/file.pdf" if i % 4 == 0 else "",
+                attachment_bytes=2048 if i % 4 == 0 else None,
+            )
+            for i in range(8)
+        ])
+        queryset = Message.objects.filter(conversation=conversation).select_related("sender__chat_key")
+        context = {"request": RequestFactory().get("/api/v1/messaging/")}
+
+        assert_same_json(
+            MessageSerializer(queryset, many=True, context=context).data,
+            MessageRowSerializer(MessageRowSerializer.queryset(queryset), context=context).data,
+        )
@@ -1,7 +1,8 @@
 from django.urls import path
 
+from apps.payments.api.views import RazorpayWebhookView
+
 
 urlpatterns: list = [
-    # payment endpoints will be added here
+    path("webhooks/razorpay/", RazorpayWebhookView.as_view(), name="razorpay-webhook"),
 ]
-
@@ -1,6 +1,14 @@
-from rest_framework import viewsets
+import hashlib
+import json
 
+from django.conf import settings
+from rest_framework import permissions, status, viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.payments.gateway import verify_webhook_signature
 from apps.payments.models import Payment
+from apps.payments.services import WebhookEventService
 
 
 class PaymentViewSet(viewsets.ModelViewSet):
@@ -10,4 +18,49 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     queryset = Payment.objects.all()
     serializer_class = None  # to be defined
+    replica_reads = False
+
+
+class RazorpayWebhookView(APIView):
+    """
+    POST: Razorpay webhook receiver.
+
+    Verifies the signature over the raw body and appends the event to the
+    WebhookEvent log; payment/booking state is updated by the batch worker
+    so the gateway gets its 200 immediately.
+    """
+
+    authentication_classes: list = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        secret = getattr(settings, "RZP_WEBHOOK_SECRET", "")
+        if not secret:
+            return Response(
+                {"detail": "Webhooks are not configured.", "code": "webhook_not_configured"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        body = request.body
+        signature = request.headers.get("X-Razorpay-Signature", "")
+        if not verify_webhook_signature(body, signature, secret):
+            return Response(
+                {"detail": "Invalid webhook signature.", "code": "invalid_signature"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response(
+                {"detail": "Webhook body is not valid JSON.", "code": "invalid_payload"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        event_id = request.headers.get("X-Razorpay-Event-Id") or hashlib.sha256(body).hexdigest()
+        WebhookEventService.record(
+            event_id=event_id,
+            event_type=str(payload.get("event", "")),
+            payload=payload,
+        )
+        return Response({"status": "accepted"}, status=status.HTTP_200_OK)
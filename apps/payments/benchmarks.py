@@ -0,0 +1,27 @@
+import razorpay
+
+from apps.common.benchmarks import register, timed
+from apps.payments.fake_gateway import FakeRazorpayServer
+from apps.payments.gateway import RazorpayGateway
+
+
+ORDER_DATA = {"amount": 125000, "currency": "INR", "receipt": "bench", "notes": {}}
+
+
+@register("payments.gateway", "Razorpay order creation: client per call vs pooled shared client")
+def gateway_client(iterations: int) -> dict[str, float]:
+    server = FakeRazorpayServer().start()
+    try:
+        auth = ("rzp_test_bench", "bench_secret")
+
+        def client_per_call():
+            razorpay.Client(auth=auth, base_url=server.base_url).order.create(data=ORDER_DATA)
+
+        gateway = RazorpayGateway(*auth, base_url=server.base_url)
+
+        return {
+            "new razorpay.Client per call": timed(client_per_call, iterations),
+            "pooled RazorpayGateway": timed(lambda: gateway.create_order(ORDER_DATA), iterations),
+        }
+    finally:
+        server.stop()
@@ -0,0 +1,146 @@
+"""
+Local stand-in for the Razorpay REST API.
+
+Implements just enough of the API (orders and refunds) for development,
+benchmarks and manual testing without network access or real credentials.
+Point `RZP_API_BASE_URL` at the server to use it.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+REFUND_PATH = re.compile(r"^/v1/payments/(?P<payment_id>[^/]+)/refund/?$")
+REFUNDS_PATH = re.compile(r"^/v1/payments/(?P<payment_id>[^/?]+)/refunds/?(?:\?.*)?$")
+
+
+class FakeRazorpayHandler(BaseHTTPRequestHandler):
+    server: "FakeRazorpayServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from BaseHTTPRequestHandler
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        match = REFUNDS_PATH.match(self.path)
+        if match:
+            items = self.server.list_refunds(match.group("payment_id"))
+            self._send(200, {"entity": "collection", "count": len(items), "items": items})
+            return
+        self._send(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The requested URL was not found on the server."}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            payload = {}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._send(503, {"error": {"code": "SERVER_ERROR", "description": "Service unavailable"}})
+            return
+
+        if self.path.rstrip("/") == "/v1/orders":
+            self._send(200, self.server.create_order(payload))
+            return
+
+        match = REFUND_PATH.match(self.path)
+        if match:
+            status, body = self.server.create_refund(match.group("payment_id"), payload)
+            self._send(status, body)
+            return
+
+        self._send(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The requested URL was not found on the server."}})
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeRazorpayServer(ThreadingHTTPServer):
+    """Threaded HTTP server that fakes Razorpay orders and refunds in memory."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        verbose: bool = False,
+    ):
+        super().__init__((host, port), FakeRazorpayHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self.orders: dict[str, dict] = {}
+        self.refunds: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def create_order(self, payload: dict) -> dict:
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": payload.get("amount", 0),
+            "currency": payload.get("currency", "INR"),
+            "receipt": payload.get("receipt", ""),
+            "notes": payload.get("notes", {}),
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        with self._lock:
+            self.orders[order["id"]] = order
+        return order
+
+    def create_refund(self, payment_id: str, payload: dict) -> tuple[int, dict]:
+        refund = {
+            "id": f"rfnd_{uuid.uuid4().hex[:14]}",
+            "entity": "refund",
+            "amount": payload.get("amount", 0),
+            "currency": "INR",
+            "payment_id": payment_id,
+            "notes": payload.get("notes", {}),
+            "receipt": payload.get("receipt"),
+            "status": "processed",
+            "created_at": int(time.time()),
+        }
+        # Like Razorpay, a repeated receipt creates another refund.
+        with self._lock:
+            self.refunds.setdefault(payment_id, []).append(refund)
+        return 200, refund
+
+    def list_refunds(self, payment_id: str) -> list[dict]:
+        with self._lock:
+            return list(reversed(self.refunds.get(payment_id, [])))
+
+    def start(self) -> "FakeRazorpayServer":
+        """Serve from a daemon thread; returns self for chaining."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-razorpay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,431 @@
+"""
+Shared Razorpay gateway client.
+
+One pooled `razorpay.Client` is kept per process (per credentials/base URL)
+instead of constructing a new client and HTTP session on every call. Calls go
+through a circuit breaker and carry a per-call timeout. Retries are scheduled
+on a timer thread, so no thread is parked in `time.sleep` during backoff, and
+stop once their deadline passes or the caller gives up.
+"""
+import hashlib
+import heapq
+import hmac
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+from django.conf import settings
+
+from apps.common.metrics import Counter, Histogram
+
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_CALL_SECONDS = Histogram(
+    "payment_gateway_call_seconds", "Latency of one payment gateway attempt, by action and outcome.",
+    ["action", "outcome"],
+)
+GATEWAY_RETRIES = Counter("payment_gateway_retries_total", "Gateway attempts retried after a transient error.", ["action"])
+
+
+class GatewayNotConfigured(Exception):
+    """Raised when Razorpay credentials are missing or the SDK is not installed."""
+
+
+class GatewayCircuitOpen(Exception):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+class GatewayTimeout(Exception):
+    """Raised when a call and its retries do not finish within their deadline."""
+
+
+class CircuitBreaker:
+    """
+    Minimal thread-safe circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. The first call after that is let
+    through as a probe; success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self) -> None:
+        with self._lock:
+            state = self._state_locked()
+            if state == self.OPEN:
+                raise GatewayCircuitOpen("Payment gateway circuit is open; failing fast.")
+            if state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise GatewayCircuitOpen("Payment gateway circuit is half-open; probe in flight.")
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RetryScheduler:
+    """
+    Runs delayed retry attempts without blocking the caller.
+
+    A single daemon thread keeps a heap of due times and hands due attempts to
+    a small executor, so waiting for backoff costs no worker thread.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gateway-retry")
+        self._heap: list[tuple[float, int, object]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def call_later(self, delay: float, fn) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), fn))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="gateway-retry-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due_at, _, fn = self._heap[0]
+                wait = due_at - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+                heapq.heappop(self._heap)
+            self._executor.submit(fn)
+
+
+class RazorpayGateway:
+    """Pooled, timeout-bounded Razorpay client shared by all payment code paths."""
+
+    def __init__(
+        self,
+        key_id: str,
+        key_secret: str,
+        *,
+        base_url: str = "",
+        timeout: float = 10.0,
+        pool_maxsize: int = 10,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.breaker = breaker or CircuitBreaker()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        try:
+            import razorpay
+            import requests
+            from requests.adapters import HTTPAdapter
+        except ImportError as exc:
+            raise GatewayNotConfigured("Payment gateway not available.") from exc
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        options = {"base_url": self.base_url} if self.base_url else {}
+        return razorpay.Client(session=session, auth=(self.key_id, self.key_secret), **options)
+
+    def call(self, operation):
+        """Run `operation(client, timeout)` once, guarded by the circuit breaker."""
+        self.breaker.before_call()
+        try:
+            result = operation(self.client, self.timeout)
+        except Exception as exc:
+            # Provider-side rejections (bad request, already refunded, ...) prove
+            # the gateway is reachable, so only other errors trip the breaker.
+            if self._is_client_error(exc):
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    @staticmethod
+    def _is_client_error(exc: Exception) -> bool:
+        try:
+            from razorpay.errors import BadRequestError, SignatureVerificationError
+        except ImportError:
+            return False
+        return isinstance(exc, (BadRequestError, SignatureVerificationError))
+
+    def create_order(self, order_data: dict) -> dict:
+        return self.call(lambda client, timeout: client.order.create(data=order_data, timeout=timeout))
+
+    def refund_payment(self, gateway_payment_id: str, refund_data: dict) -> dict:
+        return self.call(
+            lambda client, timeout: client.payment.refund(
+                gateway_payment_id,
+                refund_data,
+                timeout=timeout,
+            )
+        )
+
+    def fetch_refunds(self, gateway_payment_id: str) -> list[dict]:
+        """The payment's refunds, newest first (up to 100, Razorpay's page limit)."""
+        response = self.call(
+            lambda client, timeout: client.payment.fetch_multiple_refund(
+                gateway_payment_id,
+                {"count": 100},
+                timeout=timeout,
+            )
+        )
+        return response.get("items", [])
+
+    def verify_payment_signature(self, params: dict) -> bool:
+        """Local HMAC check; no network call and no breaker involvement."""
+        return self.client.utility.verify_payment_signature(params)
+
+
+def verify_webhook_signature(body: bytes, signature: str, secret: str) -> bool:
+    """Check X-Razorpay-Signature (hex HMAC-SHA256 of the raw body)."""
+    if not signature or not secret:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+_gateways: dict[tuple, RazorpayGateway] = {}
+_gateways_lock = threading.Lock()
+_retry_scheduler: RetryScheduler | None = None
+
+
+def get_gateway_credentials() -> tuple[str | None, str | None]:
+    key_id = getattr(settings, "RZP_TEST_KEY_ID", None) or os.getenv("RZP_TEST_KEY_ID")
+    key_secret = getattr(settings, "RZP_TEST_KEY_SECRET", None) or os.getenv("RZP_TEST_KEY_SECRET")
+    return key_id, key_secret
+
+
+def get_gateway() -> RazorpayGateway:
+    """Return the process-wide gateway for the configured credentials."""
+    key_id, key_secret = get_gateway_credentials()
+    if not key_id or not key_secret:
+        raise GatewayNotConfigured("Payment gateway not configured.")
+
+    base_url = getattr(settings, "RZP_API_BASE_URL", "")
+    cache_key = (key_id, key_secret, base_url)
+    gateway = _gateways.get(cache_key)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(cache_key)
+            if gateway is None:
+                gateway = RazorpayGateway(
+                    key_id,
+                    key_secret,
+                    base_url=base_url,
+                    timeout=getattr(settings, "RZP_TIMEOUT_SECONDS", 10.0),
+                    pool_maxsize=getattr(settings, "RZP_POOL_MAXSIZE", 10),
+                    breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, "RZP_CIRCUIT_FAILURE_THRESHOLD", 5),
+                        reset_timeout=getattr(settings, "RZP_CIRCUIT_RESET_SECONDS", 30.0),
+                    ),
+                )
+                _gateways[cache_key] = gateway
+    return gateway
+
+
+def get_retry_scheduler() -> RetryScheduler:
+    global _retry_scheduler
+    if _retry_scheduler is None:
+        with _gateways_lock:
+            if _retry_scheduler is None:
+                _retry_scheduler = RetryScheduler()
+    return _retry_scheduler
+
+
+def _observe_attempt(action_name: str, started: float, outcome: str) -> None:
+    GATEWAY_CALL_SECONDS.observe(time.perf_counter() - started, action=action_name, outcome=outcome)
+
+
+def retry_deadline(max_attempts: int, initial_backoff: float) -> float:
+    """
+    Seconds a call with retries may take: every attempt's HTTP timeout, the
+    backoff waits between them, and one second of scheduling slack.
+    """
+    call_timeout = getattr(settings, "RZP_TIMEOUT_SECONDS", 10.0)
+    backoff = sum(initial_backoff * (2 ** number) for number in range(max_attempts - 1))
+    return max_attempts * call_timeout + backoff + 1.0
+
+
+def call_once(operation, *, action_name: str):
+    """One attempt on the calling thread, recorded in the gateway metrics."""
+    started = time.perf_counter()
+    try:
+        result = operation()
+    except GatewayCircuitOpen:
+        _observe_attempt(action_name, started, "circuit_open")
+        raise
+    except Exception:
+        _observe_attempt(action_name, started, "error")
+        raise
+    _observe_attempt(action_name, started, "ok")
+    return result
+
+
+def submit_with_retry(
+    operation,
+    *,
+    action_name: str,
+    max_attempts: int,
+    initial_backoff: float,
+    is_retryable,
+    deadline: float | None = None,
+    first_attempt: int = 0,
+) -> Future:
+    """
+    Run `operation()` on the retry executor and return a Future.
+
+    Backoff between attempts is scheduled on the timer thread, so neither the
+    caller nor an executor thread sleeps while waiting for the next attempt.
+    No attempt starts once the Future is cancelled (the caller gave up) or
+    `deadline` seconds have passed; a retry that would start after the
+    deadline fails the Future with the last error instead. `first_attempt`
+    continues a sequence whose earlier attempts ran elsewhere.
+    """
+    future: Future = Future()
+    scheduler = get_retry_scheduler()
+    expires_at = time.monotonic() + deadline if deadline is not None else None
+
+    def settle(exc=None, result=None) -> None:
+        try:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            # Cancelled while this attempt was in flight.
+            logger.warning("%s finished after its caller gave up (%s).", action_name, exc or "succeeded")
+
+    def attempt(number: int) -> None:
+        if future.cancelled():
+            logger.info("Not retrying %s: the caller gave up.", action_name)
+            return
+        if expires_at is not None and time.monotonic() >= expires_at:
+            settle(GatewayTimeout(f"{action_name} did not complete within {deadline:.1f} seconds."))
+            return
+        try:
+            result = call_once(operation, action_name=action_name)
+        except GatewayCircuitOpen as exc:
+            settle(exc)
+        except Exception as exc:
+            delay = initial_backoff * (2 ** number)
+            if (
+                not is_retryable(exc)
+                or number >= max_attempts - 1
+                or future.cancelled()
+                or (expires_at is not None and time.monotonic() + delay >= expires_at)
+            ):
+                settle(exc)
+                return
+            logger.info("Retrying %s in %.2fs after transient error: %s", action_name, delay, exc)
+            GATEWAY_RETRIES.inc(action=action_name)
+            scheduler.call_later(delay, lambda: attempt(number + 1))
+        else:
+            settle(result=result)
+
+    delay = initial_backoff * (2 ** (first_attempt - 1)) if first_attempt else 0
+    scheduler.call_later(delay, lambda: attempt(first_attempt))
+    return future
+
+
+def call_with_retry(
+    operation,
+    *,
+    action_name: str,
+    max_attempts: int,
+    initial_backoff: float,
+    is_retryable,
+    deadline: float,
+):
+    """
+    Blocking call with retries for sync callers. The first attempt runs on
+    the calling thread, so a call that succeeds holds no second thread; only
+    retries go through `submit_with_retry`. Raises GatewayTimeout once
+    `deadline` seconds have passed, after cancelling the remaining attempts.
+    An attempt already in flight at that point cannot be stopped and may
+    still complete at the provider.
+    """
+    expires_at = time.monotonic() + deadline
+    try:
+        return call_once(operation, action_name=action_name)
+    except GatewayCircuitOpen:
+        raise
+    except Exception as exc:
+        if not is_retryable(exc) or max_attempts <= 1 or time.monotonic() + initial_backoff >= expires_at:
+            raise
+        logger.info("Retrying %s in %.2fs after transient error: %s", action_name, initial_backoff, exc)
+        GATEWAY_RETRIES.inc(action=action_name)
+
+    remaining = expires_at - time.monotonic()
+    future = submit_with_retry(
+        operation,
+        action_name=action_name,
+        max_attempts=max_attempts,
+        initial_backoff=initial_backoff,
+        is_retryable=is_retryable,
+        deadline=remaining,
+        first_attempt=1,
+    )
+    try:
+        return future.result(timeout=remaining)
+    except TimeoutError as exc:
+        future.cancel()
+        raise GatewayTimeout(f"{action_name} did not complete within {deadline:.1f} seconds.") from exc
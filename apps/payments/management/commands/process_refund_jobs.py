@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.services import RefundJobService
+
+
+class Command(BaseCommand):
+    help = "Execute queued gateway refunds (RefundJob) with retries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process one batch and exit.")
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = RefundJobService.process_due_jobs(limit=options["batch_size"])
+            if processed:
+                self.stdout.write(f"Processed {processed} refund job(s).")
+            if options["once"]:
+                return
+            if not processed:
+                time.sleep(options["poll_interval"])
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.services import WebhookEventService
+
+
+class Command(BaseCommand):
+    help = "Apply recorded gateway webhook events (WebhookEvent) to payments and bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process one batch and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the log is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = WebhookEventService.process_pending(limit=options["batch_size"])
+            if processed:
+                self.stdout.write(f"Processed {processed} webhook event(s).")
+            if options["once"]:
+                return
+            if not processed:
+                time.sleep(options["poll_interval"])
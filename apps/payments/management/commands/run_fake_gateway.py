@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.payments.fake_gateway import FakeRazorpayServer
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Razorpay API (orders and refunds) for development and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=9010)
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial latency per request.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+
+    def handle(self, *args, **options):
+        server = FakeRazorpayServer(
+            options["host"],
+            options["port"],
+            latency=options["latency_ms"] / 1000,
+            failure_rate=options["failure_rate"],
+            verbose=options["verbosity"] > 1,
+        )
+        self.stdout.write(
+            f"Fake Razorpay API listening on {server.base_url} "
+            f"(set RZP_API_BASE_URL={server.base_url})"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -135,3 +135,116 @@ class Payment(TimeStampedModel):
     @property
     def can_be_refunded(self) -> bool:
         return self.status == self.Status.COMPLETED and self.refund_amount < self.amount
+
+
+class RefundJob(TimeStampedModel):
+    """
+    Durable queue entry for a gateway refund.
+
+    Cancellation only enqueues the job inside its transaction; the refund call
+    itself runs afterwards in a worker (`manage.py process_refund_jobs`).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name="refund_jobs",
+        help_text="Captured payment to refund.",
+    )
+    booking = models.ForeignKey(
+        "bookings.Booking",
+        on_delete=models.CASCADE,
+        related_name="refund_jobs",
+        help_text="Booking whose cancellation triggered the refund.",
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Amount to refund; empty means the full remaining amount.",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    idempotency_key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text=(
+            "Sent as the refund receipt and in its notes; retries look for a refund carrying it "
+            "before creating another, since the gateway does not dedupe receipts."
+        ),
+    )
+    notes = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Earliest time the worker may pick the job up again.",
+    )
+    last_error = models.TextField(blank=True, default="")
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"RefundJob {self.id} for payment {self.payment_id} ({self.status})"
+
+    @property
+    def is_in_progress(self) -> bool:
+        return self.status in (self.Status.PENDING, self.Status.PROCESSING)
+
+
+class WebhookEvent(TimeStampedModel):
+    """
+    Append-only log of verified gateway webhook deliveries.
+
+    The webhook view only inserts rows (deduplicated by `event_id`); a worker
+    applies them to Payment/Booking in batches (`manage.py process_webhook_events`).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSED = "processed", "Processed"
+        IGNORED = "ignored", "Ignored"
+        FAILED = "failed", "Failed"
+
+    provider = models.CharField(max_length=32, default="razorpay")
+    event_id = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="Provider event ID (X-Razorpay-Event-Id); duplicates are dropped on insert.",
+    )
+    event_type = models.CharField(max_length=64, db_index=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"WebhookEvent {self.event_id} ({self.event_type}, {self.status})"
@@ -1 +1,424 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
 
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.payments.models import Payment, RefundJob, WebhookEvent
+from apps.payments.signals import refund_job_status_changed
+
+
+logger = logging.getLogger(__name__)
+
+_job_executor: ThreadPoolExecutor | None = None
+_job_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """
+    Pool for refund jobs and webhook batches dispatched after commit. Separate
+    from the gateway retry executor: a job blocks on gateway calls scheduled
+    there, and must never occupy the threads those calls need.
+    """
+    global _job_executor
+    if _job_executor is None:
+        with _job_executor_lock:
+            if _job_executor is None:
+                _job_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "PAYMENT_JOB_CONCURRENCY", 2),
+                    thread_name_prefix="payment-jobs",
+                )
+    return _job_executor
+
+
+class RefundJobService:
+    """Enqueues gateway refunds and executes them outside request transactions."""
+
+    RETRY_BASE_SECONDS = 30
+    STALE_PROCESSING_SECONDS = 10 * 60
+
+    @staticmethod
+    def enqueue(
+        payment: Payment,
+        booking,
+        amount: Decimal | None = None,
+        notes: dict | None = None,
+    ) -> RefundJob:
+        """
+        Create a pending refund job. Call inside the cancelling transaction;
+        the job is handed to the background dispatcher only after commit.
+        """
+        job = RefundJob.objects.create(
+            payment=payment,
+            booking=booking,
+            amount=amount,
+            notes=notes or {},
+            idempotency_key=f"rfjob_{uuid.uuid4().hex}",
+        )
+        if getattr(settings, "REFUND_JOBS_DISPATCH_ON_COMMIT", True):
+            transaction.on_commit(lambda: RefundJobService.dispatch(job.id))
+        return job
+
+    @staticmethod
+    def dispatch(job_id) -> None:
+        """Process one job on the job executor without blocking the caller."""
+
+        def run():
+            try:
+                job = RefundJobService.claim_job(job_id)
+                if job is not None:
+                    RefundJobService.process_job(job)
+            except Exception:
+                logger.exception("Inline dispatch of refund job %s failed; the worker will retry it.", job_id)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        get_job_executor().submit(run)
+
+    @staticmethod
+    def _due_jobs_filter() -> Q:
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=RefundJobService.STALE_PROCESSING_SECONDS)
+        return (
+            Q(status=RefundJob.Status.PENDING)
+            & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        ) | Q(status=RefundJob.Status.PROCESSING, updated_at__lt=stale_before)
+
+    @staticmethod
+    def _locked_queryset():
+        queryset = RefundJob.objects.all()
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        elif connection.features.has_select_for_update:
+            queryset = queryset.select_for_update()
+        return queryset
+
+    @staticmethod
+    def _mark_processing(job: RefundJob) -> RefundJob:
+        previous_status = job.status
+        job.status = RefundJob.Status.PROCESSING
+        job.attempts += 1
+        job.save(update_fields=["status", "attempts", "updated_at"])
+        RefundJobService._notify(job, previous_status)
+        return job
+
+    @staticmethod
+    def claim_job(job_id) -> RefundJob | None:
+        """Claim a specific job if it is due; returns None when another worker owns it."""
+        with transaction.atomic():
+            job = (
+                RefundJobService._locked_queryset()
+                .filter(RefundJobService._due_jobs_filter(), id=job_id)
+                .first()
+            )
+            if job is None:
+                return None
+            return RefundJobService._mark_processing(job)
+
+    @staticmethod
+    def claim_due_jobs(limit: int = 10) -> list[RefundJob]:
+        """Claim up to `limit` due jobs, skipping rows locked by other workers."""
+        with transaction.atomic():
+            jobs = list(
+                RefundJobService._locked_queryset()
+                .filter(RefundJobService._due_jobs_filter())
+                .order_by("created_at")[:limit]
+            )
+            return [RefundJobService._mark_processing(job) for job in jobs]
+
+    @staticmethod
+    def process_job(job: RefundJob) -> RefundJob:
+        """Execute one claimed job and record the outcome."""
+        from apps.bookings.services import PaymentService
+
+        payment = Payment.objects.get(pk=job.payment_id)
+        success, message = RefundJobService._find_earlier_refund(job, payment)
+        if not success and not message:
+            success, message, _ = PaymentService.create_razorpay_refund(
+                payment,
+                amount=job.amount,
+                notes={**job.notes, "refund_job": job.idempotency_key},
+                receipt=job.idempotency_key,
+            )
+
+        previous_status = job.status
+        if success:
+            job.status = RefundJob.Status.SUCCEEDED
+            job.last_error = ""
+            job.completed_at = timezone.now()
+            job.next_attempt_at = None
+        elif job.attempts >= job.max_attempts:
+            job.status = RefundJob.Status.FAILED
+            job.last_error = message
+            job.completed_at = timezone.now()
+            job.next_attempt_at = None
+        else:
+            job.status = RefundJob.Status.PENDING
+            job.last_error = message
+            job.next_attempt_at = timezone.now() + timedelta(
+                seconds=RefundJobService.RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+            )
+
+        job.save(update_fields=["status", "last_error", "completed_at", "next_attempt_at", "updated_at"])
+        RefundJobService._notify(job, previous_status)
+        return job
+
+    @staticmethod
+    def _find_earlier_refund(job: RefundJob, payment: Payment) -> tuple[bool, str]:
+        """
+        On a retry, an earlier attempt may have created the refund even though
+        its response was lost. Returns (True, message) after recording such a
+        refund, (False, error) when the gateway could not be asked, and
+        (False, "") when a new refund should be created.
+        """
+        from apps.bookings.services import PaymentService
+
+        if job.attempts <= 1:
+            return False, ""
+        try:
+            refund = PaymentService.find_razorpay_refund(payment, job.idempotency_key)
+        except Exception as exc:
+            return False, f"Could not check for an earlier refund: {exc}"
+        if refund is None:
+            return False, ""
+        amount = Decimal(int(refund.get("amount") or 0)) / 100
+        PaymentService.record_refund(payment, refund.get("id", ""), amount)
+        return True, "Refund found at the gateway from an earlier attempt."
+
+    @staticmethod
+    def process_due_jobs(limit: int = 10) -> int:
+        """Claim and process one batch of due jobs; returns how many ran."""
+        jobs = RefundJobService.claim_due_jobs(limit=limit)
+        for job in jobs:
+            try:
+                RefundJobService.process_job(job)
+            except Exception:
+                logger.exception("Refund job %s crashed; it will be retried once stale.", job.id)
+        return len(jobs)
+
+    @staticmethod
+    def _notify(job: RefundJob, previous_status: str) -> None:
+        if previous_status == job.status:
+            return
+        refund_job_status_changed.send(
+            sender=RefundJob,
+            job=job,
+            previous_status=previous_status,
+            status=job.status,
+        )
+
+
+class WebhookEventService:
+    """Records verified gateway webhooks and applies them to payments in batches."""
+
+    HANDLED_EVENT_TYPES = ("payment.captured", "payment.failed", "refund.processed")
+
+    @staticmethod
+    def record(event_id: str, event_type: str, payload: dict) -> None:
+        """
+        Append the event with a single INSERT; redeliveries of the same
+        event_id are dropped by the unique constraint.
+        """
+        status = (
+            WebhookEvent.Status.PENDING
+            if event_type in WebhookEventService.HANDLED_EVENT_TYPES
+            else WebhookEvent.Status.IGNORED
+        )
+        WebhookEvent.objects.bulk_create(
+            [
+                WebhookEvent(
+                    event_id=event_id,
+                    event_type=event_type,
+                    payload=payload,
+                    status=status,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        if status == WebhookEvent.Status.PENDING and getattr(
+            settings, "WEBHOOK_EVENTS_DISPATCH_ON_COMMIT", True
+        ):
+            transaction.on_commit(WebhookEventService.dispatch)
+
+    @staticmethod
+    def dispatch() -> None:
+        """Process one pending batch on the job executor without blocking the caller."""
+
+        def run():
+            try:
+                WebhookEventService.process_pending()
+            except Exception:
+                logger.exception("Inline webhook batch failed; the worker will retry it.")
+            finally:
+                close_old_connections()
+                connection.close()
+
+        get_job_executor().submit(run)
+
+    @staticmethod
+    def process_pending(limit: int = 100) -> int:
+        """
+        Apply one batch of pending events in order; returns how many were
+        handled. Events still waiting on another event stay pending.
+        """
+        with transaction.atomic():
+            queryset = WebhookEvent.objects.filter(status=WebhookEvent.Status.PENDING)
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            elif connection.features.has_select_for_update:
+                queryset = queryset.select_for_update()
+            events = list(queryset.order_by("created_at")[:limit])
+            if not events:
+                return 0
+
+            entities = [WebhookEventService._entity(event) for event in events]
+            order_ids = {entity.get("order_id") for entity in entities if entity.get("order_id")}
+            gateway_payment_ids = {
+                entity.get("payment_id") for entity in entities if entity.get("payment_id")
+            }
+            payments_by_order = {
+                payment.gateway_order_id: payment
+                for payment in Payment.objects.select_related("booking").filter(
+                    gateway_order_id__in=order_ids
+                )
+            }
+            payments_by_gateway_id = {
+                payment.gateway_payment_id: payment
+                for payment in Payment.objects.select_related("booking").filter(
+                    gateway_payment_id__in=gateway_payment_ids
+                )
+            }
+
+            now = timezone.now()
+            deferred = []
+            for event, entity in zip(events, entities):
+                WebhookEventService._apply_event(event, entity, payments_by_order, payments_by_gateway_id)
+                if event.status == WebhookEvent.Status.PENDING:
+                    deferred.append((event, entity))
+
+            # Razorpay does not order deliveries: a refund can arrive ahead of
+            # the capture it refunds. Retry those once the rest of the batch is
+            # applied, then leave them for a later batch until they go stale.
+            defer_cutoff = now - timedelta(seconds=getattr(settings, "WEBHOOK_EVENT_DEFER_SECONDS", 3600))
+            for event, entity in deferred:
+                WebhookEventService._apply_event(event, entity, payments_by_order, payments_by_gateway_id)
+                if event.status == WebhookEvent.Status.PENDING and event.created_at < defer_cutoff:
+                    event.status = WebhookEvent.Status.IGNORED
+
+            handled = 0
+            for event in events:
+                if event.status != WebhookEvent.Status.PENDING:
+                    event.processed_at = now
+                    handled += 1
+                event.updated_at = now
+
+            WebhookEvent.objects.bulk_update(
+                events, ["status", "error", "processed_at", "updated_at"]
+            )
+            return handled
+
+    @staticmethod
+    def _apply_event(
+        event: WebhookEvent,
+        entity: dict,
+        payments_by_order: dict[str, Payment],
+        payments_by_gateway_id: dict[str, Payment],
+    ) -> None:
+        try:
+            with transaction.atomic():
+                event.status, event.error = WebhookEventService._apply(
+                    event.event_type,
+                    entity,
+                    payments_by_order,
+                    payments_by_gateway_id,
+                )
+        except Exception as exc:
+            logger.exception("Failed to apply webhook event %s.", event.event_id)
+            event.status = WebhookEvent.Status.FAILED
+            event.error = str(exc)
+
+    @staticmethod
+    def _entity(event: WebhookEvent) -> dict:
+        key = "refund" if event.event_type.startswith("refund.") else "payment"
+        payload = event.payload.get("payload") or {}
+        return (payload.get(key) or {}).get("entity") or {}
+
+    @staticmethod
+    def _apply(
+        event_type: str,
+        entity: dict,
+        payments_by_order: dict[str, Payment],
+        payments_by_gateway_id: dict[str, Payment],
+    ) -> tuple[str, str]:
+        if event_type == "payment.captured":
+            return WebhookEventService._apply_payment_captured(entity, payments_by_order, payments_by_gateway_id)
+        if event_type == "payment.failed":
+            return WebhookEventService._apply_payment_failed(entity, payments_by_order)
+        if event_type == "refund.processed":
+            return WebhookEventService._apply_refund_processed(entity, payments_by_gateway_id)
+        return WebhookEvent.Status.IGNORED, f"Unhandled event type '{event_type}'."
+
+    @staticmethod
+    def _apply_payment_captured(
+        entity: dict,
+        payments_by_order: dict[str, Payment],
+        payments_by_gateway_id: dict[str, Payment],
+    ) -> tuple[str, str]:
+        from apps.bookings.models import Booking
+        from apps.bookings.services import PaymentService
+
+        payment = payments_by_order.get(entity.get("order_id", ""))
+        if payment is None:
+            return WebhookEvent.Status.IGNORED, "No payment found for order."
+        if payment.status != Payment.Status.PENDING and payment.status != Payment.Status.FAILED:
+            return WebhookEvent.Status.PROCESSED, ""
+
+        booking = payment.booking
+        gateway_payment_id = entity.get("id", "")
+        if booking.status == Booking.Status.PENDING_PAYMENT:
+            PaymentService.mark_payment_captured(booking, payment, razorpay_payment_id=gateway_payment_id)
+        else:
+            # Captured after the booking was cancelled (e.g. payment window
+            # expired): keep the money trail and send it back.
+            payment.status = Payment.Status.COMPLETED
+            payment.gateway_payment_id = gateway_payment_id
+            payment.save(update_fields=["status", "gateway_payment_id", "updated_at"])
+            RefundJobService.enqueue(
+                payment,
+                booking,
+                notes={"booking_id": str(booking.id), "reason": "captured_after_cancellation"},
+            )
+        payments_by_gateway_id[gateway_payment_id] = payment
+        return WebhookEvent.Status.PROCESSED, ""
+
+    @staticmethod
+    def _apply_payment_failed(entity: dict, payments_by_order: dict[str, Payment]) -> tuple[str, str]:
+        payment = payments_by_order.get(entity.get("order_id", ""))
+        if payment is None:
+            return WebhookEvent.Status.IGNORED, "No payment found for order."
+        if payment.status != Payment.Status.PENDING:
+            return WebhookEvent.Status.PROCESSED, ""
+
+        payment.status = Payment.Status.FAILED
+        payment.failure_reason = entity.get("error_description") or "Payment failed at gateway."
+        payment.save(update_fields=["status", "failure_reason", "updated_at"])
+        return WebhookEvent.Status.PROCESSED, ""
+
+    @staticmethod
+    def _apply_refund_processed(entity: dict, payments_by_gateway_id: dict[str, Payment]) -> tuple[str, str]:
+        from apps.bookings.services import PaymentService
+
+        payment = payments_by_gateway_id.get(entity.get("payment_id", ""))
+        if payment is None:
+            return WebhookEvent.Status.PENDING, "No captured payment for refund yet."
+
+        amount = Decimal(int(entity.get("amount") or 0)) / 100
+        PaymentService.record_refund(payment, entity.get("id", ""), amount)
+        return WebhookEvent.Status.PROCESSED, ""
@@ -0,0 +1,11 @@
+"""
+Signals emitted by the payments app.
+
+`refund_job_status_changed` fires after every RefundJob status transition
+with `job`, `previous_status` and `status` keyword arguments.
+"""
+
+from django.dispatch import Signal
+
+
+refund_job_status_changed = Signal()
@@ -0,0 +1,280 @@
+import hashlib
+import hmac
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.bookings.services import BookingService
+from apps.listings.models import Listing
+from apps.payments.models import Payment, RefundJob, WebhookEvent
+from apps.payments.services import RefundJobService, WebhookEventService
+from apps.users.models import User
+
+
+class FakeGateway:
+    """Records refunds like Razorpay: no dedupe by receipt, listable per payment."""
+
+    def __init__(self, fail_refunds: int = 0, lose_responses: int = 0):
+        self.refunds: list[dict] = []
+        self.refund_calls = 0
+        self.fail_refunds = fail_refunds
+        self.lose_responses = lose_responses
+
+    def refund_payment(self, gateway_payment_id: str, refund_data: dict) -> dict:
+        self.refund_calls += 1
+        if self.fail_refunds:
+            self.fail_refunds -= 1
+            raise RuntimeError("503 service unavailable")
+        refund = {"id": f"rfnd_{len(self.refunds) + 1}", "payment_id": gateway_payment_id, **refund_data}
+        self.refunds.append(refund)
+        if self.lose_responses:
+            # The refund exists at the gateway, but the response never arrives.
+            self.lose_responses -= 1
+            raise TimeoutError("Read timed out.")
+        return refund
+
+    def fetch_refunds(self, gateway_payment_id: str) -> list[dict]:
+        return [refund for refund in self.refunds if refund["payment_id"] == gateway_payment_id]
+
+
+@override_settings(RZP_TEST_KEY_ID="rzp_test_key", RZP_TEST_KEY_SECRET="secret")
+class RefundJobTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(email="host@example.com", username="host", password=None)
+        self.guest = User.objects.create_user(email="guest@example.com", username="guest", password=None)
+        listing = Listing.objects.create(
+            host=self.host, title="Cabin", description="", location="Manali", price_per_night=Decimal("1000")
+        )
+        self.booking = Booking.objects.create(
+            listing=listing,
+            guest=self.guest,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=12),
+            total_price=Decimal("2000"),
+            status=Booking.Status.CONFIRMED,
+        )
+        self.payment = Payment.objects.create(
+            booking=self.booking,
+            amount=Decimal("2000"),
+            status=Payment.Status.COMPLETED,
+            gateway_order_id="order_1",
+            gateway_payment_id="pay_1",
+        )
+        self.gateway = FakeGateway()
+        patcher = mock.patch("apps.bookings.services.get_gateway", return_value=self.gateway)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, **fields) -> RefundJob:
+        with self.captureOnCommitCallbacks():
+            job = RefundJobService.enqueue(self.payment, self.booking)
+        RefundJob.objects.filter(pk=job.pk).update(**fields)
+        return RefundJob.objects.get(pk=job.pk)
+
+    def _run(self, job: RefundJob) -> RefundJob:
+        # Make the job due again, as the worker would find it after its backoff.
+        RefundJob.objects.filter(pk=job.pk).update(next_attempt_at=None)
+        claimed = RefundJobService.claim_job(job.pk)
+        self.assertIsNotNone(claimed)
+        return RefundJobService.process_job(claimed)
+
+    def test_cancellation_enqueues_one_job_dispatched_after_commit(self):
+        with mock.patch.object(RefundJobService, "dispatch") as dispatch:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                ok, _, code = BookingService.cancel_booking(self.booking, self.guest, reason="Plans changed")
+                # Nothing is dispatched before the cancelling transaction commits.
+                dispatch.assert_not_called()
+            self.booking.refresh_from_db()
+            ok_again, _, _ = BookingService.cancel_booking(self.booking, self.guest)
+
+        self.assertTrue(ok)
+        self.assertEqual(code, "refund_initiated")
+        self.assertFalse(ok_again)
+        job = RefundJob.objects.get()
+        self.assertEqual(job.payment, self.payment)
+        self.assertEqual(job.status, RefundJob.Status.PENDING)
+        self.assertEqual(len(callbacks), 1)
+        dispatch.assert_called_once_with(job.id)
+        self.assertEqual(self.gateway.refund_calls, 0)
+
+    def test_retry_records_the_refund_an_earlier_attempt_created(self):
+        self.gateway.lose_responses = 1
+        job = self._enqueue()
+
+        job = self._run(job)
+        self.assertEqual(job.status, RefundJob.Status.PENDING)
+        self.assertEqual(len(self.gateway.refunds), 1)
+        self.assertEqual(self.gateway.refunds[0]["receipt"], job.idempotency_key)
+
+        job = self._run(job)
+        self.assertEqual(job.status, RefundJob.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        # The retry found the first refund instead of creating another.
+        self.assertEqual(self.gateway.refund_calls, 1)
+        self.assertEqual(len(self.gateway.refunds), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.refund_amount, Decimal("2000"))
+        self.assertEqual(self.payment.status, Payment.Status.REFUNDED)
+
+    def test_claimed_job_is_not_claimed_again_until_stale(self):
+        job = self._enqueue()
+
+        claimed = RefundJobService.claim_job(job.pk)
+        self.assertEqual(claimed.status, RefundJob.Status.PROCESSING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(RefundJobService.claim_job(job.pk))
+        self.assertEqual(RefundJobService.claim_due_jobs(), [])
+
+        stale = timezone.now() - timedelta(seconds=RefundJobService.STALE_PROCESSING_SECONDS + 1)
+        RefundJob.objects.filter(pk=job.pk).update(updated_at=stale)
+        reclaimed = RefundJobService.claim_due_jobs()
+        self.assertEqual([j.pk for j in reclaimed], [job.pk])
+        self.assertEqual(reclaimed[0].attempts, 2)
+
+    def test_job_fails_for_good_after_max_attempts(self):
+        self.gateway.fail_refunds = 10
+        job = self._enqueue(max_attempts=2)
+
+        job = self._run(job)
+        self.assertEqual(job.status, RefundJob.Status.PENDING)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertIsNone(RefundJobService.claim_job(job.pk))
+
+        with mock.patch("apps.payments.services.refund_job_status_changed.send") as send:
+            job = self._run(job)
+        self.assertEqual(job.status, RefundJob.Status.FAILED)
+        self.assertIsNotNone(job.completed_at)
+        self.assertIsNone(job.next_attempt_at)
+        self.assertIn("503", job.last_error)
+        self.assertEqual(send.call_args.kwargs["status"], RefundJob.Status.FAILED)
+        self.assertIsNone(RefundJobService.claim_job(job.pk))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.refund_amount, Decimal("0"))
+
+
+@override_settings(RZP_WEBHOOK_SECRET="whsec", WEBHOOK_EVENTS_DISPATCH_ON_COMMIT=False)
+class RazorpayWebhookTests(TestCase):
+    url = "/api/v1/payments/webhooks/razorpay/"
+
+    def setUp(self):
+        host = User.objects.create_user(email="host@example.com", username="host", password=None)
+        guest = User.objects.create_user(email="guest@example.com", username="guest", password=None)
+        listing = Listing.objects.create(
+            host=host, title="Cabin", description="", location="Manali", price_per_night=Decimal("1000")
+        )
+        self.booking = Booking.objects.create(
+            listing=listing,
+            guest=guest,
+            check_in=date.today() + timedelta(days=10),
+            check_out=date.today() + timedelta(days=12),
+            total_price=Decimal("2000"),
+            status=Booking.Status.PENDING_PAYMENT,
+        )
+        self.payment = Payment.objects.create(
+            booking=self.booking,
+            amount=Decimal("2000"),
+            status=Payment.Status.PENDING,
+            gateway_order_id="order_1",
+        )
+
+    def _deliver(self, event_id: str, event: str, entity: dict, signature: str | None = None):
+        key = "refund" if event.startswith("refund.") else "payment"
+        body = json.dumps({"event": event, "payload": {key: {"entity": entity}}}).encode()
+        if signature is None:
+            signature = hmac.new(b"whsec", body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            self.url,
+            body,
+            content_type="application/json",
+            headers={"X-Razorpay-Signature": signature, "X-Razorpay-Event-Id": event_id},
+        )
+
+    def _captured(self, event_id: str = "evt_captured"):
+        return self._deliver(event_id, "payment.captured", {"id": "pay_1", "order_id": "order_1", "amount": 200000})
+
+    def _refunded(self, event_id: str = "evt_refund", amount: int = 200000):
+        return self._deliver(event_id, "refund.processed", {"id": "rfnd_1", "payment_id": "pay_1", "amount": amount})
+
+    def test_bad_signature_is_rejected_and_not_stored(self):
+        response = self._deliver(
+            "evt_captured", "payment.captured", {"id": "pay_1", "order_id": "order_1"}, signature="0" * 64
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "invalid_signature")
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_duplicate_delivery_is_stored_and_applied_once(self):
+        self._captured()
+        self.assertEqual(WebhookEventService.process_pending(), 1)
+        self._refunded()
+        response = self._refunded()
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.filter(event_id="evt_refund").count(), 1)
+        self.assertEqual(WebhookEventService.process_pending(), 1)
+        self.assertEqual(WebhookEventService.process_pending(), 0)
+        # A redelivery under a new event id is still recorded against the payment once.
+        self._refunded(event_id="evt_refund_again")
+        self.assertEqual(WebhookEventService.process_pending(), 1)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.refund_amount, Decimal("2000"))
+        self.assertEqual(self.payment.metadata["refund_ids"], ["rfnd_1"])
+
+    def test_refund_delivered_before_capture_in_one_batch(self):
+        self._refunded()
+        self._captured()
+
+        self.assertEqual(WebhookEventService.process_pending(), 2)
+
+        self.booking.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.Status.CONFIRMED)
+        self.assertEqual(self.payment.gateway_payment_id, "pay_1")
+        self.assertEqual(self.payment.status, Payment.Status.REFUNDED)
+        self.assertEqual(self.payment.refund_amount, Decimal("2000"))
+        self.assertFalse(WebhookEvent.objects.filter(status=WebhookEvent.Status.PENDING).exists())
+
+    def test_refund_waits_for_a_capture_delivered_in_a_later_batch(self):
+        self._refunded(amount=50000)
+        self.assertEqual(WebhookEventService.process_pending(), 0)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.refund_amount, Decimal("0"))
+
+        self._captured()
+        self.assertEqual(WebhookEventService.process_pending(), 2)
+
+        self.booking.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.Status.CONFIRMED)
+        self.assertEqual(self.payment.status, Payment.Status.PARTIALLY_REFUNDED)
+        self.assertEqual(self.payment.refund_amount, Decimal("500"))
+
+    def test_capture_redelivered_after_refund_does_not_reopen_the_payment(self):
+        self._captured()
+        self._refunded()
+        self.assertEqual(WebhookEventService.process_pending(), 2)
+
+        self._captured(event_id="evt_captured_late")
+        self.assertEqual(WebhookEventService.process_pending(), 1)
+
+        self.booking.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.Status.CONFIRMED)
+        self.assertEqual(self.payment.status, Payment.Status.REFUNDED)
+        self.assertEqual(self.payment.refund_amount, Decimal("2000"))
+
+    def test_refund_for_an_unknown_payment_is_ignored_once_stale(self):
+        self._deliver("evt_stray", "refund.processed", {"id": "rfnd_9", "payment_id": "pay_9", "amount": 100})
+        self.assertEqual(WebhookEventService.process_pending(), 0)
+
+        stale = timezone.now() - timedelta(hours=2)
+        WebhookEvent.objects.filter(event_id="evt_stray").update(created_at=stale)
+        self.assertEqual(WebhookEventService.process_pending(), 1)
+        self.assertEqual(WebhookEvent.objects.get(event_id="evt_stray").status, WebhookEvent.Status.IGNORED)
@@ -1,12 +1,16 @@
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common.conditional import Validators, conditional_get_enabled, latest
+from apps.common.row_serializers import row_serializers_enabled
+from apps.common.sparse_fields import requested_fields, trim
 from apps.listings.models import Listing
 from apps.reviews.models import Review
-from apps.reviews.serializers import ReviewCreateSerializer, ReviewSerializer
+from apps.reviews.serializers import ReviewCreateSerializer, ReviewRowSerializer, ReviewSerializer
 
 
 class ReviewListCreateView(APIView):
@@ -47,14 +51,39 @@ class ReviewListCreateView(APIView):
             .select_related("author")
             .order_by("-created_at")
         )
-        total = qs.count()
-        reviews = qs[offset : offset + limit]
-        serializer = ReviewSerializer(reviews, many=True, context={"request": request})
-        return Response({
-            "results": serializer.data,
+        # One aggregate gives the total and the page's validators: the
+        # reviews and their authors (name, avatar) are all it renders.
+        summary = Review.objects.filter(listing_id=listing_id).aggregate(
+            count=Count("id"),
+            changed=Max("updated_at"),
+            authors_changed=Max("author__updated_at"),
+        )
+        total = summary["count"]
+        validators = None
+        if conditional_get_enabled():
+            validators = Validators.for_request(
+                request,
+                total,
+                summary["changed"],
+                summary["authors_changed"],
+                last_modified=latest(summary["changed"], summary["authors_changed"]),
+            )
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+
+        if row_serializers_enabled():
+            rows = ReviewRowSerializer.queryset(qs)[offset : offset + limit]
+            results = ReviewRowSerializer(rows, context={"request": request}).data
+        else:
+            reviews = qs[offset : offset + limit]
+            results = ReviewSerializer(reviews, many=True, context={"request": request}).data
+        response = Response({
+            "results": trim(results, requested_fields(request)),
             "count": total,
             "next_offset": offset + limit if offset + limit < total else None,
         })
+        return validators.apply(response) if validators is not None else response
 
     def post(self, request):
         serializer = ReviewCreateSerializer(
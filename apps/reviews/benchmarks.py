@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.common.benchmarks import register, timed
+from apps.common.row_serializers import assert_same_json
+from apps.listings.models import Listing
+from apps.reviews.models import Review
+from apps.reviews.serializers import ReviewRowSerializer, ReviewSerializer
+from apps.users.models import User
+
+
+PAGE_ROWS = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+@register("reviews.row_serializers", "Serialize 1,000 reviews: ReviewSerializer vs .values() fast path")
+def row_serializers(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            host = User.objects.create_user(email="bench-host@example.com", username="bench-host", password=None)
+            authors = [
+                User.objects.create_user(
+                    email=f"bench-guest-{i}@example.com",
+                    username=f"bench-guest-{i}",
+                    password=None,
+                    avatar=f"avatars/bench-guest-{i}.jpg" if i % 2 else "",
+                )
+                for i in range(20)
+            ]
+            listing = Listing.objects.create(
+                host=host,
+                title="Benchmark listing",
+                description="",
+                location="Coorg",
+                price_per_night=Decimal("1800"),
+            )
+            Review.objects.bulk_create([
+                Review(
+                    listing=listing,
+                    author=authors[i % len(authors)],
+                    rating=i % 5 + 1,
+                    comment=f"Stay number {i} was lovely.",
+                )
+                for i in range(PAGE_ROWS)
+            ])
+            queryset = Review.objects.filter(listing=listing).select_related("author").order_by("-created_at")
+            request = RequestFactory().get("/api/v1/reviews/")
+
+            def model_serializer():
+                return ReviewSerializer(queryset, many=True, context={"request": request}).data
+
+            def row_serializer():
+                rows = ReviewRowSerializer.queryset(queryset)
+                return ReviewRowSerializer(rows, context={"request": request}).data
+
+            assert_same_json(model_serializer(), row_serializer())
+            results["ReviewSerializer"] = timed(model_serializer, iterations)
+            results["ReviewRowSerializer"] = timed(row_serializer, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+@register("reviews.list_page", "GET a listing's reviews (20-review page): ReviewSerializer vs .values() fast path")
+def list_page(iterations: int) -> dict[str, float]:
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory
+
+    from apps.reviews.api.views import ReviewListCreateView
+
+    results: dict[str, float] = {}
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"], CONDITIONAL_GET_ENABLED=False), transaction.atomic():
+            host = User.objects.create_user(email="bench-host@example.com", username="bench-host", password=None)
+            authors = [
+                User.objects.create_user(
+                    email=f"bench-guest-{i}@example.com",
+                    username=f"bench-guest-{i}",
+                    password=None,
+                    avatar=f"avatars/bench-guest-{i}.jpg" if i % 2 else "",
+                )
+                for i in range(20)
+            ]
+            listing = Listing.objects.create(
+                host=host,
+                title="Benchmark listing",
+                description="",
+                location="Coorg",
+                price_per_night=Decimal("1800"),
+            )
+            Review.objects.bulk_create([
+                Review(
+                    listing=listing,
+                    author=authors[i % len(authors)],
+                    rating=i % 5 + 1,
+                    comment=f"Stay number {i} was lovely.",
+                )
+                for i in range(60)
+            ])
+            factory = APIRequestFactory()
+            view = ReviewListCreateView.as_view(throttle_classes=[])
+            query = {"listing": str(listing.pk), "limit": 20}
+
+            def get():
+                response = view(factory.get("/api/v1/reviews/", query)).render()
+                assert response.status_code == 200
+                return response.content
+
+            with override_settings(ROW_SERIALIZERS_ENABLED=False):
+                expected = get()
+                results["ReviewSerializer"] = timed(get, iterations)
+            with override_settings(ROW_SERIALIZERS_ENABLED=True):
+                assert get() == expected, "Fast path response differs"
+                results["ReviewRowSerializer"] = timed(get, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
+from apps.common.row_serializers import RowSerializer
 from apps.reviews.models import Review
+from apps.users.avatars import resolve_avatar_name, resolve_avatar_url
 
 
 class ReviewAuthorSerializer(serializers.Serializer):
@@ -11,19 +13,7 @@ class ReviewAuthorSerializer(serializers.Serializer):
     avatar = serializers.SerializerMethodField()
 
     def get_avatar(self, obj) -> str | None:
-        author = obj.author
-        if not getattr(author, "avatar", None):
-            return None
-        try:
-            url = author.avatar.url
-            if isinstance(url, str) and url.startswith(("http://", "https://")):
-                return url
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(url)
-            return url
-        except Exception:
-            return None
+        return resolve_avatar_url(obj.author, self.context.get("request"))
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -37,6 +27,25 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class ReviewRowSerializer(RowSerializer):
+    """Fast path for `ReviewSerializer` over `.values()` rows."""
+
+    values = ("id", "author_id", "author__username", "author__avatar", "rating", "comment", "created_at")
+
+    def to_representation(self, row):
+        return {
+            "id": str(row["id"]),
+            "author": {
+                "id": str(row["author_id"]),
+                "name": row["author__username"],
+                "avatar": resolve_avatar_name(row["author__avatar"], self.context.get("request")),
+            },
+            "rating": row["rating"],
+            "comment": row["comment"],
+            "created_at": self.format_datetime(row["created_at"]),
+        }
+
+
 class ReviewCreateSerializer(serializers.Serializer):
     """Write serializer for creating a review."""
 
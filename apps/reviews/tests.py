@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase
+
+from apps.common.row_serializers import assert_same_json
+from apps.listings.models import Listing
+from apps.reviews.models import Review
+from apps.reviews.serializers import ReviewRowSerializer, ReviewSerializer
+from apps.users.models import User
+
+
+class ReviewRowSerializerTests(TestCase):
+    def test_renders_same_json_as_model_serializer(self):
+        host = User.objects.create_user(email="host@example.com", username="host", password=None)
+        authors = [
+            User.objects.create_user(
+                email=f"guest-{i}@example.com",
+                username=f"guest-{i}",
+                password=None,
+                avatar="avatars/guest.jpg" if i % 2 else "",
+            )
+            for i in range(3)
+        ]
+        listing = Listing.objects.create(
+            host=host, title="Coffee estate", description="", location="Coorg", price_per_night=Decimal("1800")
+        )
+        Review.objects.bulk_create([
+            Review(listing=listing, author=authors[i % 3], rating=i % 5 + 1, comment=f"Stay {i} was lovely." * (i % 2))
+            for i in range(6)
+        ])
+        queryset = Review.objects.filter(listing=listing).select_related("author").order_by("-created_at")
+        context = {"request": RequestFactory().get("/api/v1/reviews/")}
+
+        assert_same_json(
+            ReviewSerializer(queryset, many=True, context=context).data,
+            ReviewRowSerializer(ReviewRowSerializer.queryset(queryset), context=context).data,
+        )
@@ -2,6 +2,8 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 
 from .views import (
+    AvatarDirectUploadConfirmView,
+    AvatarDirectUploadView,
     AvatarUploadView,
     ChatKeyBackupView,
     EmailOrUsernameTokenObtainPairSerializer,
@@ -27,6 +29,12 @@ urlpatterns = [
     # Current user profile
     path("me/", MeView.as_view(), name="auth-me"),
     path("me/avatar/", AvatarUploadView.as_view(), name="auth-me-avatar"),
+    path("me/avatar/direct/", AvatarDirectUploadView.as_view(), name="auth-me-avatar-direct"),
+    path(
+        "me/avatar/direct/confirm/",
+        AvatarDirectUploadConfirmView.as_view(),
+        name="auth-me-avatar-direct-confirm",
+    ),
     path("me/chat-key/", ChatKeyBackupView.as_view(), name="auth-me-chat-key"),
 ]
 
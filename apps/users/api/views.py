@@ -7,6 +7,10 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.common.serializers import DirectUploadConfirmSerializer, DirectUploadRequestSerializer
+from apps.common.uploads import DirectUploadPolicy, confirm_direct_upload, issue_direct_upload
+from apps.users.models import UserChatKey
+from apps.users.selectors import get_users_by_email
 from apps.users.serializers import (
     ChatKeyBackupSerializer,
     RegisterSerializer,
@@ -17,6 +21,14 @@ from apps.users.serializers import (
 
 User = get_user_model()
 
+# Public ids live under the storage prefix (MEDIA_URL) so ImageField URLs resolve.
+AVATAR_UPLOAD = DirectUploadPolicy(
+    purpose="avatar",
+    folder="media/avatars",
+    allowed_types=frozenset({"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}),
+    max_bytes=5 * 1024 * 1024,
+)
+
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -111,7 +123,7 @@ class AvatarUploadView(generics.GenericAPIView):
         
         # Assign and save - Cloudinary storage will handle the upload
         user.avatar = avatar_file
-        user.save(update_fields=["avatar"])
+        user.save(update_fields=["avatar", "updated_at"])
         
         # Refresh from DB to ensure we have the latest Cloudinary URL
         user.refresh_from_db()
@@ -139,19 +151,86 @@ class AvatarUploadView(generics.GenericAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class AvatarDirectUploadView(generics.GenericAPIView):
+    """
+    Sign a direct-to-storage avatar upload.
+
+    Endpoint:
+      POST /api/v1/auth/me/avatar/direct/
+
+    Request: {"name": "me.jpg", "content_type": "image/jpeg", "size": 12345}
+    Response: {"method", "upload_url", "fields", "ticket", "expires_in", "max_bytes"}
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = DirectUploadRequestSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload, error = issue_direct_upload(request.user, AVATAR_UPLOAD, **serializer.validated_data)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(upload, status=status.HTTP_200_OK)
+
+
+class AvatarDirectUploadConfirmView(generics.GenericAPIView):
+    """
+    Confirm a direct avatar upload and make it the profile photo.
+
+    Endpoint:
+      POST /api/v1/auth/me/avatar/direct/confirm/
+
+    Request: {"ticket": "..."}
+    Response: updated user payload (same as /api/v1/auth/me/)
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = DirectUploadConfirmSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload, error = confirm_direct_upload(
+            request.user,
+            AVATAR_UPLOAD,
+            serializer.validated_data["ticket"],
+        )
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        if user.avatar:
+            try:
+                user.avatar.delete(save=False)
+            except Exception:
+                pass  # Ignore errors deleting old avatar
+
+        # The object is already in storage; only point the field at it.
+        user.avatar.name = upload["public_id"]
+        user.save(update_fields=["avatar", "updated_at"])
+
+        return Response(UserSerializer(user, context={"request": request}).data, status=status.HTTP_200_OK)
+
+
 class ChatKeyBackupView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChatKeyBackupSerializer
 
     def get(self, request, *args, **kwargs):
-        serializer = self.get_serializer(request.user)
+        serializer = self.get_serializer(request.user.get_chat_key())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(request.user, data=request.data)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(chat_key_uploaded_at=timezone.now())
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        chat_key, _ = UserChatKey.objects.update_or_create(
+            user=request.user,
+            defaults={**serializer.validated_data, "uploaded_at": timezone.now()},
+        )
+        return Response(self.get_serializer(chat_key).data, status=status.HTTP_200_OK)
 
 
 class EmailOrUsernameTokenObtainPairSerializer(serializers.Serializer):
@@ -177,10 +256,13 @@ class EmailOrUsernameTokenObtainPairSerializer(serializers.Serializer):
 
         # Look up user strictly by email (case-insensitive)
         try:
-            user = User.objects.get(email__iexact=email)
+            user = get_users_by_email(email).get()
         except User.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            User().set_password(password)
             user = None
 
+        # check_password also rehashes with the current hasher/cost on success.
         if user is None or not user.check_password(password) or not user.is_active:
             # Do not leak which part was wrong
             raise AuthenticationFailed(
@@ -5,3 +5,5 @@ class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
 
+    def ready(self):
+        import apps.users.signals  # noqa: F401
@@ -0,0 +1,75 @@
+"""
+JWT authentication that does not load the User row on every request.
+
+The only facts authentication needs about a token's user are that it exists
+and is active. They are kept in a short-lived principal cache
+(`AUTH_PRINCIPAL_CACHE_SECONDS`), and `request.user` is a real User instance
+with just `id` and `is_active` loaded. Every other column is deferred: the
+first read of any of them loads all of them in one query (see
+`User.refresh_from_db`). Saving or deleting a user that changes `is_active`
+or `password` drops the cached principal.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.common.cache import HOT, CacheNamespace
+
+
+principals = CacheNamespace("users:principal", alias=HOT)
+
+
+def get_principal(user_id) -> dict | None:
+    """`{"pk", "is_active"}` for the token's user id, or None if there is no such user."""
+    principal = principals.get([user_id])
+    if principal is not None:
+        return principal
+
+    User = get_user_model()
+    # Read from the primary: a replica may not have a just-registered user yet.
+    principal = (
+        User.objects.using(router.db_for_write(User))
+        .filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values("pk", "is_active")
+        .first()
+    )
+    if principal is None:
+        return None
+    timeout = getattr(settings, "AUTH_PRINCIPAL_CACHE_SECONDS", 60)
+    if timeout:
+        principals.set([user_id], principal, timeout=timeout)
+    return principal
+
+
+def invalidate_principal(user) -> None:
+    principals.delete([getattr(user, api_settings.USER_ID_FIELD)])
+
+
+class LightweightJWTAuthentication(JWTAuthentication):
+    """Drop-in replacement for SimpleJWT's JWTAuthentication."""
+
+    def get_user(self, validated_token):
+        if getattr(api_settings, "CHECK_REVOKE_TOKEN", False):
+            # Revocation compares against the password hash: needs the row.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken("Token contained no recognizable user identification") from exc
+
+        principal = get_principal(user_id)
+        if principal is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not principal["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        User = get_user_model()
+        loaded = {User._meta.pk.attname: User._meta.pk.to_python(principal["pk"]), "is_active": principal["is_active"]}
+        # from_db expects values in concrete-field order.
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in loaded]
+        # Bound to the primary, so deferred fields never load from a lagging replica.
+        return User.from_db(router.db_for_write(User), field_names, [loaded[name] for name in field_names])
@@ -0,0 +1,75 @@
+"""
+Single place to turn a user's avatar into the URL the API returns.
+
+Storage URLs are a pure function of the stored file name (every new avatar
+gets a new name), so they are kept in a process-wide LRU keyed by name. On
+top of that, each request memoizes its final (possibly absolute) URLs, so a
+page that mentions the same user many times resolves them once. Names
+whose URL cannot be built are not cached at either level, so they are
+retried on the next request.
+"""
+import logging
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousOperation
+
+
+logger = logging.getLogger(__name__)
+
+
+AVATAR_URL_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=AVATAR_URL_CACHE_SIZE)
+def _storage_url(name: str) -> str:
+    # Raises rather than returning a placeholder: lru_cache does not keep exceptions.
+    storage = get_user_model()._meta.get_field("avatar").storage
+    return str(storage.url(name))
+
+
+def _request_memo(request) -> dict[str, str] | None:
+    if request is None:
+        return None
+    request = getattr(request, "_request", request)
+    memo = getattr(request, "_avatar_url_memo", None)
+    if memo is None:
+        memo = {}
+        request._avatar_url_memo = memo
+    return memo
+
+
+def resolve_avatar_url(user, request=None) -> str | None:
+    """
+    Absolute URL of `user`'s avatar, or None when unset or unresolvable.
+    Cloudinary URLs are already absolute; relative ones are completed
+    with `request` when given.
+    """
+    avatar = getattr(user, "avatar", None)
+    if not avatar:
+        return None
+    return resolve_avatar_name(avatar.name, request)
+
+
+def resolve_avatar_name(name: str | None, request=None) -> str | None:
+    """Same as `resolve_avatar_url`, from the stored file name (e.g. a `.values()` column)."""
+    if not name:
+        return None
+
+    memo = _request_memo(request)
+    if memo is not None and name in memo:
+        return memo[name]
+
+    try:
+        url = _storage_url(name)
+        if not url.startswith(("http://", "https://")) and request is not None:
+            url = request.build_absolute_uri(url)
+    except (ValueError, SuspiciousOperation):
+        # Unusable stored names (ValueError, SuspiciousFileOperation) and
+        # disallowed request hosts (DisallowedHost).
+        logger.warning("Could not resolve avatar URL for %r", name, exc_info=True)
+        return None
+
+    if memo is not None:
+        memo[name] = url
+    return url
@@ -0,0 +1,194 @@
+import tracemalloc
+
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.common.benchmarks import register, timed
+from apps.messaging.models import Message
+from apps.messaging.serializers import ChatUserSummarySerializer, MessageSerializer
+from apps.users.api.views import EmailOrUsernameTokenObtainPairSerializer
+from apps.users.authentication import LightweightJWTAuthentication
+from apps.users.models import User, UserChatKey
+from apps.users.serializers import UserSerializer
+
+
+MESSAGES = 500
+USERS = 500
+LOGIN_EMAIL = "Bench.Login@Example.com"
+LOGIN_PASSWORD = "correct horse battery staple"
+PBKDF2 = ["apps.users.hashers.PBKDF2PasswordHasher"]
+SCRYPT = ["apps.users.hashers.ScryptPasswordHasher"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _InlineAvatarSummarySerializer(ChatUserSummarySerializer):
+    """Per-object storage lookup, as every summary serializer did before the resolver."""
+
+    def get_avatar(self, obj) -> str | None:
+        if not getattr(obj, "avatar", None):
+            return None
+        try:
+            url = obj.avatar.url
+            if isinstance(url, str) and url.startswith(("http://", "https://")):
+                return url
+            request = self.context.get("request")
+            if request:
+                return request.build_absolute_uri(url)
+            return url
+        except Exception:
+            return None
+
+
+class _InlineAvatarMessageSerializer(MessageSerializer):
+    sender = _InlineAvatarSummarySerializer(read_only=True)
+
+
+@register("users.avatar_urls", "Serialize a 500-message conversation: inline avatar lookups vs shared resolver")
+def avatar_urls(iterations: int) -> dict[str, float]:
+    host = User(email="bench-host@example.com", username="bench-host", avatar="avatars/bench-host.jpg")
+    guest = User(email="bench-guest@example.com", username="bench-guest", avatar="avatars/bench-guest.jpg")
+    messages = [Message(sender=(host, guest)[i % 2], body=f"message {i}") for i in range(MESSAGES)]
+    factory = RequestFactory()
+
+    def run(serializer_class):
+        def serialize():
+            request = factory.get("/api/v1/messaging/conversations/")
+            return serializer_class(messages, many=True, context={"request": request}).data
+        return serialize
+
+    return {
+        "inline lookups": timed(run(_InlineAvatarMessageSerializer), iterations),
+        "shared resolver": timed(run(MessageSerializer), iterations),
+    }
+
+
+@register("users.login", "Logins per second on one core: iexact + default PBKDF2 vs indexed lookup at configured costs")
+def login(iterations: int) -> dict[str, float]:
+    def before():
+        user = User.objects.get(email__iexact=LOGIN_EMAIL.lower())
+        assert user.check_password(LOGIN_PASSWORD)
+        refresh = RefreshToken.for_user(user)
+        str(refresh), str(refresh.access_token), UserSerializer(user).data
+
+    def after():
+        serializer = EmailOrUsernameTokenObtainPairSerializer(
+            data={"email": LOGIN_EMAIL.lower(), "password": LOGIN_PASSWORD}
+        )
+        assert serializer.is_valid()
+
+    variants = [
+        ("before: iexact, PBKDF2 1M", before, {"PASSWORD_HASHERS": PBKDF2}),
+        ("LOWER(email), PBKDF2 1M", after, {"PASSWORD_HASHERS": PBKDF2}),
+        ("LOWER(email), PBKDF2 600k", after, {"PASSWORD_HASHERS": PBKDF2, "PASSWORD_PBKDF2_ITERATIONS": 600_000}),
+        ("LOWER(email), scrypt N=2^14", after, {"PASSWORD_HASHERS": SCRYPT}),
+    ]
+    results: dict[str, float] = {}
+    for label, func, overrides in variants:
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                # Hash under the same settings so no login triggers a rehash.
+                User.objects.create_user(email=LOGIN_EMAIL, username="bench-login", password=LOGIN_PASSWORD)
+                results[label] = timed(func, iterations)
+                raise _Rollback
+        except _Rollback:
+            pass
+    return results
+
+
+@register("users.jwt_auth", "Authenticate a JWT request: full User row vs cached principal with deferred columns")
+def jwt_auth(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email="bench-auth@example.com",
+                username="bench-auth",
+                password=None,
+            )
+            token = str(RefreshToken.for_user(user).access_token)
+            factory = RequestFactory()
+
+            def run(authentication, read_profile=False):
+                def authenticate():
+                    request = Request(factory.get("/api/v1/bookings/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+                    authenticated, _ = authentication.authenticate(request)
+                    authenticated.pk
+                    if read_profile:
+                        authenticated.email
+                return authenticate
+
+            results["JWTAuthentication"] = timed(run(JWTAuthentication()), iterations)
+            results["LightweightJWTAuthentication"] = timed(run(LightweightJWTAuthentication()), iterations)
+            results["Lightweight + profile field read"] = timed(
+                run(LightweightJWTAuthentication(), read_profile=True), iterations
+            )
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+def _row_bytes(rows) -> float:
+    """Average bytes of column data per row."""
+    rows = list(rows)
+    return sum(len(str(value)) for row in rows for value in row if value is not None) / len(rows)
+
+
+def _peak_kib(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+@register("users.chat_key_split", "Load 500 users as list joins do: chat key columns inline vs split into UserChatKey")
+def chat_key_split(iterations: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(email=f"bench-split-{i}@example.com", username=f"bench-split-{i}", password="!")
+                for i in range(USERS)
+            ])
+            UserChatKey.objects.bulk_create([
+                UserChatKey(
+                    user=user,
+                    public_key="k" * 600,
+                    algorithm="RSA-OAEP-256",
+                    version=1,
+                    private_key_backup="b" * 4096,
+                    backup_iv="i" * 16,
+                    backup_salt="s" * 24,
+                    backup_kdf="PBKDF2-SHA256",
+                    backup_kdf_iterations=600_000,
+                    backup_cipher="AES-GCM",
+                    backup_version=1,
+                )
+                for user in users
+            ])
+            ids = [user.pk for user in users]
+            # Joining the key row back in reads what the old wide users_user row carried.
+            inline = User.objects.filter(pk__in=ids).select_related("chat_key")
+            split = User.objects.filter(pk__in=ids)
+            key_columns = [
+                f"chat_key__{field.attname}"
+                for field in UserChatKey._meta.concrete_fields
+                if field.attname not in ("id", "user_id", "created_at", "updated_at")
+            ]
+            inline_width = _row_bytes(split.values_list(*[f.attname for f in User._meta.concrete_fields], *key_columns))
+            split_width = _row_bytes(split.values_list())
+            for label, queryset, width in (("inline", inline, inline_width), ("split", split, split_width)):
+                load = lambda queryset=queryset: list(queryset.all())  # noqa: E731
+                results[f"{label}: {width:.0f} B/row, {_peak_kib(load):.0f} KiB peak"] = timed(load, iterations)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
@@ -0,0 +1,33 @@
+"""
+Password hashers whose cost comes from settings.
+
+They keep Django's algorithm names, so existing hashes are read by them, and
+Django's `check_password` rehashes a password on the next successful login
+whenever its stored algorithm or cost differs from the current settings.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256; iterations from `PASSWORD_PBKDF2_ITERATIONS`."""
+
+    @property
+    def iterations(self) -> int:
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or hashers.PBKDF2PasswordHasher.iterations
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt; CPU/memory cost (N) from `PASSWORD_SCRYPT_WORK_FACTOR`."""
+
+    @property
+    def work_factor(self) -> int:
+        return getattr(settings, "PASSWORD_SCRYPT_WORK_FACTOR", None) or hashers.ScryptPasswordHasher.work_factor
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id (needs argon2-cffi); passes from `PASSWORD_ARGON2_TIME_COST`."""
+
+    @property
+    def time_cost(self) -> int:
+        return getattr(settings, "PASSWORD_ARGON2_TIME_COST", None) or hashers.Argon2PasswordHasher.time_cost
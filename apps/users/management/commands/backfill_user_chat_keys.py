@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.services import backfill_chat_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy chat keys from the legacy users_user chat_* columns into UserChatKey. "
+        "Run after creating the users_userchatkey table, making the old columns nullable and deploying, "
+        "and before dropping the old columns (see README, Deployment)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        created = backfill_chat_keys(batch_size=options["batch_size"])
+        self.stdout.write(f"Created {created} chat key row(s).")
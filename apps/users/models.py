@@ -2,6 +2,7 @@ import uuid
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 from apps.common.models import TimeStampedModel
 
@@ -42,22 +43,64 @@ class User(TimeStampedModel, AbstractUser):
         blank=True,
         help_text="Profile photo for the user.",
     )
-    chat_public_key = models.TextField(blank=True, default="")
-    chat_key_algorithm = models.CharField(max_length=64, blank=True, default="")
-    chat_key_version = models.PositiveIntegerField(default=0)
-    chat_key_uploaded_at = models.DateTimeField(null=True, blank=True)
-    chat_private_key_backup = models.TextField(blank=True, default="")
-    chat_private_key_backup_iv = models.CharField(max_length=255, blank=True, default="")
-    chat_private_key_backup_salt = models.CharField(max_length=255, blank=True, default="")
-    chat_private_key_backup_kdf = models.CharField(max_length=64, blank=True, default="")
-    chat_private_key_backup_kdf_iterations = models.PositiveIntegerField(default=0)
-    chat_private_key_backup_cipher = models.CharField(max_length=64, blank=True, default="")
-    chat_private_key_backup_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    class Meta:
+        indexes = [
+            # Serves case-insensitive login lookups (apps.users.selectors.get_users_by_email).
+            models.Index(Lower("email"), name="users_user_email_lower_idx"),
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        """
+        Reading one deferred field loads every deferred field in one query
+        instead of one query per attribute. Authenticated request users start
+        out deferred.
+        """
+        if fields is not None:
+            fields = list(set(fields) | self.get_deferred_fields())
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+    def get_chat_key(self) -> "UserChatKey":
+        """The user's chat key row, or an unsaved empty one if none was uploaded."""
+        try:
+            return self.chat_key
+        except UserChatKey.DoesNotExist:
+            return UserChatKey(user=self)
+
     @property
     def has_chat_key(self) -> bool:
-        return bool(self.chat_public_key and self.chat_private_key_backup)
+        return self.get_chat_key().has_backup
+
+
+class UserChatKey(TimeStampedModel):
+    """
+    A user's end-to-end chat key: the public key other participants encrypt
+    to, and the passphrase-encrypted backup of the private key.
 
+    Kept out of `User` so the multi-KB key material is not read with every
+    host, guest and sender join; only the chat-key endpoint and the chat
+    serializers load it, via `select_related`/`prefetch_related("chat_key")`.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="chat_key")
+    public_key = models.TextField(blank=True, default="")
+    algorithm = models.CharField(max_length=64, blank=True, default="")
+    version = models.PositiveIntegerField(default=0)
+    uploaded_at = models.DateTimeField(null=True, blank=True)
+    private_key_backup = models.TextField(blank=True, default="")
+    backup_iv = models.CharField(max_length=255, blank=True, default="")
+    backup_salt = models.CharField(max_length=255, blank=True, default="")
+    backup_kdf = models.CharField(max_length=64, blank=True, default="")
+    backup_kdf_iterations = models.PositiveIntegerField(default=0)
+    backup_cipher = models.CharField(max_length=64, blank=True, default="")
+    backup_version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Chat key for {self.user_id}"
+
+    @property
+    def has_backup(self) -> bool:
+        return bool(self.public_key and self.private_key_backup)
@@ -1 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
 
+
+User = get_user_model()
+
+
+def get_users_by_email(email: str):
+    """
+    Case-insensitive email match written as `LOWER(email) = <lowercased>`, so
+    it can use the `users_user_email_lower_idx` functional index (`iexact`
+    compiles to UPPER/LIKE forms that cannot).
+    """
+    return User.objects.alias(email_lower=Lower("email")).filter(email_lower=email.lower())
@@ -2,6 +2,10 @@ from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
 
+from apps.users.avatars import resolve_avatar_url
+from apps.users.models import UserChatKey
+from apps.users.selectors import get_users_by_email
+
 
 User = get_user_model()
 
@@ -11,6 +15,9 @@ class UserSerializer(serializers.ModelSerializer):
 
     avatar = serializers.SerializerMethodField()
     has_chat_key = serializers.SerializerMethodField()
+    chat_key_algorithm = serializers.CharField(source="get_chat_key.algorithm", read_only=True)
+    chat_key_version = serializers.IntegerField(source="get_chat_key.version", read_only=True)
+    chat_key_uploaded_at = serializers.DateTimeField(source="get_chat_key.uploaded_at", read_only=True)
 
     class Meta:
         model = User
@@ -29,51 +36,29 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_avatar(self, obj) -> str | None:
-        """
-        Return an absolute URL for the user's avatar if available.
-        Cloudinary storage returns absolute HTTPS URLs directly.
-        """
-
-        if not getattr(obj, "avatar", None):
-            return None
-
-        try:
-            avatar_url = obj.avatar.url
-            # Cloudinary returns absolute HTTPS URLs like:
-            # https://res.cloudinary.com/{cloud_name}/image/upload/...
-            if isinstance(avatar_url, str):
-                # If it's already an absolute URL (Cloudinary), return it
-                if avatar_url.startswith(("http://", "https://")):
-                    return avatar_url
-                # If it's a relative path (shouldn't happen with Cloudinary), build absolute
-                request = self.context.get("request")
-                if request:
-                    return request.build_absolute_uri(avatar_url)
-                return avatar_url
-            return str(avatar_url)
-        except Exception:
-            # If there's any error getting the URL, return None
-            return None
+        """Absolute URL for the user's avatar if available."""
+        return resolve_avatar_url(obj, self.context.get("request"))
 
     def get_has_chat_key(self, obj) -> bool:
         return obj.has_chat_key
 
 
 class ChatKeyBackupSerializer(serializers.ModelSerializer):
-    public_key = serializers.CharField(source="chat_public_key")
-    key_algorithm = serializers.CharField(source="chat_key_algorithm")
-    key_version = serializers.IntegerField(source="chat_key_version", min_value=1)
-    encrypted_private_key = serializers.CharField(source="chat_private_key_backup")
-    backup_iv = serializers.CharField(source="chat_private_key_backup_iv")
-    backup_salt = serializers.CharField(source="chat_private_key_backup_salt")
-    backup_kdf = serializers.CharField(source="chat_private_key_backup_kdf")
-    backup_kdf_iterations = serializers.IntegerField(source="chat_private_key_backup_kdf_iterations", min_value=1)
-    backup_cipher = serializers.CharField(source="chat_private_key_backup_cipher")
-    backup_version = serializers.IntegerField(source="chat_private_key_backup_version", min_value=1)
-    has_backup = serializers.SerializerMethodField()
+    public_key = serializers.CharField()
+    key_algorithm = serializers.CharField(source="algorithm")
+    key_version = serializers.IntegerField(source="version", min_value=1)
+    encrypted_private_key = serializers.CharField(source="private_key_backup")
+    backup_iv = serializers.CharField()
+    backup_salt = serializers.CharField()
+    backup_kdf = serializers.CharField()
+    backup_kdf_iterations = serializers.IntegerField(min_value=1)
+    backup_cipher = serializers.CharField()
+    backup_version = serializers.IntegerField(min_value=1)
+    chat_key_uploaded_at = serializers.DateTimeField(source="uploaded_at", read_only=True)
+    has_backup = serializers.BooleanField(read_only=True)
 
     class Meta:
-        model = User
+        model = UserChatKey
         fields = [
             "has_backup",
             "public_key",
@@ -90,9 +75,6 @@ class ChatKeyBackupSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["has_backup", "chat_key_uploaded_at"]
 
-    def get_has_backup(self, obj) -> bool:
-        return obj.has_chat_key
-
     def validate_public_key(self, value: str) -> str:
         value = value.strip()
         if not value:
@@ -119,16 +101,16 @@ class ChatKeyBackupSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         required_fields = [
-            "chat_public_key",
-            "chat_key_algorithm",
-            "chat_key_version",
-            "chat_private_key_backup",
-            "chat_private_key_backup_iv",
-            "chat_private_key_backup_salt",
-            "chat_private_key_backup_kdf",
-            "chat_private_key_backup_kdf_iterations",
-            "chat_private_key_backup_cipher",
-            "chat_private_key_backup_version",
+            "public_key",
+            "algorithm",
+            "version",
+            "private_key_backup",
+            "backup_iv",
+            "backup_salt",
+            "backup_kdf",
+            "backup_kdf_iterations",
+            "backup_cipher",
+            "backup_version",
         ]
         missing = [field for field in required_fields if not attrs.get(field)]
         if missing:
@@ -204,7 +186,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     def validate_email(self, value: str) -> str:
         # enforce uniqueness excluding current user
         user_id = self.instance.id if self.instance else None
-        qs = User.objects.filter(email__iexact=value)
+        qs = get_users_by_email(value)
         if user_id is not None:
             qs = qs.exclude(id=user_id)
         if qs.exists():
@@ -1 +1,62 @@
+from django.db import connection, transaction
 
+from apps.users.models import User, UserChatKey
+
+
+# Legacy users_user column -> UserChatKey field, for databases created before
+# the chat key material moved into its own table.
+LEGACY_CHAT_KEY_COLUMNS = {
+    "chat_public_key": "public_key",
+    "chat_key_algorithm": "algorithm",
+    "chat_key_version": "version",
+    "chat_key_uploaded_at": "uploaded_at",
+    "chat_private_key_backup": "private_key_backup",
+    "chat_private_key_backup_iv": "backup_iv",
+    "chat_private_key_backup_salt": "backup_salt",
+    "chat_private_key_backup_kdf": "backup_kdf",
+    "chat_private_key_backup_kdf_iterations": "backup_kdf_iterations",
+    "chat_private_key_backup_cipher": "backup_cipher",
+    "chat_private_key_backup_version": "backup_version",
+}
+
+
+def legacy_chat_key_columns_present() -> bool:
+    with connection.cursor() as cursor:
+        columns = {col.name for col in connection.introspection.get_table_description(cursor, User._meta.db_table)}
+    return set(LEGACY_CHAT_KEY_COLUMNS) <= columns
+
+
+def backfill_chat_keys(batch_size: int = 500) -> int:
+    """
+    Copy chat keys from the legacy users_user columns into UserChatKey rows.
+
+    Only users with a public key or a backup are copied, and users that
+    already have a UserChatKey are left alone, so the copy can be re-run.
+    Returns the number of rows created (0 if the legacy columns are gone).
+    """
+    if not legacy_chat_key_columns_present():
+        return 0
+
+    qn = connection.ops.quote_name
+    legacy = list(LEGACY_CHAT_KEY_COLUMNS)
+    sql = (
+        f"SELECT u.{qn('id')}, {', '.join(f'u.{qn(col)}' for col in legacy)}"
+        f" FROM {qn(User._meta.db_table)} u"
+        f" WHERE (u.{qn('chat_public_key')} <> '' OR u.{qn('chat_private_key_backup')} <> '')"
+        f" AND NOT EXISTS (SELECT 1 FROM {qn(UserChatKey._meta.db_table)} k WHERE k.{qn('user_id')} = u.{qn('id')})"
+    )
+    user_id_field = User._meta.pk
+    created = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql)
+        while rows := cursor.fetchmany(batch_size):
+            keys = [
+                UserChatKey(
+                    user_id=user_id_field.to_python(row[0]),
+                    **dict(zip(LEGACY_CHAT_KEY_COLUMNS.values(), row[1:])),
+                )
+                for row in rows
+            ]
+            UserChatKey.objects.bulk_create(keys, ignore_conflicts=True)
+            created += len(keys)
+    return created
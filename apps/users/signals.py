@@ -0,0 +1,28 @@
+"""
+Signals that drop a user's cached authentication principal when the facts it
+holds (existence, is_active) or the password change.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.authentication import invalidate_principal
+
+
+User = get_user_model()
+
+PRINCIPAL_FIELDS = {"is_active", "password"}
+
+
+@receiver(post_save, sender=User)
+def on_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Deactivated, reactivated or password changed (a last_login update is not)."""
+    if created or (update_fields is not None and not PRINCIPAL_FIELDS & set(update_fields)):
+        return
+    invalidate_principal(instance)
+
+
+@receiver(post_delete, sender=User)
+def on_user_deleted(sender, instance, **kwargs):
+    invalidate_principal(instance)
@@ -6,6 +6,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from apps.listings.models import Listing
+from apps.common.sparse_fields import requested_fields, trim
 from apps.listings.serializers import ListingListSerializer
 from apps.wishlist.models import WishlistItem
 
@@ -15,12 +16,12 @@ from apps.wishlist.models import WishlistItem
 def wishlist_list(request):
     """
     GET /api/v1/wishlist/
-    Returns the current user's wishlisted listings.
+    Returns the current user's wishlisted listings; `?fields=` trims the cards.
     """
     items = WishlistItem.objects.filter(user=request.user).select_related("listing", "listing__host")
     listings = [item.listing for item in items]
     serializer = ListingListSerializer(listings, many=True, context={"request": request})
-    return Response(serializer.data)
+    return Response(trim(serializer.data, requested_fields(request)))
 
 
 @api_view(["POST", "DELETE"])
@@ -0,0 +1,41 @@
+"""
+Process environment bootstrap shared by every entry point (manage.py, run.py,
+serve.py, ASGI/WSGI) and the settings package.
+
+`load_env()` reads BASE_DIR/.env into os.environ once per process; variables
+already set in the environment win. `settings_module()` maps DJANGO_ENV to
+the settings module to use.
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+_loaded = False
+
+
+def load_env() -> None:
+    global _loaded
+    if not _loaded:
+        load_dotenv(BASE_DIR / ".env")
+        _loaded = True
+
+
+def django_env() -> str:
+    """'production' or 'development' from DJANGO_ENV ("prod" is accepted too)."""
+    load_env()
+    env = os.getenv("DJANGO_ENV", "development").lower().strip()
+    return "production" if env in {"production", "prod"} else "development"
+
+
+def settings_module() -> str:
+    return "config.settings.prod" if django_env() == "production" else "config.settings.dev"
+
+
+def configure() -> None:
+    """Load .env and default DJANGO_SETTINGS_MODULE for DJANGO_ENV."""
+    load_env()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module())
@@ -4,17 +4,13 @@ from urllib.parse import urlparse
 
 import dj_database_url
 from corsheaders.defaults import default_headers
-from dotenv import load_dotenv
 
+from config.env import django_env, load_env
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-
-load_dotenv(BASE_DIR / ".env")
 
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-def _get_app_env() -> str:
-    env = os.getenv("DJANGO_ENV", "development").strip().lower()
-    return "production" if env in {"production", "prod"} else "development"
+load_env()
 
 
 def _split_env_values(name: str) -> list[str]:
@@ -30,7 +26,7 @@ def _get_env_url(dev_var: str, prod_var: str, app_env: str) -> str:
     return value
 
 
-APP_ENV = _get_app_env()
+APP_ENV = django_env()
 FRONTEND_BASE_URL = _get_env_url("FRONTEND_URL_DEV", "FRONTEND_URL_PROD", APP_ENV)
 BACKEND_BASE_URL = _get_env_url("BACKEND_URL_DEV", "BACKEND_URL_PROD", APP_ENV)
 
@@ -46,7 +42,6 @@ DEBUG = False
 ALLOWED_HOSTS: list[str] = _split_env_values("DJANGO_ALLOWED_HOSTS") or _default_allowed_hosts
 
 INSTALLED_APPS = [
-    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -65,7 +60,6 @@ INSTALLED_APPS = [
     "channels",
     # Cloud media storage (ALL environments)
     "cloudinary_storage",
-    "cloudinary",
     # project apps
     "apps.common.apps.CommonConfig",
     "apps.users.apps.UsersConfig",
@@ -80,7 +74,11 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    # Outermost, so sampled profiles cover every other middleware too.
+    "apps.common.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Before anything else that reads or rewrites response bodies.
+    "apps.common.middleware.CompressionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -90,6 +88,7 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.common.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -112,13 +111,64 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
+# Max concurrent HTTP requests (= sync view threads) per ASGI worker process;
+# 0 = unlimited. serve.py sets it from --threads.
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "0"))
+# Target time for a fresh worker to import the ASGI app and URLconf
+# (`manage.py profile_imports --check`).
+COLD_START_BUDGET_MS = int(os.getenv("COLD_START_BUDGET_MS", "1000"))
+
+
+# Connection pool options accepted as DATABASE_URL query parameters, mapped to
+# psycopg_pool.ConnectionPool arguments.
+_POOL_URL_OPTIONS = {
+    "pool_min_size": "min_size",
+    "pool_max_size": "max_size",
+    "pool_timeout": "timeout",
+    "pool_max_waiting": "max_waiting",
+    "pool_max_idle": "max_idle",
+    "pool_max_lifetime": "max_lifetime",
+}
+
+
+def _parse_database_url(url: str) -> dict:
+    """
+    Parse DATABASE_URL. Besides libpq parameters (sslmode, ...), the query
+    string can set:
+
+    - `pool=true`: psycopg's connection pool, shared by all threads of the
+      process (request threads under ASGI, database_sync_to_async calls), so a
+      TLS handshake happens once per pooled connection instead of per thread.
+      Sized with `pool_min_size` / `pool_max_size`; `pool_timeout` is how long
+      a request waits for a free connection. Connections are checked on
+      checkout unless `conn_health_checks=false`.
+    - `pgbouncer=true`: behind PgBouncer in transaction mode, so no
+      server-side cursors and no persistent connections.
+    - `conn_max_age` (default 600; forced to 0 by the two modes above) and
+      `conn_health_checks`.
+    """
+    config = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True, ssl_require=True)
+    options = config["OPTIONS"]
+    if "conn_max_age" in options:
+        config["CONN_MAX_AGE"] = int(options.pop("conn_max_age"))
+    if "conn_health_checks" in options:
+        config["CONN_HEALTH_CHECKS"] = str(options.pop("conn_health_checks")).lower() in ("true", "1", "yes")
+
+    pool_options = {name: options.pop(param) for param, name in _POOL_URL_OPTIONS.items() if param in options}
+    if str(options.pop("pool", "")).lower() in ("true", "1", "yes"):
+        options["pool"] = pool_options or True
+        config["CONN_MAX_AGE"] = 0
+    if str(options.pop("pgbouncer", "")).lower() in ("true", "1", "yes"):
+        config["DISABLE_SERVER_SIDE_CURSORS"] = True
+        config["CONN_MAX_AGE"] = 0
+    return config
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if DATABASE_URL:
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True),
+        "default": _parse_database_url(DATABASE_URL),
     }
 else:
     # Local development fallback (SQLite). This is weaker than Postgres for
@@ -131,6 +181,88 @@ else:
         }
     }
 
+# Read replicas: space/comma separated URLs, parsed like DATABASE_URL. Safe
+# requests read from them (apps.common.db_router); a client that writes is
+# pinned to the primary for DATABASE_REPLICA_PIN_SECONDS to cover replica lag.
+DATABASE_REPLICAS: list[str] = []
+for _index, _url in enumerate(_split_env_values("DATABASE_REPLICA_URLS"), start=1):
+    DATABASES[f"replica_{_index}"] = {**_parse_database_url(_url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica_{_index}")
+DATABASE_ROUTERS = ["apps.common.db_router.ReplicaRouter"]
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "10"))
+
+
+# Cache aliases (see apps.common.cache) and their default entry timeouts.
+_CACHE_ALIAS_TIMEOUTS = {
+    "default": 300,
+    "hot": 300,
+    "fragments": 600,
+    "ratelimit": 3600,
+}
+
+
+def _parse_cache_url(url: str, alias: str) -> dict:
+    """
+    Parse CACHE_URL for one alias:
+
+    - `redis://[:password@]host:6379/0` (or `rediss://`, `unix://`): Django's
+      RedisCache, shared by every worker; needs the redis package.
+    - `file:///var/tmp/wanderleaf-cache`: FileBasedCache, one directory per
+      alias; shared by the workers of one host.
+    - `locmem://` (the default): LocMemCache, per process.
+    - `dummy://`: caches nothing.
+
+    Aliases sharing a Redis database are kept apart by KEY_PREFIX.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    config = {"KEY_PREFIX": alias, "TIMEOUT": _CACHE_ALIAS_TIMEOUTS.get(alias, 300)}
+    if scheme in ("redis", "rediss", "unix"):
+        config.update(BACKEND="django.core.cache.backends.redis.RedisCache", LOCATION=url)
+    elif scheme == "file":
+        config.update(
+            BACKEND="django.core.cache.backends.filebased.FileBasedCache",
+            LOCATION=os.path.join(parsed.path, alias),
+        )
+    elif scheme in ("locmem", ""):
+        config.update(BACKEND="django.core.cache.backends.locmem.LocMemCache", LOCATION=alias)
+    elif scheme == "dummy":
+        config.update(BACKEND="django.core.cache.backends.dummy.DummyCache")
+    else:
+        raise RuntimeError(f"Unsupported CACHE_URL scheme: {parsed.scheme!r}")
+    return config
+
+
+# CACHE_URL picks the backend of every alias; CACHE_URL_<ALIAS> (e.g.
+# CACHE_URL_RATELIMIT) overrides one of them.
+CACHE_URL = os.getenv("CACHE_URL", "locmem://")
+CACHES = {
+    alias: _parse_cache_url(os.getenv(f"CACHE_URL_{alias.upper()}", CACHE_URL), alias)
+    for alias in _CACHE_ALIAS_TIMEOUTS
+}
+
+
+# Password hashing. PASSWORD_HASHER picks the algorithm for new hashes
+# ("pbkdf2", "scrypt" or "argon2", which needs argon2-cffi); the others stay
+# listed so existing hashes still verify. A hash whose algorithm or cost no
+# longer matches is upgraded transparently on the user's next login.
+# Empty cost settings keep Django's defaults (PBKDF2: 1,000,000 iterations;
+# OWASP's floor for PBKDF2-HMAC-SHA256 is 600,000).
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2").lower()
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "0")) or None
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", "0")) or None
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "0")) or None
+_PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "apps.users.hashers.PBKDF2PasswordHasher",
+    "scrypt": "apps.users.hashers.ScryptPasswordHasher",
+    "argon2": "apps.users.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -169,23 +301,19 @@ CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 
-if not (CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET):
-    raise RuntimeError(
-        "Cloudinary credentials are required. "
-        "Set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET in your environment."
-    )
-
-import cloudinary  # noqa: E402
-import cloudinary.api  # noqa: E402
-import cloudinary.uploader  # noqa: E402
-
+# The SDK is imported and configured on first use (cloudinary_storage for
+# media files, apps.common.uploads for direct uploads), which raise
+# ImproperlyConfigured if credentials are missing; `check --deploy` reports it.
 CLOUDINARY_STORAGE = {
-    "CLOUD_NAME": CLOUDINARY_CLOUD_NAME,
-    "API_KEY": CLOUDINARY_API_KEY,
-    "API_SECRET": CLOUDINARY_API_SECRET,
     # Force secure URLs (HTTPS)
     "SECURE": True,
 }
+if CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET:
+    CLOUDINARY_STORAGE.update(
+        CLOUD_NAME=CLOUDINARY_CLOUD_NAME,
+        API_KEY=CLOUDINARY_API_KEY,
+        API_SECRET=CLOUDINARY_API_SECRET,
+    )
 
 # Django 5+ storage configuration
 STORAGES = {
@@ -197,16 +325,80 @@ STORAGES = {
     },
 }
 
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET,
-    secure=True,  # Force HTTPS URLs
-)
+# `manage.py test` swaps the default storage for a temporary local directory.
+TEST_RUNNER = "apps.common.test_runner.TestRunner"
+
+# Direct media uploads (listing photos, chat attachments). Set the backend to
+# "apps.common.uploads.LocalUploadBackend" to work offline.
+MEDIA_UPLOAD_BACKEND = os.getenv("MEDIA_UPLOAD_BACKEND", "apps.common.uploads.CloudinaryUploadBackend")
+MEDIA_UPLOAD_CONCURRENCY = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", "4"))
+MEDIA_UPLOAD_LOCAL_ROOT = Path(os.getenv("MEDIA_UPLOAD_LOCAL_ROOT", str(BASE_DIR / "local_uploads")))
+# Decode/resize workers for the listing image pipeline (defaults to CPU count).
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "0")) or None
+# Lifetime of signed direct-upload tickets (sign -> upload -> confirm).
+DIRECT_UPLOAD_TICKET_SECONDS = int(os.getenv("DIRECT_UPLOAD_TICKET_SECONDS", "900"))
+# Resumable chat attachment uploads. Cloudinary needs every chunk but the
+# last to be at least 5 MB.
+CHAT_ATTACHMENT_CHUNK_BYTES = int(os.getenv("CHAT_ATTACHMENT_CHUNK_BYTES", str(5 * 1024 * 1024)))
+CHAT_ATTACHMENT_UPLOAD_TTL_HOURS = int(os.getenv("CHAT_ATTACHMENT_UPLOAD_TTL_HOURS", "24"))
+
+# Per-process availability index (apps/bookings/availability.py). Versions live
+# in the default cache, so enable it with a shared cache when running several workers.
+BOOKING_AVAILABILITY_INDEX_ENABLED = os.getenv("BOOKING_AVAILABILITY_INDEX_ENABLED", "false").lower() in ("true", "1", "yes")
+BOOKING_AVAILABILITY_INDEX_MAX_LISTINGS = int(os.getenv("BOOKING_AVAILABILITY_INDEX_MAX_LISTINGS", "1024"))
+
+# Render listing, booking, review and message lists from `.values()` rows
+# (apps/common/row_serializers.py) instead of DRF ModelSerializers.
+ROW_SERIALIZERS_ENABLED = os.getenv("ROW_SERIALIZERS_ENABLED", "true").lower() in ("true", "1", "yes")
+
+# Response compression (apps.common.middleware.CompressionMiddleware): JSON
+# and text bodies of at least COMPRESSION_MIN_BYTES, with the first of
+# COMPRESSION_ENCODINGS the client accepts. zstd and br need the zstandard
+# and brotli packages; without them gzip is used.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_ENCODINGS = _split_env_values("COMPRESSION_ENCODINGS") or ["zstd", "br", "gzip"]
+
+# ETag / Last-Modified on listing, review and booking reads, with 304s
+# answered before serialization (apps/common/conditional.py).
+CONDITIONAL_GET_ENABLED = os.getenv("CONDITIONAL_GET_ENABLED", "true").lower() in ("true", "1", "yes")
+
+# Sampled request profiling (apps/common/profiling.py): the fraction of HTTP
+# requests and websocket messages to profile (0 disables it). Profiles of at
+# least PROFILING_MIN_DURATION_MS are appended to PROFILING_SINK_PATH as JSON
+# lines; `manage.py profile_report` summarises them.
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MIN_DURATION_MS = float(os.getenv("PROFILING_MIN_DURATION_MS", "0"))
+PROFILING_SINK_PATH = Path(os.getenv("PROFILING_SINK_PATH", str(BASE_DIR / "profiles" / "requests.jsonl")))
+
+# Prometheus metrics at /metrics (apps/common/metrics.py), for scrapers sending
+# `Authorization: Bearer <METRICS_TOKEN>` (without a token, only in DEBUG). With
+# several worker processes, point METRICS_DIR at a directory they share: each
+# writes its values there every METRICS_FLUSH_SECONDS and scrapes add them up
+# (serve.py empties it on start).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
 
 # Razorpay (optional; used for booking payments)
 RZP_TEST_KEY_ID = os.getenv("RZP_TEST_KEY_ID")
 RZP_TEST_KEY_SECRET = os.getenv("RZP_TEST_KEY_SECRET")
+# Override to point at the local fake gateway (`manage.py run_fake_gateway`).
+RZP_API_BASE_URL = os.getenv("RZP_API_BASE_URL", "").strip().rstrip("/")
+RZP_TIMEOUT_SECONDS = float(os.getenv("RZP_TIMEOUT_SECONDS", "10"))
+RZP_POOL_MAXSIZE = int(os.getenv("RZP_POOL_MAXSIZE", "10"))
+RZP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("RZP_CIRCUIT_FAILURE_THRESHOLD", "5"))
+RZP_CIRCUIT_RESET_SECONDS = float(os.getenv("RZP_CIRCUIT_RESET_SECONDS", "30"))
+# Try queued refunds right after the cancelling transaction commits; the
+# `process_refund_jobs` worker picks up anything that fails or is left behind.
+REFUND_JOBS_DISPATCH_ON_COMMIT = os.getenv("REFUND_JOBS_DISPATCH_ON_COMMIT", "true").lower() in ("true", "1", "yes")
+# Threads per process running those dispatched refund jobs and webhook batches.
+PAYMENT_JOB_CONCURRENCY = int(os.getenv("PAYMENT_JOB_CONCURRENCY", "2"))
+# Webhook receiver (`/api/v1/payments/webhooks/razorpay/`) is disabled until a secret is set.
+RZP_WEBHOOK_SECRET = os.getenv("RZP_WEBHOOK_SECRET", "")
+# Apply webhook events right after they are recorded; `process_webhook_events` drains the rest.
+WEBHOOK_EVENTS_DISPATCH_ON_COMMIT = os.getenv("WEBHOOK_EVENTS_DISPATCH_ON_COMMIT", "true").lower() in ("true", "1", "yes")
+# How long a refund.processed event waits for its payment.captured before it is ignored.
+WEBHOOK_EVENT_DEFER_SECONDS = int(os.getenv("WEBHOOK_EVENT_DEFER_SECONDS", "3600"))
 
 # Email (optional; notifications are skipped when SMTP is selected without a host)
 EMAIL_NOTIFICATIONS_ENABLED = os.getenv("EMAIL_NOTIFICATIONS_ENABLED", "true").lower() in ("true", "1", "yes")
@@ -240,15 +432,45 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.LightweightJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    "DEFAULT_THROTTLE_CLASSES": (
+        "apps.common.throttling.TokenBucketThrottle",
+    ),
+    # Token-bucket rates per throttle scope (apps.common.throttling), keyed by
+    # user or client IP; an empty RATELIMIT_* variable turns a scope off.
+    "DEFAULT_THROTTLE_RATES": {
+        "bookings.availability": os.getenv("RATELIMIT_AVAILABILITY", "120/min") or None,
+        "bookings.pricing": os.getenv("RATELIMIT_PRICING", "60/min") or None,
+        "listings.search": os.getenv("RATELIMIT_LISTING_SEARCH", "120/min") or None,
+        "messaging.send": os.getenv("RATELIMIT_CHAT_MESSAGES", "60/min") or None,
+    },
+    # Client IP = the X-Forwarded-For entry this many hops from the end.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")) or None,
 }
 
+# Dotted path of the token-bucket store; empty picks Redis when the
+# ratelimit cache alias is on Redis, else per-process buckets.
+RATELIMIT_STORE = os.getenv("RATELIMIT_STORE", "")
+
+# JSON backend for API responses and request bodies: "orjson" (falls back to
+# the stdlib when orjson is not installed) or "stdlib".
+API_JSON_BACKEND = os.getenv("API_JSON_BACKEND", "orjson")
+
 from datetime import timedelta  # noqa: E402
 
 SIMPLE_JWT = {
@@ -258,6 +480,10 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# How long LightweightJWTAuthentication trusts a cached (user id, is_active)
+# principal; saves that change is_active or the password drop it at once.
+AUTH_PRINCIPAL_CACHE_SECONDS = int(os.getenv("AUTH_PRINCIPAL_CACHE_SECONDS", "60"))
+
 CHANNELS_REDIS_URL = os.getenv("CHANNELS_REDIS_URL") or os.getenv("CELERY_BROKER_URL")
 
 if CHANNELS_REDIS_URL:
@@ -1,3 +1,7 @@
 from .base import *  # noqa
 
 DEBUG = True
+
+# Daphne's ASGI runserver (HTTP + websockets). Only the dev server needs the
+# app: it imports Twisted at startup, which other processes shouldn't pay for.
+INSTALLED_APPS = ["daphne", *INSTALLED_APPS]  # noqa: F405
@@ -1,8 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from apps.common.api.views import CacheStatsView, DatabasePoolStatsView, HealthView, MetricsView, ReadinessView
+
 
 urlpatterns = [
+    path("healthz/", HealthView.as_view(), name="healthz"),
+    path("readyz/", ReadinessView.as_view(), name="readyz"),
+    path("internal/db/pools/", DatabasePoolStatsView.as_view(), name="internal-db-pools"),
+    path("internal/cache/", CacheStatsView.as_view(), name="internal-cache"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("admin/", admin.site.urls),
     path("api/v1/auth/", include("apps.users.api.urls")),
     path("api/v1/listings/", include("apps.listings.api.urls")),
@@ -11,4 +18,5 @@ urlpatterns = [
     path("api/v1/reviews/", include("apps.reviews.api.urls")),
     path("api/v1/messaging/", include("apps.messaging.api.urls")),
     path("api/v1/wishlist/", include("apps.wishlist.api.urls")),
+    path("api/v1/uploads/", include("apps.common.api.urls")),
 ]
@@ -1,24 +1,12 @@
 #!/usr/bin/env python
-import os
 import sys
-from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables to check DJANGO_ENV
-BASE_DIR = Path(__file__).resolve().parent
-load_dotenv(BASE_DIR / ".env")
-
-# Determine settings module based on DJANGO_ENV flag
-DJANGO_ENV = os.getenv("DJANGO_ENV", "development").lower().strip()
-if DJANGO_ENV in {"production", "prod"}:
-    settings_module = "config.settings.prod"
-else:
-    settings_module = "config.settings.dev"
+from config.env import configure
 
 
 def main() -> None:
     """Run administrative tasks."""
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    configure()
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
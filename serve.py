@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Run the production ASGI server: pools of Daphne worker processes under one supervisor.
+
+    python serve.py                         # HTTP and websockets on $PORT, one worker per core
+    python serve.py --ws-port 8001          # websockets on their own worker pool and port
+    python serve.py -- --proxy-headers      # arguments after "--" go to every daphne worker
+
+The supervisor binds the listening sockets once and every worker in a pool
+accepts on the same socket (`daphne --fd`), so the kernel spreads connections
+across processes. A worker that exits is restarted.
+
+Signals:
+- SIGHUP: graceful reload (e.g. after a deploy). A new generation of workers
+  is started on the same sockets; once it has stayed up for `--reload-grace`
+  seconds the old generation gets SIGTERM, and SIGKILL after
+  `--graceful-timeout`. If the new generation fails, the old one keeps serving.
+- SIGTERM / SIGINT: stop all workers the same way, then exit.
+
+Each worker runs at most `--threads` HTTP requests at once (ASGI_THREADS,
+see apps.common.asgi.SyncThreadLimitMiddleware).
+
+On start the supervisor empties METRICS_DIR (see apps.common.metrics), so a
+new run's counters start from zero rather than adding to the previous run's.
+A reload keeps it: the totals carry on across generations.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from config.env import configure
+
+configure()
+
+logger = logging.getLogger("serve")
+
+ASGI_APP = "config.asgi:application"
+# A worker that dies sooner than this after starting is restarted with a delay.
+MIN_WORKER_UPTIME = 1.0
+
+
+def _default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+
+class Pool:
+    """Worker processes sharing one listening socket."""
+
+    def __init__(self, name: str, sock: socket.socket, size: int):
+        self.name = name
+        self.sock = sock
+        self.size = size
+        self.workers: list[tuple[subprocess.Popen, float]] = []
+
+
+class Supervisor:
+    def __init__(self, pools: list[Pool], daphne_args: list[str], graceful_timeout: float, reload_grace: float):
+        self.pools = pools
+        self.daphne_args = daphne_args
+        self.graceful_timeout = graceful_timeout
+        self.reload_grace = reload_grace
+        self._stopping = False
+        self._reloading = False
+
+    def spawn(self, pool: Pool) -> tuple[subprocess.Popen, float]:
+        fd = pool.sock.fileno()
+        cmd = [sys.executable, "-m", "daphne", "--fd", str(fd), *self.daphne_args, ASGI_APP]
+        proc = subprocess.Popen(cmd, pass_fds=(fd,))
+        logger.info("Started %s worker pid %s", pool.name, proc.pid)
+        return proc, time.monotonic()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+
+        for pool in self.pools:
+            pool.workers = [self.spawn(pool) for _ in range(pool.size)]
+        while not self._stopping:
+            if self._reloading:
+                self._reloading = False
+                self.reload()
+            self.restart_exited()
+            time.sleep(0.2)
+        self.stop([proc for pool in self.pools for proc, _ in pool.workers])
+
+    def restart_exited(self) -> None:
+        for pool in self.pools:
+            for index, (proc, started) in enumerate(pool.workers):
+                if proc.poll() is None:
+                    continue
+                logger.warning("%s worker pid %s exited with %s", pool.name, proc.pid, proc.returncode)
+                if time.monotonic() - started < MIN_WORKER_UPTIME:
+                    time.sleep(MIN_WORKER_UPTIME)
+                pool.workers[index] = self.spawn(pool)
+
+    def reload(self) -> None:
+        logger.info("Reloading workers")
+        fresh = {pool.name: [self.spawn(pool) for _ in range(pool.size)] for pool in self.pools}
+        deadline = time.monotonic() + self.reload_grace
+        while time.monotonic() < deadline:
+            if any(proc.poll() is not None for workers in fresh.values() for proc, _ in workers):
+                logger.error("New workers failed to start; keeping the current ones")
+                self.stop([proc for workers in fresh.values() for proc, _ in workers])
+                return
+            time.sleep(0.1)
+        previous = [proc for pool in self.pools for proc, _ in pool.workers]
+        for pool in self.pools:
+            pool.workers = fresh[pool.name]
+        self.stop(previous)
+        logger.info("Reload complete")
+
+    def stop(self, procs: list[subprocess.Popen]) -> None:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.terminate()
+        deadline = time.monotonic() + self.graceful_timeout
+        for proc in procs:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Worker pid %s did not stop in time; killing it", proc.pid)
+                proc.kill()
+                proc.wait()
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _request_reload(self, signum, frame) -> None:
+        self._reloading = True
+
+
+def _clear_metrics_dir() -> None:
+    # The supervisor does not load Django settings; METRICS_DIR comes from the
+    # environment as in config.settings.
+    directory = os.getenv("METRICS_DIR", "")
+    if not directory:
+        return
+    removed = 0
+    for path in Path(directory).glob("metrics-*"):
+        path.unlink(missing_ok=True)
+        removed += 1
+    if removed:
+        logger.info("Removed %s metrics file(s) from %s", removed, directory)
+
+
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    daphne_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, daphne_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Run the ASGI application under supervised Daphne workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000").strip() or "8000"))
+    parser.add_argument(
+        "--workers", type=int, default=_default_workers(), help="HTTP workers (WEB_CONCURRENCY, default: CPU count)."
+    )
+    parser.add_argument(
+        "--ws-port",
+        type=int,
+        default=int(os.getenv("WS_PORT", "0")) or None,
+        help="Serve websockets from a separate pool on this port (WS_PORT). Default: same pool as HTTP.",
+    )
+    parser.add_argument(
+        "--ws-workers",
+        type=int,
+        default=int(os.getenv("WS_WORKERS", "0")) or None,
+        help="Websocket workers (WS_WORKERS, default: a quarter of --workers, at least 1).",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.getenv("ASGI_THREADS", "32")),
+        help="Concurrent HTTP requests per worker (ASGI_THREADS, default 32; 0 = unlimited).",
+    )
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--reload-grace", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="[serve] %(asctime)s %(levelname)s %(message)s")
+    os.environ["ASGI_THREADS"] = str(args.threads)
+    _clear_metrics_dir()
+
+    pools = [Pool("http", _listen(args.host, args.port, args.backlog), max(1, args.workers))]
+    if args.ws_port:
+        ws_workers = args.ws_workers or max(1, args.workers // 4)
+        pools.append(Pool("websocket", _listen(args.host, args.ws_port, args.backlog), ws_workers))
+    for pool in pools:
+        logger.info("%s pool: %s worker(s) on %s:%s", pool.name, pool.size, *pool.sock.getsockname()[:2])
+
+    Supervisor(pools, daphne_args, args.graceful_timeout, args.reload_grace).run()
+
+
+if __name__ == "__main__":
+    main()